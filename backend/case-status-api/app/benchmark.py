@@ -0,0 +1,221 @@
+"""End-to-end latency of CNR lookups through a running case-status-api.
+
+Each simulated user fetches a CAPTCHA, submits it with the returned session
+token and repeats; a probe hits /health throughout to show whether the event
+loop stays responsive while browsers are busy. With --stub-port the local
+eCourts stub is started in-process, so the API must be pointed at it:
+
+    ECOURTS_URL=http://127.0.0.1:8100/ecourtindia_v6/ uvicorn app.main:app --port 8000
+    python -m app.benchmark --api http://127.0.0.1:8000 --stub-port 8100 --users 8 --lookups 5
+
+--direct http|browser skips the API and drives one backend in-process against
+the stub, reporting lookups per CPU-second (browser and driver processes
+included) and peak RSS, to compare the backends per core:
+
+    python -m app.benchmark --direct http --stub-port 8100 --users 8 --lookups 50
+"""
+import argparse
+import asyncio
+import json
+import resource
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from .ecourts_stub import BASE_PATH, make_stub_server
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def summary(values):
+    return {
+        "count": len(values),
+        "p50_seconds": round(percentile(values, 0.5), 4),
+        "p99_seconds": round(percentile(values, 0.99), 4),
+        "max_seconds": round(max(values), 4) if values else 0.0,
+    }
+
+
+def _post(url, fields=None, timeout=120):
+    data = urllib.parse.urlencode(fields or {}).encode("utf-8")
+    with urllib.request.urlopen(urllib.request.Request(url, data=data, method="POST"), timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def lookup(api, cino, captcha="1234"):
+    """One CAPTCHA + submit round trip; returns (captcha seconds, submit seconds)."""
+    start = time.perf_counter()
+    challenge = _post(f"{api}/")
+    fetched = time.perf_counter()
+    result = _post(f"{api}/submit", {"cino": cino, "captcha": captcha, "session": challenge["session"]})
+    if not result.get("success"):
+        raise RuntimeError(f"lookup failed: {result}")
+    return fetched - start, time.perf_counter() - fetched
+
+
+def run(api, users, lookups):
+    captcha_times, submit_times, total_times, probe_times, errors = [], [], [], [], []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def user(n):
+        for i in range(lookups):
+            try:
+                captcha_seconds, submit_seconds = lookup(api, f"MHPU01{n:04d}{i:06d}")
+            except (OSError, RuntimeError, KeyError) as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                captcha_times.append(captcha_seconds)
+                submit_times.append(submit_seconds)
+                total_times.append(captcha_seconds + submit_seconds)
+
+    def probe():
+        while not done.wait(0.1):
+            start = time.perf_counter()
+            try:
+                urllib.request.urlopen(f"{api}/health", timeout=30).read()
+            except OSError:
+                continue
+            probe_times.append(time.perf_counter() - start)
+
+    prober = threading.Thread(target=probe, daemon=True)
+    prober.start()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+
+    return {
+        "users": users,
+        "lookups": len(total_times),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_seconds": round(elapsed, 3),
+        "lookups_per_second": round(len(total_times) / elapsed, 3) if elapsed else 0.0,
+        "captcha": summary(captcha_times),
+        "submit": summary(submit_times),
+        "end_to_end": summary(total_times),
+        "health_probe": summary(probe_times),
+    }
+
+
+def _cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _direct_http(url, users, lookups):
+    from .http_backend import EcourtsHttpClient
+
+    async def run_all():
+        client = EcourtsHttpClient(url)
+        await client.start()
+        times = []
+
+        async def user(n):
+            for i in range(lookups):
+                start = time.perf_counter()
+                token, _ = await client.fetch_captcha()
+                await client.search(token, f"MHPU01{n:04d}{i:06d}", "1234")
+                times.append(time.perf_counter() - start)
+
+        try:
+            await asyncio.gather(*(user(n) for n in range(users)))
+        finally:
+            await client.aclose()
+        return times
+
+    return asyncio.run(run_all())
+
+
+def _direct_browser(url, users, lookups):
+    from .driver_pool import DriverPool
+    from .ecourts_flow import Deadline, read_captcha, search_case
+
+    pool = DriverPool(url=url, size=users)
+    pool.start()
+    while pool.metrics()["idle"] < users:
+        time.sleep(0.1)
+    times = []
+
+    def user(n):
+        for i in range(lookups):
+            start = time.perf_counter()
+            session = pool.lease()
+            read_captcha(session.driver, Deadline(30))
+            browser = pool.claim(session.token)
+            try:
+                search_case(browser.driver, f"MHPU01{n:04d}{i:06d}", "1234", Deadline(30))
+            finally:
+                pool.release(browser)
+            times.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.close()  # browsers exit here, so their CPU time is counted as children
+    return times
+
+
+def run_direct(backend, url, users, lookups):
+    cpu_before, start = _cpu_seconds(), time.perf_counter()
+    times = (_direct_http if backend == "http" else _direct_browser)(url, users, lookups)
+    elapsed, cpu = time.perf_counter() - start, _cpu_seconds() - cpu_before
+    return {
+        "backend": backend,
+        "users": users,
+        "lookups": len(times),
+        "wall_seconds": round(elapsed, 3),
+        "cpu_seconds": round(cpu, 3),
+        "lookups_per_second": round(len(times) / elapsed, 3),
+        "lookups_per_cpu_second": round(len(times) / cpu, 3) if cpu else None,
+        "max_rss_mb": {
+            "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024,
+            "largest_child": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // 1024,
+        },
+        "lookup": summary(times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CNR lookups through case-status-api.")
+    parser.add_argument("--api", default="http://127.0.0.1:8000", help="base URL of the running API")
+    parser.add_argument("--users", type=int, default=4, help="concurrent simulated users")
+    parser.add_argument("--lookups", type=int, default=5, help="lookups per user")
+    parser.add_argument("--stub-port", type=int, help="also serve the eCourts stub on this port")
+    parser.add_argument("--direct", choices=("http", "browser"), help="benchmark one backend in-process instead")
+    parser.add_argument("--page-delay", type=float, default=0.2, help="stub: seconds before the form page")
+    parser.add_argument("--captcha-delay", type=float, default=0.2, help="stub: seconds before the CAPTCHA image")
+    parser.add_argument("--search-delay", type=float, default=0.5, help="stub: seconds before a search answers")
+    args = parser.parse_args()
+
+    if args.stub_port:
+        server = make_stub_server(args.stub_port, args.page_delay, args.search_delay, args.captcha_delay)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    if args.direct:
+        if not args.stub_port:
+            parser.error("--direct needs --stub-port")
+        url = f"http://127.0.0.1:{args.stub_port}{BASE_PATH}"
+        print(json.dumps(run_direct(args.direct, url, args.users, args.lookups), indent=2))
+        return
+    print(json.dumps(run(args.api.rstrip("/"), args.users, args.lookups), indent=2))
+
+
+if __name__ == "__main__":
+    main()
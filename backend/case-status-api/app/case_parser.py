@@ -0,0 +1,249 @@
+"""Structured record from an eCourts history_cnr block.
+
+parse_case_history is a pure function of the HTML (no browser, no network), so
+it can be run and timed offline against saved pages:
+
+    python -m app.case_parser fixtures/*.html --check --repeat 1000
+
+With --check each fixture is compared with the .json file next to it.
+"""
+import argparse
+import json
+import re
+import time
+from html.parser import HTMLParser
+
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+
+# Row labels in the case details / status tables -> record keys
+FIELDS = {
+    "case type": "case_type",
+    "filing number": "filing_number",
+    "filing date": "filing_date",
+    "registration number": "registration_number",
+    "registration date": "registration_date",
+    "cnr number": "cnr",
+    "first hearing date": "first_hearing_date",
+    "next hearing date": "next_hearing_date",
+    "decision date": "decision_date",
+    "case stage": "stage",
+    "stage of case": "stage",
+    "case status": "status",
+    "nature of disposal": "nature_of_disposal",
+    "court number and judge": "court_and_judge",
+}
+HISTORY_COLUMNS = {
+    "judge": "judge",
+    "business on date": "business_date",
+    "hearing date": "hearing_date",
+    "purpose of hearing": "purpose",
+}
+
+MONTHS = {
+    name: number
+    for number, names in enumerate(
+        (("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",),
+         ("jun", "june"), ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"),
+         ("oct", "october"), ("nov", "november"), ("dec", "december")),
+        1,
+    )
+    for name in names
+}
+_NUMERIC_DATE = re.compile(r"^(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})$")
+_WORDY_DATE = re.compile(r"^(\d{1,2})(?:st|nd|rd|th)?[\s-]+([A-Za-z]+)[\s,-]+(\d{4})$")
+_PARTY = re.compile(r"^\d+\)\s*")
+
+
+class _Node:
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+
+    def classes(self):
+        return (self.attrs.get("class") or "").split()
+
+    def iter(self, *tags):
+        for child in self.children:
+            if isinstance(child, _Node):
+                if not tags or child.tag in tags:
+                    yield child
+                yield from child.iter(*tags)
+
+    def lines(self):
+        """Text split at <br> and block boundaries, whitespace collapsed."""
+        parts = []
+
+        def walk(node):
+            for child in node.children:
+                if isinstance(child, str):
+                    parts.append(child)
+                elif child.tag == "br":
+                    parts.append("\n")
+                else:
+                    block = child.tag in ("div", "p", "tr", "li", "table")
+                    if block:
+                        parts.append("\n")
+                    walk(child)
+                    parts.append("\n" if block else " " if child.tag in ("td", "th") else "")
+
+        walk(self)
+        return [" ".join(line.split()) for line in "".join(parts).split("\n") if line.strip()]
+
+    def text(self):
+        return " ".join(self.lines())
+
+
+class _TreeBuilder(HTMLParser):
+    """Element tree plus the first element for each id and class, so lookups need no search."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = self.current = _Node("#root", {}, None)
+        self.by_id = {}
+        self.by_class = {}
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag, dict(attrs), self.current)
+        self.current.children.append(node)
+        if "id" in node.attrs:
+            self.by_id.setdefault(node.attrs["id"], node)
+        for name in node.classes():
+            self.by_class.setdefault(name, node)
+        if tag not in _VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(_Node(tag, dict(attrs), self.current))
+
+    def handle_endtag(self, tag):
+        # Close up to the matching open tag; ignore stray end tags
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+def _rows(table):
+    return [[cell.text() for cell in row.iter("td", "th")] for row in table.iter("tr")]
+
+
+def normalize_date(value):
+    """ISO date for eCourts date strings ("05-01-2021", "01st February 2021"), else the input."""
+    value = value.strip()
+    match = _NUMERIC_DATE.match(value)
+    if match:
+        day, month, year = (int(part) for part in match.groups())
+    else:
+        match = _WORDY_DATE.match(value)
+        if not match or match.group(2).lower() not in MONTHS:
+            return value
+        day, month, year = int(match.group(1)), MONTHS[match.group(2).lower()], int(match.group(3))
+    if not (1 <= month <= 12 and 1 <= day <= 31):
+        return value
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def _parties(node):
+    """[{"name", "advocates"}] from a "1) Name<br>Advocate- X" block."""
+    parties = []
+    for line in node.lines() if node is not None else ():
+        if line.lower().startswith("advocate"):
+            advocate = line.split("-", 1)[1].strip() if "-" in line else line[len("advocate"):].strip(" :")
+            if parties and advocate:
+                parties[-1]["advocates"].append(advocate)
+        else:
+            parties.append({"name": _PARTY.sub("", line), "advocates": []})
+    return parties
+
+
+def parse_case_history(html):
+    """Case record from history_cnr markup (the block alone or a page containing it).
+
+    Returns None if there is no history_cnr element.
+    """
+    # Everything before the block's start tag is page chrome; don't tokenize it
+    start = html.find("history_cnr")
+    if start < 0:
+        return None
+    builder = _TreeBuilder()
+    builder.feed(html[max(html.rfind("<", 0, start), 0):])
+    builder.close()
+    if "history_cnr" not in builder.by_id:
+        return None
+    root = builder.by_id["history_cnr"]
+    find = builder.by_class.get
+
+    heading = next(root.iter("h2", "h3"), None)
+    record = {"court": heading.text() if heading is not None else None}
+    record.update(dict.fromkeys(FIELDS.values()))
+    details = {}
+    for class_name in ("case_details_table", "case_status_table"):
+        table = find(class_name)
+        for row in _rows(table) if table is not None else ():
+            for label, value in zip(row[::2], row[1::2]):
+                label = " ".join(label.lower().replace(":", " ").split())
+                key = FIELDS.get(label)
+                if label.endswith("date"):
+                    value = normalize_date(value)
+                if key:
+                    record[key] = value
+                elif label:
+                    details[label] = value
+    record["details"] = details
+    record["petitioners"] = _parties(find("Petitioner_Advocate_table"))
+    record["respondents"] = _parties(find("Respondent_Advocate_table"))
+
+    history = []
+    table = find("history_table")
+    rows = _rows(table) if table is not None else []
+    if rows:
+        header = [HISTORY_COLUMNS.get(" ".join(cell.lower().split()), cell) for cell in rows[0]]
+        for row in rows[1:]:
+            entry = dict(zip(header, row))
+            for key in ("business_date", "hearing_date"):
+                if key in entry:
+                    entry[key] = normalize_date(entry[key])
+            history.append(entry)
+    record["history"] = history
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse saved history_cnr pages and time the parser.")
+    parser.add_argument("files", nargs="+", help="HTML fixtures")
+    parser.add_argument("--check", action="store_true", help="compare with the .json next to each fixture")
+    parser.add_argument("--repeat", type=int, default=100, help="parses per file for timing")
+    args = parser.parse_args()
+
+    failures = 0
+    for path in args.files:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        record = parse_case_history(html)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            parse_case_history(html)
+        per_parse = (time.perf_counter() - start) / args.repeat
+        status = ""
+        if args.check:
+            with open(path.rsplit(".", 1)[0] + ".json", "r", encoding="utf-8") as f:
+                expected = json.load(f)
+            status = "ok" if record == expected else "MISMATCH"
+            failures += record != expected
+        print(f"{path}: {len(html)} bytes, {per_parse * 1e6:.0f} us/parse {status}")
+        if not args.check:
+            print(json.dumps(record, indent=2, ensure_ascii=False))
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""Bounded pool of pre-launched headless Chrome sessions parked on the eCourts CNR form.
+
+Browsers are started in the background and navigated to the form before anyone
+asks for them, so fetching a CAPTCHA only has to screenshot an image that is
+already loaded. A session is leased to one user under a random token that is
+returned with the CAPTCHA; /submit claims it back by that token, so concurrent
+users never share a browser. When a session is handed back (or its lease
+expires unused) it is recycled on a worker thread: cookies cleared and the form
+reloaded, or the browser restarted after max_uses leases or a failed health
+check.
+"""
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from .ecourts_flow import Deadline, load_form
+
+ECOURTS_URL = "https://services.ecourts.gov.in/ecourtindia_v6/"
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+class PoolExhausted(Exception):
+    """No browser session became free within the lease timeout."""
+
+
+def chromedriver_path():
+    """CHROMEDRIVER_BIN when it exists, otherwise one webdriver-manager install per process."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            configured = os.getenv("CHROMEDRIVER_BIN")
+            _driver_path = configured if configured and os.path.exists(configured) else ChromeDriverManager().install()
+        return _driver_path
+
+
+def launch_driver():
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # Run in headless mode
+    chrome_options.add_argument("--disable-gpu")  # Disable GPU acceleration
+    chrome_options.add_argument("--no-sandbox")  # Required for running in some environments
+    chrome_options.add_argument("--window-size=1920,1080")  # Set window size for headless mode
+    chrome_binary = os.getenv("CHROME_BIN")
+    if chrome_binary and os.path.exists(chrome_binary):
+        chrome_options.binary_location = chrome_binary
+
+    service = Service(chromedriver_path())
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+
+class BrowserSession:
+    def __init__(self, session_id, driver):
+        self.id = session_id
+        self.driver = driver
+        self.started_at = time.monotonic()
+        self.uses = 0
+        self.token = None
+        self.leased_at = None
+        self.checked_at = time.monotonic()
+
+
+class DriverPool:
+    """Fixed number of browser sessions, each idle, leased, claimed or being prepared."""
+
+    def __init__(self, url=ECOURTS_URL, size=2, lease_seconds=300.0, max_uses=20, check_seconds=60.0,
+                 page_load_seconds=30.0, launch=launch_driver):
+        self.url = url
+        self.page_load_seconds = page_load_seconds
+        self.size = size
+        self.lease_seconds = lease_seconds
+        self.max_uses = max_uses
+        self.check_seconds = check_seconds
+        self.launch = launch
+        self._idle = deque()
+        self._leased = {}
+        self._claimed = 0
+        self._preparing = 0
+        self._next_id = 0
+        self._cond = threading.Condition()
+        self._closed = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max(size, 1), thread_name_prefix="browser")
+        self._maintainer = None
+        self._stats = {
+            "launched": 0,
+            "launch_failures": 0,
+            "restarts": 0,
+            "recycles": 0,
+            "leases": 0,
+            "expired_leases": 0,
+            "lease_timeouts": 0,
+            "health_failures": 0,
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # Lifecycle
+
+    def start(self):
+        """Begin launching size sessions and the maintenance thread; returns immediately."""
+        with self._cond:
+            missing = self.size - self._accounted()
+            self._preparing += missing
+        for _ in range(missing):
+            self._executor.submit(self._prepare, None, True)
+        self._maintainer = threading.Thread(target=self._maintain, name="browser-pool", daemon=True)
+        self._maintainer.start()
+
+    def close(self):
+        self._closed.set()
+        with self._cond:
+            sessions = list(self._idle) + list(self._leased.values())
+            self._idle.clear()
+            self._leased.clear()
+            self._cond.notify_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for session in sessions:
+            self._quit(session)
+
+    def _accounted(self):
+        return len(self._idle) + len(self._leased) + self._claimed + self._preparing
+
+    # Preparing sessions (worker threads)
+
+    def _navigate(self, driver):
+        load_form(driver, self.url, Deadline(self.page_load_seconds))
+
+    def _quit(self, session):
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+
+    def _launch(self):
+        driver = self.launch()
+        try:
+            self._navigate(driver)
+        except Exception:
+            driver.quit()
+            raise
+        with self._cond:
+            self._next_id += 1
+            self._stats["launched"] += 1
+            return BrowserSession(self._next_id, driver)
+
+    def _prepare(self, session, restart):
+        """Recycle or (re)start a session, then park it in the idle queue."""
+        try:
+            if session is not None and not restart:
+                session.driver.delete_all_cookies()
+                self._navigate(session.driver)
+                with self._cond:
+                    self._stats["recycles"] += 1
+            else:
+                if session is not None:
+                    self._quit(session)
+                    with self._cond:
+                        self._stats["restarts"] += 1
+                session = self._launch()
+        except Exception as e:
+            logging.warning(f"Browser session could not be prepared: {e}")
+            if session is not None:
+                self._quit(session)
+            with self._cond:
+                self._preparing -= 1
+                self._stats["launch_failures"] += 1
+            return
+        session.token = session.leased_at = None
+        session.checked_at = time.monotonic()
+        with self._cond:
+            self._preparing -= 1
+            if self._closed.is_set():
+                self._quit(session)
+                return
+            self._idle.append(session)
+            self._cond.notify()
+
+    def _recycle(self, session, restart=False):
+        """Hand a session that is out of the pool to a worker; caller holds the lock."""
+        if self._closed.is_set():
+            self._quit(session)
+            return
+        self._preparing += 1
+        restart = restart or session.uses >= self.max_uses
+        self._executor.submit(self._prepare, session, restart)
+
+    # Leasing (request threads)
+
+    def _healthy(self, session):
+        try:
+            return session.driver.execute_script("return document.readyState") == "complete"
+        except WebDriverException:
+            return False
+
+    def lease(self, timeout=30.0):
+        """Take an idle session for one user, waiting up to timeout; raises PoolExhausted."""
+        start = time.monotonic()
+        deadline = start + timeout
+        while True:
+            with self._cond:
+                while not self._idle:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._closed.is_set():
+                        self._stats["lease_timeouts"] += 1
+                        raise PoolExhausted(f"No browser session free within {timeout:g}s")
+                    self._cond.wait(remaining)
+                session = self._idle.popleft()
+                self._claimed += 1
+            if self._healthy(session):
+                break
+            with self._cond:
+                self._claimed -= 1
+                self._stats["health_failures"] += 1
+                self._recycle(session, restart=True)
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._claimed -= 1
+            session.token = secrets.token_urlsafe(16)
+            session.leased_at = time.monotonic()
+            session.uses += 1
+            self._leased[session.token] = session
+            self._stats["leases"] += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return session
+
+    def claim(self, token):
+        """Take back the session leased under token for exclusive use, or None if unknown/expired."""
+        with self._cond:
+            session = self._leased.pop(token, None) if token else None
+            if session is not None:
+                self._claimed += 1
+            return session
+
+    def release(self, session, restart=False):
+        """Return a claimed session; it is recycled (or restarted) before the next lease."""
+        with self._cond:
+            self._claimed -= 1
+            self._recycle(session, restart)
+
+    def end_lease(self, token, restart=False):
+        """Give up a lease without claiming it first (e.g. the CAPTCHA could not be read)."""
+        session = self.claim(token)
+        if session is not None:
+            self.release(session, restart)
+
+    # Maintenance
+
+    def _maintain(self):
+        while not self._closed.wait(1.0):
+            now = time.monotonic()
+            with self._cond:
+                for token, session in list(self._leased.items()):
+                    if now - session.leased_at > self.lease_seconds:
+                        del self._leased[token]
+                        self._stats["expired_leases"] += 1
+                        self._recycle(session)
+                due = [s for s in self._idle if now - s.checked_at > self.check_seconds]
+                for session in due:
+                    self._idle.remove(session)
+                self._claimed += len(due)
+                missing = self.size - self._accounted()
+                self._preparing += max(missing, 0)
+            for _ in range(max(missing, 0)):
+                self._executor.submit(self._prepare, None, True)
+            for session in due:
+                healthy = self._healthy(session)
+                with self._cond:
+                    self._claimed -= 1
+                    if healthy:
+                        session.checked_at = time.monotonic()
+                        self._idle.append(session)
+                        self._cond.notify()
+                    else:
+                        self._stats["health_failures"] += 1
+                        self._recycle(session, restart=True)
+
+    def metrics(self):
+        with self._cond:
+            leases = self._stats["leases"]
+            return dict(
+                self._stats,
+                size=self.size,
+                idle=len(self._idle),
+                leased=len(self._leased),
+                in_use=self._claimed,
+                preparing=self._preparing,
+                mean_lease_wait_seconds=self._wait_total / leases if leases else 0.0,
+                max_lease_wait_seconds=self._wait_max,
+            )
@@ -0,0 +1,127 @@
+"""Blocking Selenium steps of the CNR lookup, with explicit readiness conditions.
+
+Nothing here sleeps for a fixed time: every step waits for the condition it
+actually needs (the CAPTCHA image decoded, the search request finished, the
+history_cnr block present) and gives up when the request's overall Deadline
+runs out. These functions block, so the API runs them on a worker thread.
+"""
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+POLL_SECONDS = 0.05
+
+# Counts in-flight fetch/XHR requests so we can tell when the search has finished
+_TRACK_NETWORK = """
+if (!window.__caseStatusNet) {
+  var net = window.__caseStatusNet = {pending: 0, done: 0, idleSince: Date.now()};
+  var settle = function () {
+    net.pending--; net.done++;
+    if (!net.pending) { net.idleSince = Date.now(); }
+  };
+  if (window.fetch) {
+    var originalFetch = window.fetch;
+    window.fetch = function () {
+      net.pending++;
+      return originalFetch.apply(this, arguments).finally(settle);
+    };
+  }
+  var originalSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    net.pending++;
+    this.addEventListener("loadend", settle);
+    return originalSend.apply(this, arguments);
+  };
+}
+return window.__caseStatusNet.done;
+"""
+
+_CAPTCHA_LOADED = """
+var image = document.getElementById("captcha_image");
+return !!(image && image.complete && image.naturalWidth > 0);
+"""
+
+_NETWORK_STATE = """
+var net = window.__caseStatusNet;
+return net ? [net.pending, net.done, Date.now() - net.idleSince] : [0, 0, 0];
+"""
+
+
+class Deadline:
+    """Overall time budget shared by the waits of one request."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(self.expires - time.monotonic(), 0.0)
+
+    def wait(self, driver):
+        return WebDriverWait(driver, self.remaining(), poll_frequency=POLL_SECONDS)
+
+
+class NoCaseHistory(Exception):
+    """The search finished without a history_cnr block (usually a wrong CAPTCHA)."""
+
+
+def captcha_loaded(driver):
+    return driver.execute_script(_CAPTCHA_LOADED)
+
+
+def load_form(driver, url, deadline):
+    """Open the CNR form and wait until its CAPTCHA image has been decoded."""
+    driver.set_page_load_timeout(max(deadline.remaining(), 1.0))
+    driver.get(url)
+    deadline.wait(driver).until(captcha_loaded)
+
+
+def read_captcha(driver, deadline):
+    """PNG bytes of the CAPTCHA currently shown on the form."""
+    deadline.wait(driver).until(captcha_loaded)
+    return driver.find_element(By.ID, "captcha_image").screenshot_as_png
+
+
+class _SearchSettled:
+    """Wait condition: history_cnr is present, or the page went network-idle without it."""
+
+    def __init__(self, done_before, idle_seconds):
+        self.done_before = done_before
+        self.idle_ms = idle_seconds * 1000
+
+    def __call__(self, driver):
+        elements = driver.find_elements(By.ID, "history_cnr")
+        pending, done, idle_ms = driver.execute_script(_NETWORK_STATE)
+        if elements and not pending:
+            return elements[0]
+        if done > self.done_before and not pending and idle_ms >= self.idle_ms:
+            raise NoCaseHistory("The search returned no case history. The CAPTCHA may be wrong.")
+        return False
+
+
+def search_case(driver, cino, captcha, deadline, idle_seconds=0.5):
+    """Fill in and submit the CNR form; returns the markup of the history_cnr block.
+
+    Raises NoCaseHistory if the search completes without one, TimeoutException
+    if the deadline runs out first.
+    """
+    done_before = driver.execute_script(_TRACK_NETWORK)
+
+    # Automate form submission
+    cnr_input = deadline.wait(driver).until(EC.element_to_be_clickable((By.NAME, "cino")))
+    cnr_input.clear()
+    cnr_input.send_keys(cino)
+
+    captcha_input = deadline.wait(driver).until(EC.element_to_be_clickable((By.ID, "fcaptcha_code")))
+    captcha_input.clear()
+    captcha_input.send_keys(captcha)
+
+    search_button = deadline.wait(driver).until(EC.element_to_be_clickable((By.ID, "searchbtn")))
+    search_button.click()
+
+    # Wait for the result (or for the search to finish without one) instead of a fixed sleep
+    result_element = deadline.wait(driver).until(_SearchSettled(done_before, idle_seconds))
+    return result_element.get_attribute("outerHTML")
+
@@ -0,0 +1,190 @@
+"""Local stand-in for the eCourts CNR search page, for exercising the browser pool.
+
+Serves a page with the same element ids the scraper relies on (captcha_image,
+cino, fcaptcha_code, searchbtn) and, after a search, injects a history_cnr block
+the way the real page does. Any CAPTCHA is accepted except "wrong".
+
+Usage:
+    python -m app.ecourts_stub --port 8100
+    ECOURTS_URL=http://127.0.0.1:8100/ecourtindia_v6/ uvicorn app.main:app
+"""
+import argparse
+import json
+import secrets
+import struct
+import time
+import zlib
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BASE_PATH = "/ecourtindia_v6/"
+CAPTCHA_PATH = BASE_PATH + "vendor/securimage/securimage_show.php"
+SEARCH_QUERY = "p=cnr_status/searchByCNR/"
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head><title>eCourts Services (stub)</title></head>
+<body>
+<form id="cnr_form" onsubmit="return false;">
+  <input type="hidden" name="app_token" value="{app_token}">
+  <input type="text" name="cino" id="cino_input" maxlength="16">
+  <img id="captcha_image" src="{captcha_path}?{nonce}" alt="captcha">
+  <input type="text" name="fcaptcha_code" id="fcaptcha_code">
+  <button type="button" id="searchbtn">Search</button>
+</form>
+<div id="cnr_error"></div>
+<div id="cnr_result"></div>
+<script>
+document.getElementById("searchbtn").addEventListener("click", function () {{
+  var data = new FormData(document.getElementById("cnr_form"));
+  data.append("ajax_req", "true");
+  fetch("?{search_query}", {{method: "POST", body: data}})
+    .then(function (response) {{ return response.json(); }})
+    .then(function (result) {{
+      if (result.errormsg) {{
+        document.getElementById("cnr_error").textContent = result.errormsg;
+      }} else {{
+        document.getElementById("cnr_result").innerHTML = result.casetype_list;
+      }}
+    }});
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def captcha_png(width=120, height=40):
+    """A plain grey PNG, enough for screenshot_as_png."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    rows = b"".join(b"\x00" + b"\xc8" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def result_html(cino):
+    """history_cnr block for a CNR, shaped like the eCourts case history view."""
+    cino = escape(cino)
+    return f"""<div id="history_cnr">
+<h2 class="h2class">District and Sessions Court, Pune</h2>
+<table class="case_details_table">
+<tr><td>Case Type</td><td>Civil Suit</td></tr>
+<tr><td>Filing Number</td><td>1234/2021</td><td>Filing Date</td><td>05-01-2021</td></tr>
+<tr><td>Registration Number</td><td>567/2021</td><td>Registration Date</td><td>12-01-2021</td></tr>
+<tr><td>CNR Number</td><td>{cino}</td></tr>
+</table>
+<table class="case_status_table">
+<tr><td>First Hearing Date</td><td>01st February 2021</td></tr>
+<tr><td>Next Hearing Date</td><td>15th March 2025</td></tr>
+<tr><td>Case Stage</td><td>Evidence</td></tr>
+<tr><td>Court Number and Judge</td><td>4-Civil Judge Senior Division</td></tr>
+</table>
+<span class="Petitioner_Advocate_table">1) Ramesh Patil<br>Advocate- S. K. Joshi</span>
+<span class="Respondent_Advocate_table">1) Suresh Patil<br>2) Mahesh Patil</span>
+<table class="history_table">
+<thead><tr><th>Judge</th><th>Business on Date</th><th>Hearing Date</th><th>Purpose of hearing</th></tr></thead>
+<tbody>
+<tr><td>Civil Judge Senior Division</td><td>01-02-2021</td><td>15-04-2021</td><td>Appearance</td></tr>
+<tr><td>Civil Judge Senior Division</td><td>15-04-2021</td><td>20-08-2021</td><td>Written Statement</td></tr>
+<tr><td>Civil Judge Senior Division</td><td>20-08-2021</td><td>15-03-2025</td><td>Evidence</td></tr>
+</tbody>
+</table>
+</div>"""
+
+
+def make_stub_server(port, page_delay=0.0, search_delay=0.0, captcha_delay=0.0):
+    """ThreadingHTTPServer for the stub page on 127.0.0.1:port (not yet serving)."""
+    captcha = captcha_png()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body are separate writes
+
+        def _send(self, status, content_type, payload, headers=()):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == CAPTCHA_PATH:
+                time.sleep(captcha_delay)
+                self._send(200, "image/png", captcha)
+            elif url.path == BASE_PATH:
+                time.sleep(page_delay)
+                page = PAGE.format(
+                    app_token=secrets.token_hex(16),
+                    captcha_path=CAPTCHA_PATH,
+                    nonce=secrets.token_hex(4),
+                    search_query=SEARCH_QUERY,
+                ).encode("utf-8")
+                cookie = ("Set-Cookie", f"SERVICES_SESSID={secrets.token_hex(16)}; Path=/")
+                self._send(200, "text/html; charset=utf-8", page, [cookie])
+            else:
+                self._send(404, "text/plain", b"not found")
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if url.path != BASE_PATH or url.query != SEARCH_QUERY:
+                self._send(404, "text/plain", b"not found")
+                return
+            form = _parse_form(self.headers.get("Content-Type", ""), body)
+            time.sleep(search_delay)
+            if form.get("fcaptcha_code", "") == "wrong":
+                result = {"errormsg": "Invalid Captcha"}
+            else:
+                result = {"casetype_list": result_html(form.get("cino", ""))}
+            self._send(200, "application/json", json.dumps(result).encode("utf-8"))
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+def serve_stub(port, page_delay=0.0, search_delay=0.0, captcha_delay=0.0):
+    """Run the stub page on 127.0.0.1:port until interrupted."""
+    server = make_stub_server(port, page_delay, search_delay, captcha_delay)
+    print(f"eCourts stub listening on http://127.0.0.1:{port}{BASE_PATH}")
+    server.serve_forever()
+
+
+def _parse_form(content_type, body):
+    """Fields of a urlencoded or multipart (FormData) body."""
+    if content_type.startswith("multipart/form-data"):
+        boundary = content_type.split("boundary=", 1)[1].strip('"').encode("latin-1")
+        fields = {}
+        for part in body.split(b"--" + boundary):
+            head, _, value = part.partition(b"\r\n\r\n")
+            marker = b'name="'
+            if marker in head:
+                name = head.split(marker, 1)[1].split(b'"', 1)[0].decode("utf-8")
+                fields[name] = value.rstrip(b"\r\n").decode("utf-8")
+        return fields
+    return {name: values[0] for name, values in parse_qs(body.decode("utf-8")).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the eCourts CNR page.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--page-delay", type=float, default=0.0, help="seconds before the form page is served")
+    parser.add_argument("--search-delay", type=float, default=0.0, help="seconds before a search answers")
+    parser.add_argument("--captcha-delay", type=float, default=0.0, help="seconds before the CAPTCHA image is sent")
+    args = parser.parse_args()
+    serve_stub(args.port, args.page_delay, args.search_delay, args.captcha_delay)
+
+
+if __name__ == "__main__":
+    main()
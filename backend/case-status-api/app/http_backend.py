@@ -0,0 +1,232 @@
+"""Case-status lookups over plain HTTP, without a browser.
+
+The eCourts CNR search is two requests: load the form (which sets the session
+cookie, an app_token and the CAPTCHA image URL) and POST cino + fcaptcha_code
+back. EcourtsHttpClient does exactly that with one pooled aiohttp connector
+shared by everyone and a separate cookie jar per user session, and pulls the
+history_cnr block out of the response itself. If the form no longer looks the
+way we expect, fetch_captcha raises FormChanged so the API can fall back to
+the Selenium pool.
+"""
+import json
+import secrets
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import aiohttp
+
+from .driver_pool import ECOURTS_URL
+from .ecourts_flow import NoCaseHistory
+
+SEARCH_QUERY = "p=cnr_status/searchByCNR/"
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+_BLOCK_TAGS = {"br", "div", "h1", "h2", "h3", "h4", "li", "p", "table", "thead", "tbody", "tr", "span"}
+_CELL_TAGS = {"td", "th"}
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+
+
+class FormChanged(Exception):
+    """The eCourts page no longer has the form fields this client relies on."""
+
+
+class SessionUnknown(Exception):
+    """The session token was never issued, already used, or has expired."""
+
+
+class _FormParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.app_token = None
+        self.captcha_src = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "input" and attrs.get("name") == "app_token":
+            self.app_token = attrs.get("value", "")
+        elif tag == "img" and attrs.get("id") == "captcha_image":
+            self.captcha_src = attrs.get("src")
+
+
+class _HistoryText(HTMLParser):
+    """Visible text of the element with id history_cnr, one line per row/block."""
+
+    def __init__(self):
+        super().__init__()
+        self.depth = 0
+        self.found = False
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.depth:
+            if tag not in _VOID_TAGS:
+                self.depth += 1
+            if tag in _BLOCK_TAGS:
+                self.parts.append("\n")
+            elif tag in _CELL_TAGS:
+                self.parts.append(" ")
+        elif dict(attrs).get("id") == "history_cnr":
+            self.found = True
+            self.depth = 0 if tag in _VOID_TAGS else 1
+
+    def handle_endtag(self, tag):
+        if self.depth and tag not in _VOID_TAGS:
+            self.depth -= 1
+            if tag in _BLOCK_TAGS:
+                self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self.depth:
+            self.parts.append(data)
+
+
+def history_html(body):
+    """The markup holding history_cnr from a search response (JSON or HTML), or None.
+
+    Raises NoCaseHistory with the site's message when the response reports an error.
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body if "history_cnr" in body else None
+    if isinstance(payload, dict):
+        for value in payload.values():
+            if isinstance(value, str) and "history_cnr" in value:
+                return value
+        message = payload.get("errormsg") or payload.get("error")
+        if message:
+            raise NoCaseHistory(str(message))
+    return None
+
+
+def history_text(html):
+    """Text of the history_cnr block, laid out like Selenium's element.text."""
+    parser = _HistoryText()
+    parser.feed(html)
+    parser.close()
+    if not parser.found:
+        return None
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class _UserSession:
+    def __init__(self, jar, app_token):
+        self.jar = jar
+        self.app_token = app_token
+        self.created = time.monotonic()
+
+
+class EcourtsHttpClient:
+    """CAPTCHA + search over one shared connection pool, one cookie jar per user session."""
+
+    def __init__(self, url=ECOURTS_URL, max_connections=32, session_seconds=300.0, connect_timeout=10.0,
+                 read_timeout=30.0):
+        self.url = url
+        self.max_connections = max_connections
+        self.session_seconds = session_seconds
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self._connector = None
+        self._sessions = {}
+        self._stats = {"captchas": 0, "searches": 0, "no_history": 0, "expired_sessions": 0, "errors": 0}
+        self._seconds = {"captcha": 0.0, "search": 0.0}
+
+    async def start(self):
+        if self._connector is None:
+            self._connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300,
+                                                   keepalive_timeout=30)
+
+    async def aclose(self):
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+
+    def _client(self, jar):
+        # Sessions borrow the shared connector, so keep-alive connections outlive them
+        return aiohttp.ClientSession(
+            connector=self._connector,
+            connector_owner=False,
+            cookie_jar=jar,
+            timeout=self.timeout,
+            headers={"User-Agent": USER_AGENT},
+        )
+
+    def _purge(self):
+        cutoff = time.monotonic() - self.session_seconds
+        for token in [t for t, s in self._sessions.items() if s.created < cutoff]:
+            del self._sessions[token]
+            self._stats["expired_sessions"] += 1
+
+    def owns(self, token):
+        return bool(token) and token in self._sessions
+
+    def discard(self, token):
+        """Drop a session that will not be searched with (e.g. the result was cached)."""
+        self._sessions.pop(token, None)
+
+    async def fetch_captcha(self):
+        """Open a new user session; returns (token, CAPTCHA image bytes)."""
+        start = time.perf_counter()
+        self._purge()
+        jar = aiohttp.CookieJar(unsafe=True)  # unsafe also keeps cookies for IP hosts
+        try:
+            async with self._client(jar) as http:
+                async with http.get(self.url) as response:
+                    response.raise_for_status()
+                    page = await response.text()
+                form = _FormParser()
+                form.feed(page)
+                if not form.captcha_src or form.app_token is None:
+                    raise FormChanged("CNR form has no captcha_image or app_token")
+                async with http.get(urljoin(self.url, form.captcha_src)) as response:
+                    response.raise_for_status()
+                    image = await response.read()
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        token = secrets.token_urlsafe(16)
+        self._sessions[token] = _UserSession(jar, form.app_token)
+        self._stats["captchas"] += 1
+        self._seconds["captcha"] += time.perf_counter() - start
+        return token, image
+
+    async def search(self, token, cino, captcha):
+        """Submit the CNR form for a session; returns the history_cnr markup.
+
+        Each session is good for one search, as with the browser flow.
+        """
+        user = self._sessions.pop(token, None) if token else None
+        if user is None or time.monotonic() - user.created > self.session_seconds:
+            raise SessionUnknown("Session expired or unknown. Fetch a new CAPTCHA.")
+        start = time.perf_counter()
+        data = {"cino": cino, "fcaptcha_code": captcha, "ajax_req": "true", "app_token": user.app_token}
+        try:
+            async with self._client(user.jar) as http:
+                async with http.post(
+                    urljoin(self.url, "?" + SEARCH_QUERY), data=data, headers={"X-Requested-With": "XMLHttpRequest"}
+                ) as response:
+                    response.raise_for_status()
+                    body = await response.text()
+            html = history_html(body)
+        except NoCaseHistory:
+            self._stats["no_history"] += 1
+            raise
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        if html is None:
+            self._stats["no_history"] += 1
+            raise NoCaseHistory("The search returned no case history. The CAPTCHA may be wrong.")
+        self._stats["searches"] += 1
+        self._seconds["search"] += time.perf_counter() - start
+        return html
+
+    def metrics(self):
+        captchas, searches = self._stats["captchas"], self._stats["searches"]
+        return dict(
+            self._stats,
+            sessions=len(self._sessions),
+            mean_captcha_seconds=self._seconds["captcha"] / captchas if captchas else 0.0,
+            mean_search_seconds=self._seconds["search"] / searches if searches else 0.0,
+        )
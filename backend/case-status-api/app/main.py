@@ -1,16 +1,19 @@
 from fastapi import FastAPI, Request, Form, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager  # Import webdriver-manager
-import time
+from selenium.common.exceptions import TimeoutException
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+import asyncio
 import base64
+import logging
+import os
+
+from .case_parser import parse_case_history
+from .driver_pool import ECOURTS_URL, DriverPool, PoolExhausted
+from .ecourts_flow import Deadline, NoCaseHistory, read_captcha, search_case
+from .http_backend import EcourtsHttpClient, FormChanged, SessionUnknown, history_text
+from .result_cache import CaseCache
 
 app = FastAPI()
 
@@ -23,93 +26,186 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global driver instance
-driver = None
+# Pre-launched browser sessions, each leased to one user between CAPTCHA and submit
+driver_pool = DriverPool(
+    url=os.getenv("ECOURTS_URL", ECOURTS_URL),
+    size=int(os.getenv("DRIVER_POOL_SIZE", "2")),
+    lease_seconds=float(os.getenv("DRIVER_LEASE_SECONDS", "300")),
+    max_uses=int(os.getenv("DRIVER_MAX_USES", "20")),
+    check_seconds=float(os.getenv("DRIVER_CHECK_SECONDS", "60")),
+    page_load_seconds=float(os.getenv("PAGE_LOAD_SECONDS", "30")),
+)
+LEASE_WAIT_SECONDS = float(os.getenv("DRIVER_LEASE_WAIT_SECONDS", "30"))
+
+# Overall time limits per request, covering the lease wait and every browser step
+CAPTCHA_DEADLINE_SECONDS = float(os.getenv("CAPTCHA_DEADLINE_SECONDS", "45"))
+SUBMIT_DEADLINE_SECONDS = float(os.getenv("SUBMIT_DEADLINE_SECONDS", "40"))
+# How long the page must stay free of requests before a search without a result is final
+NETWORK_IDLE_SECONDS = float(os.getenv("NETWORK_IDLE_SECONDS", "0.5"))
+
+# Selenium calls block, so they run here instead of on the event loop. Only work on a
+# leased or claimed session goes here, so there is never more of it than the pool size.
+browser_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BROWSER_WORKERS", str(max(2 * driver_pool.size, 1)))), thread_name_prefix="case-status"
+)
+# Waits for a free session get their own threads: parked in lease(), they must not hold
+# the browser_executor threads a /submit needs to finish and hand its session back
+lease_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LEASE_WAITERS", "32")), thread_name_prefix="case-status-lease"
+)
 
-# Initialize the WebDriver
-def initialize_driver():
-    global driver
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run in headless mode
-    chrome_options.add_argument("--disable-gpu")  # Disable GPU acceleration
-    chrome_options.add_argument("--no-sandbox")  # Required for running in some environments
-    chrome_options.add_argument("--window-size=1920,1080")  # Set window size for headless mode
+async def run_blocking(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(browser_executor, fn, *args)
+
+async def lease_browser(deadline):
+    # The wait is sized when a thread picks it up, so time spent queued counts against the deadline
+    def wait():
+        return driver_pool.lease(min(LEASE_WAIT_SECONDS, deadline.remaining()))
+    return await asyncio.get_running_loop().run_in_executor(lease_executor, wait)
+
+# "browser" drives headless Chrome for every lookup; "http" talks to eCourts directly and
+# only falls back to the browsers if the form cannot be read over plain HTTP
+# (DRIVER_POOL_SIZE=0 runs without fallback browsers)
+CASE_STATUS_BACKEND = os.getenv("CASE_STATUS_BACKEND", "browser")
+http_client = None
+if CASE_STATUS_BACKEND == "http":
+    http_client = EcourtsHttpClient(
+        url=driver_pool.url,
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "32")),
+        session_seconds=driver_pool.lease_seconds,
+        read_timeout=SUBMIT_DEADLINE_SECONDS,
+    )
+browser_fallbacks = 0
+
+# Parsed results per CNR; a fresh hit answers without touching eCourts
+case_cache = CaseCache(
+    max_entries=int(os.getenv("CASE_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("CASE_CACHE_TTL_SECONDS", "21600")),
+)
 
-    # Use webdriver-manager to automatically download and manage ChromeDriver
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+def case_result(cino, html):
+    """Response body for a fresh lookup, which is also what gets cached."""
+    result = {"success": True, "result": history_text(html), "case": parse_case_history(html)}
+    case_cache.put(cino, result)
+    return dict(result, cached=False, age_seconds=0.0)
+
+def cached_result(cino, max_age=None):
+    hit = case_cache.get(cino, max_age)
+    if hit is None:
+        return None
+    result, age = hit
+    return dict(result, cached=True, age_seconds=round(age, 1))
+
+@app.on_event("startup")
+async def startup_event():
+    """Start launching browser sessions in the background."""
+    driver_pool.start()
+    if http_client:
+        await http_client.start()
 
 @app.post("/")
 async def fetch_captcha():
     """Fetch the CAPTCHA image from the target website."""
+    global browser_fallbacks
+    if http_client:
+        try:
+            token, captcha_image_data = await asyncio.wait_for(http_client.fetch_captcha(), CAPTCHA_DEADLINE_SECONDS)
+            captcha_base64 = base64.b64encode(captcha_image_data).decode("utf-8")
+            return JSONResponse(content={"captcha_base64": captcha_base64, "session": token})
+        except (FormChanged, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            browser_fallbacks += 1
+            logging.warning(f"HTTP CAPTCHA fetch failed, falling back to a browser: {e!r}")
+
+    deadline = Deadline(CAPTCHA_DEADLINE_SECONDS)
     try:
-        initialize_driver()
-        # Open the target website
-        driver.get("https://services.ecourts.gov.in/ecourtindia_v6/")
-        time.sleep(5)  # Allow the page to load
-
-        # Capture the CAPTCHA image
-        captcha_element = driver.find_element(By.ID, "captcha_image")
-        captcha_image_data = captcha_element.screenshot_as_png  # Capture screenshot as PNG data
+        # Lease a browser that is already on the target website
+        session = await lease_browser(deadline)
+    except PoolExhausted as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
+
+    try:
+        # Capture the CAPTCHA image once it has loaded
+        captcha_image_data = await run_blocking(read_captcha, session.driver, deadline)
         captcha_base64 = base64.b64encode(captcha_image_data).decode("utf-8")  # Convert to base64
 
-        return JSONResponse(content={"captcha_base64": captcha_base64})
+        # The token ties the user's /submit to this browser session
+        return JSONResponse(content={"captcha_base64": captcha_base64, "session": session.token})
 
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        driver_pool.end_lease(session.token, restart=True)
+        return JSONResponse(status_code=500, content={"error": str(e) or type(e).__name__})
+
+@app.get("/case/{cino}")
+async def cached_case(cino: str, max_age: float = None):
+    """Cached result for a CNR, so a repeat lookup can skip the CAPTCHA altogether."""
+    result = cached_result(cino, max_age)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No fresh cached result for this CNR.")
+    return JSONResponse(content=result)
 
 @app.post("/submit")
-async def submit(cino: str = Form(...), captcha: str = Form(...)):
+async def submit(cino: str = Form(...), captcha: str = Form(...), session: str = Form(None),
+                 max_age: float = Form(None)):
     """Automate form filling and retrieve results."""
-    global driver
+    if not cino or not captcha:
+        raise HTTPException(status_code=400, detail="CNR number or CAPTCHA is missing.")
+
+    result = cached_result(cino, max_age)
+    if result is not None:
+        # The CAPTCHA goes unused: hand the session back without searching
+        if http_client and http_client.owns(session):
+            http_client.discard(session)
+        elif session:
+            driver_pool.end_lease(session)
+        return JSONResponse(content=result)
+
+    if http_client and http_client.owns(session):
+        try:
+            html = await asyncio.wait_for(http_client.search(session, cino, captcha), SUBMIT_DEADLINE_SECONDS)
+        except (NoCaseHistory, SessionUnknown) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise HTTPException(status_code=502, detail=f"eCourts request failed: {e!r}")
+        return JSONResponse(content=case_result(cino, html))
+
+    # Take back the browser that showed this user's CAPTCHA
+    browser = driver_pool.claim(session)
+    if browser is None:
+        raise HTTPException(status_code=400, detail="Session expired or unknown. Fetch a new CAPTCHA.")
+    failed = False
     try:
-        if not cino or not captcha:
-            raise HTTPException(status_code=400, detail="CNR number or CAPTCHA is missing.")
-
-        # Debug: Print the page source to check if elements are present
-        print(driver.page_source)
-
-        # Automate form submission
-        cnr_input = WebDriverWait(driver, 20).until(
-            EC.element_to_be_clickable((By.NAME, "cino"))
-        )
-        cnr_input.clear()
-        cnr_input.send_keys(cino)
-
-        # Wait for the CAPTCHA input field to be present and interactable
-        captcha_input = WebDriverWait(driver, 40).until(
-            EC.element_to_be_clickable((By.ID, "fcaptcha_code"))
-        )
-        captcha_input.clear()
-        captcha_input.send_keys(captcha)
-
-        # Click the search button
-        search_button = WebDriverWait(driver, 20).until(
-            EC.element_to_be_clickable((By.ID, "searchbtn"))
-        )
-        search_button.click()
-
-        time.sleep(10)  # Increase sleep time to ensure dynamic content loads
-
-        # Scrape the result
-        result_element = WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.ID, "history_cnr"))
-        )
-        result_text = result_element.text
-
-        return JSONResponse(content={"success": True, "result": result_text})
+        deadline = Deadline(SUBMIT_DEADLINE_SECONDS)
+        html = await run_blocking(search_case, browser.driver, cino, captcha, deadline, NETWORK_IDLE_SECONDS)
+        return JSONResponse(content=case_result(cino, html))
 
+    except NoCaseHistory as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except TimeoutException:
+        failed = True
         raise HTTPException(status_code=500, detail="Timeout: Element not found.")
     except Exception as e:
+        failed = True
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # One CAPTCHA per lookup: the session goes back to be reloaded (or restarted after an error)
+        driver_pool.release(browser, restart=failed)
 
 @app.on_event("shutdown")
-def shutdown_event():
-    """Close the WebDriver when the application shuts down."""
-    global driver
-    if driver:
-        driver.quit()
+async def shutdown_event():
+    """Close the browser sessions when the application shuts down."""
+    driver_pool.close()
+    browser_executor.shutdown(wait=False)
+    lease_executor.shutdown(wait=False)
+    if http_client:
+        await http_client.aclose()
+
 @app.get("/health")
 async def health_check():
-    return {"status": "ok"}
+    return {"status": "ok", "backend": CASE_STATUS_BACKEND, "pool": driver_pool.metrics()}
+
+@app.get("/metrics")
+async def metrics():
+    metrics = {"backend": CASE_STATUS_BACKEND, "pool": driver_pool.metrics(), "cache": case_cache.metrics()}
+    if http_client:
+        metrics["http"] = dict(http_client.metrics(), browser_fallbacks=browser_fallbacks)
+    return metrics
@@ -0,0 +1,86 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_NON_CNR = re.compile(r"[^0-9A-Z]")
+
+
+def normalize_cnr(cino):
+    """CNR as eCourts stores it: upper case, no spaces or dashes."""
+    return _NON_CNR.sub("", (cino or "").upper())
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "expires_at")
+
+    def __init__(self, value, fetched_at, expires_at):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+
+
+class CaseCache:
+    """LRU + TTL cache of case-status results keyed by normalized CNR.
+
+    Values are whatever the API returns for a lookup (text and parsed record);
+    get() also takes a max_age so a caller can ask for something fresher than
+    the TTL.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=6 * 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "expirations": 0, "stores": 0}
+
+    def get(self, cino, max_age=None):
+        """(value, age seconds) for a fresh entry, or None."""
+        key = normalize_cnr(cino)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry.expires_at <= now:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            age = now - entry.fetched_at
+            if max_age is not None and age > max_age:
+                self._stats["stale"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry.value, age
+
+    def put(self, cino, value):
+        key = normalize_cnr(cino)
+        if not key or self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries[key] = _Entry(value, now, now + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def discard(self, cino):
+        with self._lock:
+            self._entries.pop(normalize_cnr(cino), None)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"] + self._stats["stale"]
+            return dict(
+                self._stats,
+                entries=len(self._entries),
+                max_entries=self.max_entries,
+                ttl_seconds=self.ttl_seconds,
+                hit_rate=self._stats["hits"] / lookups if lookups else 0.0,
+            )
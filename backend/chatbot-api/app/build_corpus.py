@@ -0,0 +1,168 @@
+"""Offline corpus build: load, normalize, dedup and index scraped data once.
+
+Usage:
+    python -m app.build_corpus --input data/final_all_data.json --output data/corpus.bin [--dense] [--charts-dir data/charts]
+    python -m app.build_corpus --input crawled_pages.jsonl.gz --output data/corpus.bin
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from .corpus import RecordSpool, iter_scraped_data, write_corpus
+from .dedup import Deduplicator
+from .dense import DEFAULT_DENSE_MODEL, DenseIndex, Embedder
+from .passages import PassageBuilder
+from .retrieval import IndexBuilder
+
+# Must match the tokenizer the API generates with
+DEFAULT_TOKENIZER = "unsloth/llama-3.2-1b-instruct"
+
+
+def normalize_record(item):
+    """Corpus shape of one scraped record, or None if it should be skipped.
+
+    Crawler page records (url/title/paragraphs) are mapped onto text/metadata;
+    "removed" entries from a crawl delta carry no content.
+    """
+    if item.get("change") == "removed":
+        return None
+    if item.get("text") is None and item.get("paragraphs"):
+        item = {
+            "text": "\n".join(item["paragraphs"]),
+            "metadata": {key: item.get(key) or "" for key in ("title", "url", "description")},
+        }
+    metadata = {
+        key: " ".join(str(value).split()) for key, value in (item.get("metadata") or {}).items() if value is not None
+    }
+    return {"text": (item.get("text") or "").strip(), "metadata": metadata}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ingest(raw_records, dedup, index, passages=None):
+    """Yield each record that survives normalization and dedup, adding it to the index builders on the way."""
+    for position, item in enumerate(raw_records):
+        item = normalize_record(item)
+        if item is None or not dedup.add(item, position)[0]:
+            continue
+        metadata = item["metadata"]
+        index.add(metadata.get("title", ""), metadata.get("category", ""), item["text"])
+        if passages is not None:
+            passages.add(item)
+        yield item
+
+
+def prepare_corpus(raw_records, threshold=0.6, shingle_size=5, tokenizer=None, tokenizer_name=None,
+                   passage_tokens=128):
+    """Normalize, dedup and index records in memory; returns (records, dedup report, index, passages).
+
+    Used when the API builds its corpus in-process and serves the records from
+    memory anyway; build_corpus streams them to disk instead. Passages are only
+    split when a tokenizer is given.
+    """
+    dedup = Deduplicator(threshold=threshold, shingle_size=shingle_size)
+    index = IndexBuilder()
+    passages = None
+    if tokenizer is not None:
+        passages = PassageBuilder(tokenizer, tokenizer_name, max_tokens=passage_tokens)
+    records = list(ingest(raw_records, dedup, index, passages))
+    return records, dedup.report(), index.build(), passages.build() if passages is not None else None
+
+
+def build_corpus(input_path, output_path, threshold=0.6, shingle_size=5, report_path=None,
+                 dense_model=None, dense_dtype="float16", ivf_lists=0,
+                 tokenizer_name=DEFAULT_TOKENIZER, passage_tokens=128, charts_dir=None):
+    """Stream input_path into the artifact: each kept record goes to the index builders and a temp-file spool.
+
+    Memory holds the dedup signatures and index postings, not the records
+    (dense embedding, when enabled, still holds every chunk it encodes).
+    """
+    start = time.time()
+    raw_count = 0
+
+    def counted(records):
+        nonlocal raw_count
+        for item in records:
+            raw_count += 1
+            yield item
+
+    tokenizer = None
+    if tokenizer_name:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    dedup = Deduplicator(threshold=threshold, shingle_size=shingle_size)
+    index_builder = IndexBuilder()
+    passage_builder = PassageBuilder(tokenizer, tokenizer_name, max_tokens=passage_tokens) if tokenizer else None
+    with RecordSpool(os.path.dirname(os.path.abspath(output_path))) as records:
+        for item in ingest(counted(iter_scraped_data(input_path)), dedup, index_builder, passage_builder):
+            records.add(item)
+        report, index = dedup.report(), index_builder.build()
+        passages = passage_builder.build() if passage_builder is not None else None
+        dense = None
+        if dense_model:
+            dense = DenseIndex.build(records, Embedder(dense_model), dtype=dense_dtype, n_lists=ivf_lists)
+            print(f"Embedded {len(dense.chunk_docs)} chunks with {dense_model}")
+        write_corpus(
+            output_path,
+            records,
+            index,
+            dense=dense,
+            passages=passages,
+            source=input_path,
+            source_sha256=file_sha256(input_path),
+            dedup={"threshold": threshold, "shingle_size": shingle_size, "input_records": raw_count, "clusters": len(report)},
+        )
+        if charts_dir:
+            from .charts import prerender_charts
+            print(f"Pre-rendered {prerender_charts(records, charts_dir)} charts into {charts_dir}")
+        kept = len(records)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+    print(
+        f"Wrote {output_path}: {raw_count} -> {kept} records, "
+        f"{len(index.vocab)} terms, {len(passages) if passages else 0} passages in {time.time() - start:.2f} seconds"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the chatbot-api corpus artifact.")
+    parser.add_argument("--input", default="data/final_all_data.json", help="scraped data: a JSON array, or .jsonl[.gz|.zst] records")
+    parser.add_argument("--output", default="data/corpus.bin", help="artifact to write")
+    parser.add_argument("--dedup-threshold", type=float, default=0.6, help="near-duplicate Jaccard threshold")
+    parser.add_argument("--shingle-size", type=int, default=5, help="characters per MinHash shingle")
+    parser.add_argument("--report", help="write the dedup cluster report to this JSON file")
+    parser.add_argument("--tokenizer", default=DEFAULT_TOKENIZER, help="tokenizer for passage token IDs")
+    parser.add_argument("--passage-tokens", type=int, default=128, help="max tokens per passage")
+    parser.add_argument("--no-passages", action="store_true", help="skip the token-bounded passage store")
+    parser.add_argument("--dense", action="store_true", help="also embed corpus chunks for dense retrieval")
+    parser.add_argument("--dense-model", default=DEFAULT_DENSE_MODEL, help="sentence-embedding model")
+    parser.add_argument("--dense-dtype", choices=("float16", "int8"), default="float16")
+    parser.add_argument("--ivf-lists", type=int, default=0, help="IVF coarse lists (0 = brute force)")
+    parser.add_argument("--charts-dir", help="pre-render PNG/SVG charts of chartable records here")
+    args = parser.parse_args()
+    build_corpus(
+        args.input,
+        args.output,
+        args.dedup_threshold,
+        args.shingle_size,
+        args.report,
+        dense_model=args.dense_model if args.dense else None,
+        dense_dtype=args.dense_dtype,
+        ivf_lists=args.ivf_lists,
+        tokenizer_name=None if args.no_passages else args.tokenizer,
+        passage_tokens=args.passage_tokens,
+        charts_dir=args.charts_dir,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+CHART_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Regex to match keys and values for labels like "Category: <key>" and "Count: <value>"
+_PAIR_RE = re.compile(r"(?:(?:Particular|Category|Stage|Year):\s*([\w\s\.\(\)-]+))\s*(?:Total|Count):\s*([0-9]+)")
+
+
+def extract_key_value_pairs(text: str):
+    keys = []
+    values = []
+    for key, value in _PAIR_RE.findall(text):
+        keys.append(key.strip())
+        values.append(int(value.strip()))
+    return keys, values
+
+
+def chart_digest(category, keys, values):
+    """Cache key for a chart: its title plus a hash of the plotted data."""
+    payload = json.dumps([category, keys, values], ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def render_chart(category, keys, values, fmt="png"):
+    """Bar chart of keys/values as PNG or SVG bytes.
+
+    Uses a standalone Figure with its own Agg canvas instead of pyplot's global
+    state, so charts can be rendered on several threads at once.
+    """
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    bars = ax.bar(keys, values, color='skyblue')
+    ax.set_xlabel('Keys')
+    ax.set_ylabel('Values')
+    ax.set_title(f"Visualization for: {category}")
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+    fig.tight_layout()
+
+    # Add numbers on top of each bar
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2.0, height, f"{height}", ha='center', va='bottom', fontsize=10)
+
+    stream = BytesIO()
+    fig.savefig(stream, format=fmt)
+    return stream.getvalue()
+
+
+class ChartCache:
+    """Rendered charts by (digest, format): an in-memory LRU over an optional directory.
+
+    The directory holds files named <digest>.<format>, written at corpus-build time
+    by prerender_charts and by the API as it renders new charts.
+    """
+
+    def __init__(self, directory=None, max_entries=256):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "renders": 0}
+
+    def _path(self, digest, fmt):
+        return os.path.join(self.directory, f"{digest}.{fmt}")
+
+    def _remember(self, key, data):
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, digest, fmt):
+        key = (digest, fmt)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return data
+        if self.directory and os.path.exists(self._path(digest, fmt)):
+            with open(self._path(digest, fmt), "rb") as f:
+                data = f.read()
+            with self._lock:
+                self._remember(key, data)
+                self._stats["disk_hits"] += 1
+            return data
+        return None
+
+    def render(self, category, keys, values, fmt="png"):
+        """Return (digest, bytes), rendering and storing the chart on a miss."""
+        digest = chart_digest(category, keys, values)
+        data = self.get(digest, fmt)
+        if data is None:
+            data = render_chart(category, keys, values, fmt)
+            with self._lock:
+                self._remember((digest, fmt), data)
+                self._stats["renders"] += 1
+            if self.directory:
+                write_chart(self.directory, digest, fmt, data)
+        return digest, data
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries)
+
+
+def write_chart(directory, digest, fmt, data):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{digest}.{fmt}")
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def prerender_charts(records, directory, formats=tuple(CHART_FORMATS)):
+    """Render every chartable record into directory; returns how many charts were written."""
+    count = 0
+    for item in records:
+        category = item.get("metadata", {}).get("category", "")
+        if not category:
+            continue  # /visualize only matches records by category
+        keys, values = extract_key_value_pairs(item.get("text") or "")
+        if not keys:
+            continue
+        digest = chart_digest(category, keys, values)
+        for fmt in formats:
+            write_chart(directory, digest, fmt, render_chart(category, keys, values, fmt))
+        count += 1
+    return count
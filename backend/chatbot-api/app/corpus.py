@@ -0,0 +1,304 @@
+import array
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from .passages import PassageStore
+from .records import iter_records
+from .retrieval import HashedVocab, RetrievalIndex, normalize
+
+# Artifact layout (all integers little-endian):
+#   MAGIC | u32 version | sections, each 64-byte aligned | header JSON | u64 header offset | u64 header length | MAGIC
+# The header is written last so sections can be streamed to disk as they are built.
+MAGIC = b"NYAYACRP"
+ARTIFACT_VERSION = 2
+_ALIGN = 64
+_TRAILER = struct.Struct("<QQ8s")
+
+
+class ArtifactWriter:
+    """Writes named arrays/blobs to a temp file and atomically moves it into place."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp-{os.getpid()}"
+        self._file = open(self.tmp_path, "wb")
+        self._file.write(MAGIC + struct.pack("<I", ARTIFACT_VERSION))
+        self.sections = {}
+
+    def _align(self):
+        pad = -self._file.tell() % _ALIGN
+        if pad:
+            self._file.write(b"\0" * pad)
+
+    def add_array(self, name, array):
+        array = np.ascontiguousarray(array)
+        self._align()
+        self.sections[name] = {
+            "offset": self._file.tell(),
+            "dtype": array.dtype.str,
+            "length": int(array.size),
+        }
+        self._file.write(array.tobytes())
+
+    def add_bytes(self, name, data):
+        self.add_array(name, np.frombuffer(data, dtype=np.uint8))
+
+    def begin_stream(self, name):
+        """Start a uint8 section that is filled incrementally with write()."""
+        self._align()
+        self.sections[name] = {"offset": self._file.tell(), "dtype": "|u1", "length": 0}
+        return self.sections[name]
+
+    def write(self, section, data):
+        self._file.write(data)
+        section["length"] += len(data)
+
+    def close(self, **header):
+        header = dict(header, version=ARTIFACT_VERSION, sections=self.sections)
+        payload = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        header_offset = self._file.tell()
+        self._file.write(payload)
+        self._file.write(_TRAILER.pack(header_offset, len(payload), MAGIC))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class Artifact:
+    """Read-only memory map of an artifact; arrays are zero-copy views into it."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a corpus artifact")
+        header_offset, header_len, magic = _TRAILER.unpack_from(self._mmap, len(self._mmap) - _TRAILER.size)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is truncated")
+        self.header = json.loads(self._mmap[header_offset:header_offset + header_len].decode("utf-8"))
+        if self.header.get("version") != ARTIFACT_VERSION:
+            raise ValueError(
+                f"{path} has artifact version {self.header.get('version')}, expected {ARTIFACT_VERSION}; "
+                "rerun `python -m app.build_corpus`"
+            )
+
+    def __contains__(self, name):
+        return name in self.header["sections"]
+
+    def array(self, name):
+        section = self.header["sections"][name]
+        return np.frombuffer(self._mmap, dtype=np.dtype(section["dtype"]), count=section["length"], offset=section["offset"])
+
+    def bytes(self, name, start, end):
+        base = self.header["sections"][name]["offset"]
+        return self._mmap[base + start:base + end]
+
+
+class Corpus:
+    """Sequence of {"text", "metadata"} records decoded lazily from an artifact."""
+
+    def __init__(self, artifact):
+        self.artifact = artifact
+        self.text_offsets = artifact.array("text_offsets")
+        self.metadata_offsets = artifact.array("metadata_offsets")
+
+    def __len__(self):
+        return len(self.text_offsets) - 1
+
+    def text(self, i):
+        return self.artifact.bytes("text", self.text_offsets[i], self.text_offsets[i + 1]).decode("utf-8")
+
+    def metadata(self, i):
+        raw = self.artifact.bytes("metadata", self.metadata_offsets[i], self.metadata_offsets[i + 1])
+        return json.loads(raw.decode("utf-8"))
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return {"text": self.text(i), "metadata": self.metadata(i)}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class _MetadataField:
+    """Normalized view of one metadata key, as RetrievalIndex.best_match expects."""
+
+    def __init__(self, corpus, key):
+        self.corpus = corpus
+        self.key = key
+
+    def __len__(self):
+        return len(self.corpus)
+
+    def __getitem__(self, i):
+        return normalize(self.corpus.metadata(i).get(self.key, ""))
+
+
+def iter_scraped_data(path):
+    """Scraped records one at a time.
+
+    JSONL files (optionally .gz/.zst, as the scrapers write them) are parsed
+    line by line and .json arrays item by item, so memory does not grow with
+    the file.
+    """
+    return iter_records(path)
+
+
+def load_scraped_data(path):
+    return list(iter_records(path))
+
+
+class RecordSpool:
+    """Records appended to temp files as they arrive, so a build holds two offsets per record, not the records.
+
+    Iterating reads them back in order; write_corpus copies the spooled bytes
+    straight into the artifact's text and metadata sections.
+    """
+
+    FIELDS = ("text", "metadata")
+
+    def __init__(self, directory=None):
+        self._files = {field: tempfile.TemporaryFile(dir=directory) for field in self.FIELDS}
+        self._offsets = {field: array.array("q", [0]) for field in self.FIELDS}
+
+    @classmethod
+    def of(cls, records, directory=None):
+        spool = cls(directory)
+        for item in records:
+            spool.add(item)
+        return spool
+
+    def add(self, item):
+        for field, data in (
+            ("text", (item.get("text") or "").encode("utf-8")),
+            ("metadata", json.dumps(item.get("metadata", {}), ensure_ascii=False).encode("utf-8")),
+        ):
+            self._files[field].write(data)
+            self._offsets[field].append(self._offsets[field][-1] + len(data))
+
+    def __len__(self):
+        return len(self._offsets["text"]) - 1
+
+    def __iter__(self):
+        for f in self._files.values():
+            f.flush()
+            f.seek(0)
+        text_file, metadata_file = self._files["text"], self._files["metadata"]
+        text_offsets, metadata_offsets = self._offsets["text"], self._offsets["metadata"]
+        try:
+            for i in range(len(self)):
+                text = text_file.read(text_offsets[i + 1] - text_offsets[i]).decode("utf-8")
+                metadata = json.loads(metadata_file.read(metadata_offsets[i + 1] - metadata_offsets[i]))
+                yield {"text": text, "metadata": metadata}
+        finally:
+            for f in self._files.values():
+                f.seek(0, os.SEEK_END)
+
+    def write_sections(self, writer):
+        for field in self.FIELDS:
+            f = self._files[field]
+            f.flush()
+            f.seek(0)
+            section = writer.begin_stream(field)
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                writer.write(section, chunk)
+            f.seek(0, os.SEEK_END)
+            writer.add_array(f"{field}_offsets", np.frombuffer(self._offsets[field], dtype=np.int64))
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _add_index(writer, prefix, index):
+    writer.add_array(f"{prefix}_offsets", index.offsets)
+    writer.add_array(f"{prefix}_postings", index.postings)
+    writer.add_array(f"{prefix}_weights", index.weights)
+    writer.add_array(f"{prefix}_vocab_hashes", index.vocab.hashes)
+    writer.add_array(f"{prefix}_vocab_ids", index.vocab.ids)
+
+
+def _load_index(artifact, prefix, titles=None, categories=None, n_docs=None):
+    return RetrievalIndex(
+        vocab=HashedVocab(artifact.array(f"{prefix}_vocab_hashes"), artifact.array(f"{prefix}_vocab_ids")),
+        offsets=artifact.array(f"{prefix}_offsets"),
+        postings=artifact.array(f"{prefix}_postings"),
+        weights=artifact.array(f"{prefix}_weights"),
+        titles=titles,
+        categories=categories,
+        n_docs=n_docs,
+    )
+
+
+def write_corpus(path, records, index, dense=None, passages=None, **info):
+    """records is a RecordSpool (streamed builds) or any sequence of records."""
+    if not isinstance(records, RecordSpool):
+        with RecordSpool.of(records, os.path.dirname(os.path.abspath(path))) as spool:
+            return write_corpus(path, spool, index, dense=dense, passages=passages, **info)
+    writer = ArtifactWriter(path)
+    try:
+        records.write_sections(writer)
+
+        _add_index(writer, "index", index)
+        if passages is not None:
+            for name, array in passages.sections().items():
+                writer.add_array(name, array)
+            _add_index(writer, "passage_index", passages.index)
+            info["passages"] = passages.info()
+        if dense is not None:
+            for name, array in dense.sections().items():
+                writer.add_array(name, array)
+            info["dense"] = dense.info()
+        writer.close(created_at=time.time(), n_records=len(records), **info)
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def load_corpus(path):
+    """Map an artifact read-only and return (corpus, retrieval index) views over it."""
+    artifact = Artifact(path)
+    corpus = Corpus(artifact)
+    index = _load_index(
+        artifact, "index", titles=_MetadataField(corpus, "title"), categories=_MetadataField(corpus, "category")
+    )
+    return corpus, index
+
+
+def load_passages(artifact):
+    """Rebuild the PassageStore over an artifact's sections, or None if it has none."""
+    info = artifact.header.get("passages")
+    if not info:
+        return None
+    token_offsets = artifact.array("passage_token_offsets")
+    return PassageStore(
+        doc_offsets=artifact.array("passage_doc_offsets"),
+        token_offsets=token_offsets,
+        tokens=artifact.array("passage_tokens"),
+        index=_load_index(artifact, "passage_index", n_docs=len(token_offsets) - 1),
+        tokenizer_name=info["tokenizer"],
+        max_tokens=info["max_tokens"],
+    )
@@ -0,0 +1,126 @@
+import hashlib
+import zlib
+
+import numpy as np
+
+from .retrieval import normalize
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text, size=5):
+    """Character shingles of the normalized text, hashed to 32-bit ints."""
+    text = normalize(text)
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i:i + size].encode("utf-8")) for i in range(len(text) - size + 1)}
+
+
+def lsh_params(threshold, num_perm):
+    """Pick (bands, rows) whose S-curve crosses 0.5 closest to the threshold."""
+    best = None
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    def __init__(self, num_perm=128, seed=1, chunk_size=4096):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.chunk_size = chunk_size  # shingles permuted at a time, bounding memory to chunk_size x num_perm
+        self.a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_hashes):
+        hashes = np.fromiter(shingle_hashes, dtype=np.uint64, count=len(shingle_hashes))
+        signature = None
+        for start in range(0, len(hashes), self.chunk_size):
+            chunk = hashes[start:start + self.chunk_size]
+            permuted = (np.outer(chunk, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+            minimum = permuted.min(axis=0)
+            signature = minimum if signature is None else np.minimum(signature, minimum, out=signature)
+        return signature
+
+
+class Deduplicator:
+    """Single-pass exact + near-duplicate filter using MinHash and LSH banding.
+
+    Records are fed one at a time; each is either kept or attached to the
+    cluster of an earlier kept record. Cost per record is one signature plus a
+    handful of bucket lookups, so the whole pass is near-linear.
+    """
+
+    def __init__(self, threshold=0.6, shingle_size=5, num_perm=128):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._exact = {}  # content digest -> kept position
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = []
+        self.clusters = []  # one entry per kept record, listing what collapsed into it
+
+    def _exact_key(self, item):
+        title = item.get("metadata", {}).get("title", "").strip().lower()
+        content = item.get("text", "").strip().lower()
+        return hashlib.blake2b(f"{title}\x00{content}".encode("utf-8"), digest_size=16).digest()
+
+    def add(self, item, position):
+        """Return (kept, representative, reason, similarity) for one record."""
+        title = item.get("metadata", {}).get("title", "")
+        key = self._exact_key(item)
+        if key in self._exact:
+            rep = self._exact[key]
+            self.clusters[rep]["collapsed"].append(
+                {"index": position, "title": title, "reason": "exact", "similarity": 1.0}
+            )
+            return False, rep, "exact", 1.0
+
+        signature = self.hasher.signature(shingles(item.get("text", ""), self.shingle_size))
+        band_keys = [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)
+        ]
+        best_rep, best_sim = None, 0.0
+        candidates = set()
+        for band, band_key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        for rep in sorted(candidates):
+            # Fraction of agreeing MinHash slots estimates the Jaccard similarity
+            similarity = float(np.mean(self._signatures[rep] == signature))
+            if similarity >= self.threshold and similarity > best_sim:
+                best_rep, best_sim = rep, similarity
+        if best_rep is not None:
+            self._exact[key] = best_rep
+            self.clusters[best_rep]["collapsed"].append(
+                {"index": position, "title": title, "reason": "near", "similarity": round(best_sim, 3)}
+            )
+            return False, best_rep, "near", best_sim
+
+        rep = len(self._signatures)
+        self._signatures.append(signature)
+        self._exact[key] = rep
+        self.clusters.append({"kept": position, "title": title, "collapsed": []})
+        for band, band_key in enumerate(band_keys):
+            self._buckets[band].setdefault(band_key, []).append(rep)
+        return True, rep, None, 1.0
+
+    def report(self):
+        return [cluster for cluster in self.clusters if cluster["collapsed"]]
+
+
+def deduplicate(scraped_data, threshold=0.6, shingle_size=5, num_perm=128):
+    """Drop exact and near-duplicate records in one pass.
+
+    Returns the kept records and a report listing, for every kept record that
+    absorbed others, which input records collapsed into it.
+    """
+    dedup = Deduplicator(threshold=threshold, shingle_size=shingle_size, num_perm=num_perm)
+    kept = [item for position, item in enumerate(scraped_data) if dedup.add(item, position)[0]]
+    return kept, dedup.report()
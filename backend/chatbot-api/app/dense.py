@@ -0,0 +1,184 @@
+import numpy as np
+
+DEFAULT_DENSE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class Embedder:
+    """Small CPU sentence-embedding model; sentence-transformers is optional."""
+
+    def __init__(self, model_name=DEFAULT_DENSE_MODEL, batch_size=32):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "Dense retrieval needs the optional sentence-transformers package "
+                "(pip install sentence-transformers)"
+            ) from e
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts):
+        vectors = self.model.encode(
+            list(texts), batch_size=self.batch_size, convert_to_numpy=True, normalize_embeddings=True
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def chunk_text(text, max_words=200, overlap=40):
+    """Split text into overlapping word windows so long pages get several vectors."""
+    words = text.split()
+    if len(words) <= max_words:
+        return [" ".join(words)] if words else []
+    step = max_words - overlap
+    return [" ".join(words[i:i + max_words]) for i in range(0, len(words) - overlap, step)]
+
+
+def quantize(vectors, dtype="float16"):
+    """Return (stored matrix, per-row scales); int8 uses symmetric per-row scaling."""
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"unsupported dense dtype {dtype!r}")
+
+
+def kmeans(vectors, n_lists, iterations=10, seed=0):
+    """Spherical k-means for the IVF coarse quantizer."""
+    rng = np.random.RandomState(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = vectors[assign == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+class DenseIndex:
+    """Chunk embeddings plus an optional inverted-file (IVF) coarse quantizer."""
+
+    # Rows widened to float32 per block; keeps scoring memory flat for big corpora
+    block_rows = 16384
+
+    def __init__(self, vectors, scales, chunk_docs, model_name, centroids=None, ivf_offsets=None, ivf_order=None):
+        self.vectors = vectors
+        self.scales = scales
+        self.chunk_docs = chunk_docs
+        self.model_name = model_name
+        self.centroids = centroids
+        self.ivf_offsets = ivf_offsets
+        self.ivf_order = ivf_order
+
+    @classmethod
+    def build(cls, records, embedder, dtype="float16", n_lists=0, max_words=200):
+        chunks, chunk_docs = [], []
+        for doc_id, item in enumerate(records):
+            metadata = item.get("metadata", {})
+            heading = f"{metadata.get('title', '')}. {metadata.get('category', '')}."
+            for chunk in chunk_text(item.get("text", ""), max_words=max_words) or [""]:
+                chunks.append(f"{heading} {chunk}")
+                chunk_docs.append(doc_id)
+        embeddings = embedder.encode(chunks)
+        vectors, scales = quantize(embeddings, dtype)
+        index = cls(vectors, scales, np.asarray(chunk_docs, dtype=np.int32), embedder.model_name)
+        # IVF only pays off once brute force stops being trivially cheap
+        if n_lists and len(chunks) > n_lists * 8:
+            centroids, assign = kmeans(embeddings, n_lists)
+            order = np.argsort(assign, kind="stable").astype(np.int32)
+            offsets = np.zeros(n_lists + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(np.bincount(assign, minlength=n_lists))
+            index.centroids, index.ivf_offsets, index.ivf_order = centroids.astype(np.float32), offsets, order
+        return index
+
+    def _score(self, queries, rows=None):
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        scales = self.scales if rows is None else self.scales[rows]
+        scores = np.empty((len(queries), len(vectors)), dtype=np.float32)
+        for start in range(0, len(vectors), self.block_rows):
+            block = vectors[start:start + self.block_rows].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        return scores * scales
+
+    def search_batch(self, queries, k=10, nprobe=8):
+        """Top-k (doc_id, cosine) per query; a doc's score is its best chunk's."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.centroids is None:
+            candidate_rows = [None] * len(queries)
+            scores = self._score(queries)
+        else:
+            probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :nprobe]
+            candidate_rows = [
+                np.concatenate([self.ivf_order[self.ivf_offsets[c]:self.ivf_offsets[c + 1]] for c in row])
+                for row in probes
+            ]
+            scores = [self._score(q[None, :], rows)[0] for q, rows in zip(queries, candidate_rows)]
+
+        results = []
+        for row_scores, rows in zip(scores, candidate_rows):
+            docs = self.chunk_docs if rows is None else self.chunk_docs[rows]
+            best = {}
+            for i in np.argsort(-row_scores)[: k * 4]:
+                doc = int(docs[i])
+                if doc not in best:
+                    best[doc] = float(row_scores[i])
+                    if len(best) == k:
+                        break
+            results.append(list(best.items()))
+        return results
+
+    def sections(self):
+        sections = {
+            "dense_vectors": self.vectors.reshape(-1),
+            "dense_scales": self.scales,
+            "dense_chunk_docs": self.chunk_docs,
+        }
+        if self.centroids is not None:
+            sections.update(
+                dense_ivf_centroids=self.centroids.reshape(-1),
+                dense_ivf_offsets=self.ivf_offsets,
+                dense_ivf_order=self.ivf_order,
+            )
+        return sections
+
+    def info(self):
+        return {
+            "model": self.model_name,
+            "dim": int(self.vectors.shape[1]),
+            "dtype": self.vectors.dtype.name,
+            "chunks": int(len(self.chunk_docs)),
+            "ivf_lists": 0 if self.centroids is None else int(len(self.centroids)),
+        }
+
+
+def load_dense_index(artifact):
+    """Rebuild a DenseIndex over an artifact's sections, or None if it has none."""
+    info = artifact.header.get("dense")
+    if not info or "dense_vectors" not in artifact:
+        return None
+    dim = info["dim"]
+    centroids = None
+    if info["ivf_lists"]:
+        centroids = artifact.array("dense_ivf_centroids").reshape(-1, dim)
+    return DenseIndex(
+        vectors=artifact.array("dense_vectors").reshape(-1, dim),
+        scales=artifact.array("dense_scales"),
+        chunk_docs=artifact.array("dense_chunk_docs"),
+        model_name=info["model"],
+        centroids=centroids,
+        ivf_offsets=artifact.array("dense_ivf_offsets") if centroids is not None else None,
+        ivf_order=artifact.array("dense_ivf_order") if centroids is not None else None,
+    )
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse several [(doc_id, score)] rankings by reciprocal rank."""
+    fused = {}
+    for ranking in rankings:
+        for rank, (doc, _) in enumerate(ranking):
+            fused[doc] = fused.get(doc, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,206 @@
+"""Offline model export: merge the LoRA adapter into the base weights and cache it.
+
+The exported directory holds a plain causal LM checkpoint (fp32 or bf16), the
+tokenizer and export_info.json. Dynamic int8 quantization of the Linear layers
+is re-applied at load time, which takes seconds and avoids pickling quantized
+modules.
+
+Usage:
+    python -m app.export_model --output models/merged [--quantize int8|bf16|none] [--report report.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+BASE_MODEL_NAME = "unsloth/llama-3.2-1b-instruct"
+ADAPTER_NAME = "jeeldoshi/model_1b_latest"
+EXPORT_INFO = "export_info.json"
+QUANTIZATION_MODES = ("int8", "bf16", "none")
+
+# Fixed prompts for the regression check; greedy decoding keeps the comparison deterministic
+QUALITY_PROMPTS = [
+    "what is the role of the department of justice?",
+    "how can i check the status of my case in the district court?",
+    "what is the national judicial data grid?",
+    "how do i apply for free legal aid?",
+    "what are fast track courts?",
+    "how many judges are there in the supreme court of india?",
+    "what is e-courts mission mode project?",
+    "how do i file a case in the consumer court?",
+]
+
+
+def load_peft_model(base_model_name=BASE_MODEL_NAME, adapter_name=ADAPTER_NAME):
+    """The base model with the adapter applied on the fly, as the API has always served it."""
+    from peft import PeftModel
+
+    base_model = AutoModelForCausalLM.from_pretrained(base_model_name, device_map=None)
+    return PeftModel.from_pretrained(base_model, adapter_name).to("cpu").eval()
+
+
+def quantize_model(model, mode):
+    if mode == "int8":
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if mode == "bf16":
+        return model.to(torch.bfloat16)
+    if mode == "none":
+        return model
+    raise ValueError(f"unsupported quantization {mode!r}, expected one of {QUANTIZATION_MODES}")
+
+
+def is_exported(path):
+    return os.path.exists(os.path.join(path, EXPORT_INFO))
+
+
+def export_model(output_path, quantize="int8", base_model_name=BASE_MODEL_NAME, adapter_name=ADAPTER_NAME):
+    """Merge adapter into base weights and save a checkpoint that load_exported_model can serve."""
+    start = time.time()
+    merged = load_peft_model(base_model_name, adapter_name).merge_and_unload()
+    if quantize == "bf16":
+        merged = merged.to(torch.bfloat16)
+    tmp_path = f"{output_path}.tmp-{os.getpid()}"
+    merged.save_pretrained(tmp_path)
+    AutoTokenizer.from_pretrained(base_model_name).save_pretrained(tmp_path)
+    with open(os.path.join(tmp_path, EXPORT_INFO), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "base_model": base_model_name,
+                "adapter": adapter_name,
+                "quantize": quantize,
+                "torch": torch.__version__,
+                "created_at": time.time(),
+            },
+            f,
+            indent=4,
+        )
+    if os.path.exists(output_path):
+        # Swap the old export out only once the new one is complete
+        old_path = f"{output_path}.old-{os.getpid()}"
+        os.replace(output_path, old_path)
+        shutil.rmtree(old_path)
+    os.replace(tmp_path, output_path)
+    print(f"Exported merged model ({quantize}) to {output_path} in {time.time() - start:.2f} seconds")
+
+
+def load_exported_model(path):
+    """Load a merged checkpoint from export_model; returns (model, tokenizer, export info)."""
+    with open(os.path.join(path, EXPORT_INFO), "r", encoding="utf-8") as f:
+        info = json.load(f)
+    dtype = torch.bfloat16 if info["quantize"] == "bf16" else torch.float32
+    model = AutoModelForCausalLM.from_pretrained(path, torch_dtype=dtype, device_map=None).to("cpu").eval()
+    if info["quantize"] == "int8":
+        model = quantize_model(model, "int8")
+    return model, AutoTokenizer.from_pretrained(path), info
+
+
+def rss_mb():
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def _benchmark(kind, path=None, max_new_tokens=32):
+    """Load one model variant and time greedy generation over QUALITY_PROMPTS.
+
+    Runs in a fresh process so RSS reflects that variant alone.
+    """
+    torch.set_grad_enabled(False)
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    if kind == "peft":
+        model, tokenizer = load_peft_model(), AutoTokenizer.from_pretrained(BASE_MODEL_NAME)
+    else:
+        model, tokenizer, _ = load_exported_model(path)
+    load_seconds = time.perf_counter() - start
+
+    outputs, latencies = [], []
+    for prompt in QUALITY_PROMPTS:
+        inputs = tokenizer(prompt, return_tensors="pt")
+        start = time.perf_counter()
+        with torch.inference_mode():
+            generated = model.generate(
+                **inputs, max_new_tokens=max_new_tokens, do_sample=False, pad_token_id=tokenizer.eos_token_id
+            )
+        latencies.append(time.perf_counter() - start)
+        outputs.append(generated[0, inputs["input_ids"].shape[1]:].tolist())
+    new_tokens = sum(len(ids) for ids in outputs)
+    return {
+        "load_seconds": load_seconds,
+        "rss_mb": rss_mb() - rss_before,
+        "mean_latency_seconds": sum(latencies) / len(latencies),
+        "tokens_per_second": new_tokens / sum(latencies),
+        "outputs": outputs,
+    }
+
+
+def token_agreement(reference, candidate):
+    """Fraction of reference tokens reproduced before the first divergence."""
+    matched = 0
+    for expected, actual in zip(reference, candidate):
+        if expected != actual:
+            break
+        matched += 1
+    return matched / len(reference) if reference else 1.0
+
+
+def compare(path, max_new_tokens=32):
+    """Benchmark the adapter-on-the-fly model against an export; returns a report dict."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = {}
+    for kind in ("peft", "exported"):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results[kind] = pool.submit(_benchmark, kind, path, max_new_tokens).result()
+
+    reference, candidate = results["peft"].pop("outputs"), results["exported"].pop("outputs")
+    agreement = [token_agreement(ref, out) for ref, out in zip(reference, candidate)]
+    return {
+        "prompts": len(QUALITY_PROMPTS),
+        "max_new_tokens": max_new_tokens,
+        "exact_match": sum(ref == out for ref, out in zip(reference, candidate)) / len(reference),
+        "mean_token_agreement": sum(agreement) / len(agreement),
+        "per_prompt_agreement": agreement,
+        "before": results["peft"],
+        "after": results["exported"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the merged, quantized chatbot model.")
+    parser.add_argument("--output", default="models/merged", help="directory to write the checkpoint to")
+    parser.add_argument("--quantize", choices=QUANTIZATION_MODES, default="int8")
+    parser.add_argument("--base-model", default=BASE_MODEL_NAME)
+    parser.add_argument("--adapter", default=ADAPTER_NAME)
+    parser.add_argument("--report", help="compare against the PeftModel and write latency/RSS/quality here")
+    parser.add_argument("--max-new-tokens", type=int, default=32, help="greedy tokens per quality prompt")
+    parser.add_argument(
+        "--min-agreement", type=float, default=0.8, help="fail if mean token agreement drops below this"
+    )
+    args = parser.parse_args()
+    export_model(args.output, args.quantize, args.base_model, args.adapter)
+    if not args.report:
+        return
+
+    report = compare(args.output, args.max_new_tokens)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    before, after = report["before"], report["after"]
+    print(
+        f"Latency {before['mean_latency_seconds']:.2f}s -> {after['mean_latency_seconds']:.2f}s per prompt, "
+        f"RSS {before['rss_mb']:.0f} -> {after['rss_mb']:.0f} MB, "
+        f"token agreement {report['mean_token_agreement']:.2f}, exact match {report['exact_match']:.2f}"
+    )
+    if report["mean_token_agreement"] < args.min_agreement:
+        raise SystemExit(f"Quality regression: token agreement {report['mean_token_agreement']:.2f} < {args.min_agreement}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,94 @@
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
+import asyncio
 import json
+import os
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
-from peft import PeftConfig, PeftModel
-from difflib import SequenceMatcher
+from transformers import AutoTokenizer
 import time
-import httpx
-import matplotlib.pyplot as plt
-import re
 import base64
-from io import BytesIO
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .build_corpus import prepare_corpus
+from .charts import CHART_FORMATS, ChartCache, extract_key_value_pairs
+from .corpus import iter_scraped_data, load_corpus, load_passages
+from .dense import Embedder, load_dense_index, reciprocal_rank_fusion
+from .export_model import BASE_MODEL_NAME, export_model, is_exported, load_exported_model, load_peft_model
+from .njdg import NJDGStats
+from .response_cache import ResponseCache
+from .scheduler import GenerationScheduler
+from .stage_metrics import StageMetrics
+from .streaming import sse_event, stream_generation
+from .tavily import TAVILY_BASE_URL, SearchCache, TavilyClient
 
 
 app = FastAPI()
 
 # Load the model and tokenizer
+# MODEL_MODE=merged serves the checkpoint from `python -m app.export_model` (adapter merged
+# into the base weights, optionally int8/bf16), exporting it on first boot if it is missing
+MODEL_MODE = os.getenv("MODEL_MODE", "peft")
+MODEL_EXPORT_PATH = os.getenv("MODEL_EXPORT_PATH", "/code/models/merged")
+MODEL_QUANTIZATION = os.getenv("MODEL_QUANTIZATION", "int8")
 print("Loading models...")
-config = PeftConfig.from_pretrained("jeeldoshi/model_1b_latest", ignore_mismatched_sizes=True)
-base_model = AutoModelForCausalLM.from_pretrained(
-    "unsloth/llama-3.2-1b-instruct",
-    device_map=None  # Ensure no auto device allocation
-)
-model = PeftModel.from_pretrained(base_model, "jeeldoshi/model_1b_latest")
-tokenizer = AutoTokenizer.from_pretrained("unsloth/llama-3.2-1b-instruct")
+if MODEL_MODE == "merged":
+    if not is_exported(MODEL_EXPORT_PATH):
+        export_model(MODEL_EXPORT_PATH, quantize=MODEL_QUANTIZATION)
+    model, tokenizer, export_info = load_exported_model(MODEL_EXPORT_PATH)
+    print(f"Merged model loaded from {MODEL_EXPORT_PATH} ({export_info['quantize']}).")
+else:
+    model = load_peft_model()
+    tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL_NAME)
 
 device = "cpu"  # Force CPU usage
-model.to(device)
 torch.set_grad_enabled(False)  # Inference only
 
 print("Models loaded successfully.")
 
 # Load scraped data
+# Prefer the prebuilt artifact from `python -m app.build_corpus`: it is mapped read-only,
+# so startup skips dedup/indexing and uvicorn workers share the same pages
+CORPUS_ARTIFACT_PATH = os.getenv("CORPUS_ARTIFACT_PATH", "/code/data/corpus.bin")
+SCRAPED_DATA_PATH = os.getenv("SCRAPED_DATA_PATH", "/code/data/final_all_data.json")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.6"))  # estimated Jaccard similarity
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "5"))  # characters per shingle
+PASSAGE_TOKENS = int(os.getenv("PASSAGE_TOKENS", "128"))  # max tokens per stored passage
+
 print("Loading scraped data...")
-with open('D:/SIH 2024/rag-deploy/data/final_all_data.json', 'r', encoding='utf-8') as f:
-    scraped_data = json.load(f)
-if scraped_data:
-    print("Scraped data loaded successfully.")
+if os.path.exists(CORPUS_ARTIFACT_PATH):
+    scraped_data, retrieval_index = load_corpus(CORPUS_ARTIFACT_PATH)
+    passage_store = load_passages(scraped_data.artifact)
+    if passage_store is not None and passage_store.tokenizer_name != BASE_MODEL_NAME:
+        print(f"Passage token IDs were built for {passage_store.tokenizer_name}, ignoring them.")
+        passage_store = None
+    print(f"Corpus artifact mapped: {len(scraped_data)} records, {len(retrieval_index.vocab)} terms.")
+else:
+    # No artifact yet: do the same normalization, dedup and indexing in-process
+    print(f"{CORPUS_ARTIFACT_PATH} not found, building corpus from {SCRAPED_DATA_PATH}...")
+    scraped_data, dedup_report, retrieval_index, passage_store = prepare_corpus(
+        iter_scraped_data(SCRAPED_DATA_PATH),
+        threshold=DEDUP_THRESHOLD,
+        shingle_size=DEDUP_SHINGLE_SIZE,
+        tokenizer=tokenizer,
+        tokenizer_name=BASE_MODEL_NAME,
+        passage_tokens=PASSAGE_TOKENS,
+    )
+    print(f"Scraped data loaded: {len(scraped_data)} records in {len(dedup_report)} dedup clusters.")
+
+# Supreme Court NJDG dashboards as columnar statistics from `python -m app.njdg`; questions
+# that ask for figures get an aggregate of these arrays as extra context, and charts of them
+NJDG_STATS_PATH = os.getenv("NJDG_STATS_PATH", "/code/data/njdg_stats.npz")
+njdg_stats = NJDGStats.load(NJDG_STATS_PATH) if os.path.exists(NJDG_STATS_PATH) else None
+if njdg_stats is not None:
+    print(f"NJDG statistics loaded: {len(njdg_stats)} rows, years {njdg_stats.years()}.")
+
+# Token budget for model input: retrieved passages are packed into whatever the prompt leaves
+MAX_INPUT_TOKENS = int(os.getenv("MAX_INPUT_TOKENS", "512"))
+MAX_PROMPT_TOKENS = int(os.getenv("MAX_PROMPT_TOKENS", "128"))
+CONTEXT_DOCS = int(os.getenv("CONTEXT_DOCS", "3"))  # top records whose passages compete for the budget
+PASSAGE_SEPARATOR_IDS = tokenizer("\n", add_special_tokens=False)["input_ids"]
 
 # System prompt
 SYSTEM_PROMPT = (
@@ -53,99 +104,118 @@ SYSTEM_PROMPT = (
 class QueryRequest(BaseModel):
     prompt: str
     feedback: str = None  # Optional feedback field (e.g., "like", "dislike")
-
-# Function to filter out exact duplicates
-def filter_redundant_data(scraped_data):
-    seen = set()  # Keep track of seen content
-    filtered_data = []
-
-    for item in scraped_data:
-        title = item['metadata'].get('title', '').strip().lower()
-        content = item.get('text', '').strip().lower()
-        
-        # Use a tuple of (title, content) to detect redundancy
-        if (title, content) not in seen:
-            filtered_data.append(item)
-            seen.add((title, content))
-    
-    return filtered_data
-
-# Function to filter out similar data based on a similarity threshold
-def filter_similar_data(scraped_data, threshold=0.6):
-    filtered_data = []
-    
-    for i, item1 in enumerate(scraped_data):
-        add_item = True
-        for item2 in filtered_data:
-            # Calculate similarity between the current item and any already added items
-            similarity = SequenceMatcher(None, item1.get('text', '').lower(), item2.get('text', '').lower()).ratio()
-            if similarity >= threshold:
-                add_item = False
-                break
-        
-        if add_item:
-            filtered_data.append(item1)
-    
-    return filtered_data
-
-# Apply redundancy filters to the scraped data
-scraped_data = filter_redundant_data(scraped_data)
-scraped_data = filter_similar_data(scraped_data, threshold=0.6)
+    image_format: str = None  # For "visualize" prompts: "base64" (default), "png", "svg", "url" or "url:svg"
+
+# "bm25" ranks by BM25F confidence; "compat" keeps the old best-ratio-above-threshold rule
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "bm25")
+RETRIEVAL_MIN_CONFIDENCE = float(os.getenv("RETRIEVAL_MIN_CONFIDENCE", "0.35"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "10"))
+
+# Optional dense retrieval over chunk embeddings from `build_corpus --dense`
+# "off", "dense" (embeddings only) or "hybrid" (fused with BM25F by reciprocal rank)
+DENSE_MODE = os.getenv("DENSE_MODE", "off")
+DENSE_MIN_SIMILARITY = float(os.getenv("DENSE_MIN_SIMILARITY", "0.45"))
+dense_index = embedder = None
+if DENSE_MODE != "off":
+    artifact = getattr(scraped_data, "artifact", None)
+    dense_index = load_dense_index(artifact) if artifact else None
+    if dense_index is None:
+        print("No dense embeddings in the corpus artifact; rebuild with `build_corpus --dense`. Dense retrieval disabled.")
+        DENSE_MODE = "off"
+    else:
+        embedder = Embedder(dense_index.model_name)
+        print(f"Dense retrieval enabled ({DENSE_MODE}): {dense_index.info()}")
+
+# Rank records for a prompt; returns ([(doc_id, score)], whether the top hit is trustworthy)
+# hits are the lexical results when the caller has already searched
+def rank_documents(prompt, k=RETRIEVAL_TOP_K, hits=None):
+    if hits is None:
+        hits = retrieval_index.search(prompt, k=k)
+    lexical_ok = bool(hits) and hits[0][1] >= RETRIEVAL_MIN_CONFIDENCE
+    if DENSE_MODE == "off":
+        return hits, lexical_ok
+
+    dense_hits = dense_index.search_batch(embedder.encode([prompt]), k=k)[0]
+    dense_ok = bool(dense_hits) and dense_hits[0][1] >= DENSE_MIN_SIMILARITY
+    if DENSE_MODE == "dense":
+        return dense_hits, dense_ok
+    return reciprocal_rank_fusion([hits, dense_hits]), lexical_ok or dense_ok
+
+# Retrieval threads and the event loop share the tokenizer; fast tokenizers reject
+# concurrent calls that change truncation settings, so encoding is serialized
+tokenizer_lock = threading.Lock()
+
+# Tokenize the prompt once, keeping its tail if it is very long
+def encode_prompt(prompt):
+    with tokenizer_lock:
+        return tokenizer(" " + prompt, add_special_tokens=False)["input_ids"][-MAX_PROMPT_TOKENS:]
+
+def context_budget(prompt_ids):
+    return MAX_INPUT_TOKENS - len(prompt_ids) - 1  # one slot for BOS
 
 # Function to find relevant responses from the scraped data
-def get_response_from_data(prompt, scraped_data):
+# Returns packed passage token IDs when the passage store is available, else the record text
+def get_response_from_data(prompt, scraped_data, hits=None):
     prompt = prompt.strip().lower()
-    threshold = 0.6
-
-    matches = [
-        {
-            "title": item['metadata'].get('title', '').strip().lower(),
-            "content": item.get('text', ''),
-            "score": max(
-                SequenceMatcher(None, prompt, item['metadata'].get('title', '').lower()).ratio(),
-                SequenceMatcher(None, prompt, item['metadata'].get('category', '').lower()).ratio()
-            ),
-        }
-        for item in scraped_data
-        if SequenceMatcher(None, prompt, item['metadata'].get('title', '').lower()).ratio() >= threshold
-           or SequenceMatcher(None, prompt, item['metadata'].get('category', '').lower()).ratio() >= threshold
-    ]
 
-    if matches:
-        return max(matches, key=lambda x: x["score"])['content']
-    return None
-
-# Function to query Tavily API asynchronously
-async def search_tavily(prompt):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.tavily.com/search",
-            json={"query": prompt},
-            headers={"Authorization": "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"}  # Replace with your actual API key
-        )
-        if response.status_code == 200:
-            data = response.json()
-            return data['results'][0].get('content', None) if 'results' in data and data['results'] else None
-        else:
-            return None
-
-# Function to generate a response from the model with optimizations
-def get_model_response(prompt, retrieved_data, feedback=None):
-    start_time_model = time.time()  # Start timing the model inference
+    if RETRIEVAL_MODE == "compat":
+        match = retrieval_index.best_match(prompt, threshold=0.6)
+        doc_ids = [match[0]] if match else []
+    else:
+        ranking, confident = rank_documents(prompt, hits=hits)
+        doc_ids = [doc for doc, _ in ranking[:CONTEXT_DOCS]] if confident else []
+
+    if not doc_ids:
+        return None
+    if passage_store is not None:
+        budget = context_budget(encode_prompt(prompt))
+        return passage_store.select(prompt, doc_ids, budget, PASSAGE_SEPARATOR_IDS) or None
+    return scraped_data[doc_ids[0]].get('text', '')
+
+# Tavily web search: one pooled client for the app's lifetime, results cached on disk
+tavily_client = TavilyClient(
+    api_key=os.getenv("TAVILY_API_KEY", "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"),  # Replace with your actual API key
+    base_url=os.getenv("TAVILY_BASE_URL", TAVILY_BASE_URL),
+    connect_timeout=float(os.getenv("TAVILY_CONNECT_TIMEOUT", "3")),
+    read_timeout=float(os.getenv("TAVILY_READ_TIMEOUT", "10")),
+    max_concurrency=int(os.getenv("TAVILY_MAX_CONCURRENCY", "8")),
+    cache=SearchCache(
+        os.getenv("TAVILY_CACHE_PATH", "/code/data/tavily_cache.sqlite3"),
+        ttl_seconds=float(os.getenv("TAVILY_CACHE_TTL", "86400")),
+    ),
+)
 
-    # Combine the retrieved data and prompt
-    combined_input = f"{retrieved_data} {prompt}"
+@app.on_event("startup")
+def start_tavily_client():
+    tavily_client.start()
 
-    # Tokenize the combined input efficiently
-    inputs = tokenizer(
-        combined_input,
-        return_tensors="pt",
-        padding=True,
-        truncation=True,
-        max_length=min(512, len(combined_input.split()))
-    ).to(device)
+@app.on_event("shutdown")
+async def close_tavily_client():
+    await tavily_client.aclose()
 
-    # Adjust model parameters based on feedback
+# Function to query Tavily API asynchronously
+async def search_tavily(prompt):
+    return await tavily_client.search(prompt)
+
+# Build model inputs as [BOS] context prompt within MAX_INPUT_TOKENS
+# retrieved_data is either pre-tokenized passage IDs or raw text (Tavily / fallback)
+def build_model_inputs(prompt, retrieved_data):
+    prompt_ids = encode_prompt(prompt)
+    budget = context_budget(prompt_ids)
+    if isinstance(retrieved_data, str):
+        with tokenizer_lock:
+            context_ids = tokenizer(
+                retrieved_data, add_special_tokens=False, truncation=True, max_length=budget
+            )["input_ids"]
+    else:
+        context_ids = list(retrieved_data)[:budget]
+
+    bos = [tokenizer.bos_token_id] if tokenizer.bos_token_id is not None else []
+    input_ids = torch.tensor([bos + context_ids + prompt_ids], dtype=torch.long)
+    return {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+
+# Adjust model parameters based on feedback
+def sampling_params(feedback=None):
     temperature = 0.5  # Default temperature
     if feedback == "dislike":
         # Reduce temperature to make the response more deterministic
@@ -153,20 +223,44 @@ def get_model_response(prompt, retrieved_data, feedback=None):
     elif feedback == "like":
         # Increase temperature slightly for more diversity
         temperature = 0.6
+    return {"temperature": temperature}
+
+# Decoding settings shared by /query and /query/stream
+GENERATE_KWARGS = {
+    "max_new_tokens": 150,
+    "top_p": 0.95,
+    "top_k": 30,
+    "repetition_penalty": 1.2,
+}
+
+# Concurrent /query requests are batched into shared model.generate calls on a worker thread
+generation_scheduler = GenerationScheduler(
+    model,
+    pad_token_id=tokenizer.eos_token_id,
+    max_batch_size=int(os.getenv("GENERATION_MAX_BATCH_SIZE", "8")),
+    max_wait_ms=float(os.getenv("GENERATION_MAX_WAIT_MS", "20")),
+    max_streams=int(os.getenv("GENERATION_MAX_STREAMS", "0")) or None,  # default: the batch size
+    **GENERATE_KWARGS,
+)
 
-    with torch.no_grad():
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=150,
-            temperature=temperature,
-            top_p=0.95,
-            top_k=30,
-            repetition_penalty=1.2,
-            pad_token_id=tokenizer.eos_token_id
-        )
+@app.on_event("startup")
+def start_generation_scheduler():
+    generation_scheduler.start()
+
+@app.on_event("shutdown")
+def stop_generation_scheduler():
+    generation_scheduler.stop()
+
+# Function to generate a response from the model with optimizations
+async def get_model_response(prompt, retrieved_data, feedback=None):
+    start_time_model = time.time()  # Start timing the model inference
+
+    # Pack retrieved context and prompt into the token budget
+    input_ids = build_model_inputs(prompt, retrieved_data)["input_ids"][0].tolist()
+    result = await generation_scheduler.submit(input_ids, **sampling_params(feedback))
 
     model_time = time.time() - start_time_model  # Calculate model inference time
-    response = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    response = tokenizer.decode(result["output_ids"], skip_special_tokens=True)
 
     # Remove the prompt part from the response
     prompt_end_index = response.find(prompt)
@@ -175,73 +269,208 @@ def get_model_response(prompt, retrieved_data, feedback=None):
 
     return response, model_time
 
+FALLBACK_CONTEXT = "No relevant external data found."
+
+# Answers keyed on (normalized prompt, retrieved-context digest, feedback); near-duplicate
+# prompts can reuse them when RESPONSE_CACHE_NEAR_THRESHOLD > 0 (MinHash agreement, 0-1)
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 << 20))),
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+    near_threshold=float(os.getenv("RESPONSE_CACHE_NEAR_THRESHOLD", "0")),
+)
+
+# Cached answers are only valid for the scraped data they were generated from
+def data_version():
+    try:
+        stat = os.stat(SCRAPED_DATA_PATH)
+        source = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        source = None
+    artifact = getattr(scraped_data, "artifact", None)
+    return source, artifact.header.get("source_sha256") if artifact else None
+
+# Per-stage latency and pipeline counters, served on /metrics
+stage_metrics = StageMetrics()
+
+# "pipelined" runs local retrieval on a thread pool and starts Tavily early when the lexical
+# top score is below RETRIEVAL_SPECULATE_BELOW; "sequential" only asks Tavily after a local miss
+RETRIEVAL_PIPELINE = os.getenv("RETRIEVAL_PIPELINE", "pipelined")
+RETRIEVAL_SPECULATE_BELOW = float(os.getenv("RETRIEVAL_SPECULATE_BELOW", "0.6"))
+retrieval_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RETRIEVAL_WORKERS", "4")), thread_name_prefix="retrieval"
+)
+
+@app.on_event("shutdown")
+def stop_retrieval_executor():
+    retrieval_executor.shutdown(wait=False)
+
+async def timed_search_tavily(prompt):
+    start = time.perf_counter()
+    result = await search_tavily(prompt)
+    stage_metrics.observe("tavily", time.perf_counter() - start)  # cancelled lookups are not timed
+    return result
+
+def lexical_search(prompt):
+    with stage_metrics.time("retrieval_lexical"):
+        return retrieval_index.search(prompt.strip().lower(), k=RETRIEVAL_TOP_K)
+
+def local_retrieval(prompt, hits=None):
+    with stage_metrics.time("retrieval_local"):
+        return get_response_from_data(prompt, scraped_data, hits)
+
+async def _sequential_context(prompt):
+    loop = asyncio.get_running_loop()
+    data_response = await loop.run_in_executor(retrieval_executor, local_retrieval, prompt)
+    if data_response:
+        return "data", data_response
+    tavily_response = await timed_search_tavily(prompt)
+    return ("tavily", tavily_response) if tavily_response else ("fallback", FALLBACK_CONTEXT)
+
+async def _pipelined_context(prompt):
+    loop = asyncio.get_running_loop()
+    hits = await loop.run_in_executor(retrieval_executor, lexical_search, prompt)
+
+    # A weak lexical match is likely to miss, so overlap the network call with the rest
+    # of local retrieval (dense scoring, passage selection) instead of running them back to back
+    speculative = None
+    if not hits or hits[0][1] < RETRIEVAL_SPECULATE_BELOW:
+        speculative = asyncio.create_task(timed_search_tavily(prompt))
+        stage_metrics.increment("tavily_speculative")
+
+    try:
+        data_response = await loop.run_in_executor(retrieval_executor, local_retrieval, prompt, hits)
+    except BaseException:
+        if speculative is not None:
+            speculative.cancel()
+        raise
+    if data_response:
+        if speculative is not None:
+            speculative.cancel()
+            stage_metrics.increment("tavily_speculative_cancelled")
+        return "data", data_response
+
+    tavily_response = await (speculative or timed_search_tavily(prompt))
+    return ("tavily", tavily_response) if tavily_response else ("fallback", FALLBACK_CONTEXT)
+
+# NJDG figures go in front of the retrieved context; passage token IDs stay token IDs
+def with_njdg_context(njdg_context, context):
+    if isinstance(context, str):
+        return f"{njdg_context}\n\n{context}"
+    with tokenizer_lock:
+        njdg_ids = tokenizer(njdg_context + "\n\n", add_special_tokens=False)["input_ids"]
+    return njdg_ids + list(context)
+
+# Pick the context for a prompt: scraped data first, then Tavily, then the fallback text.
+# Questions that explicitly ask for NJDG figures get the matching statistics on top.
+# Returns (source, context) where source is "data", "tavily", "njdg" (statistics only,
+# nothing else found) or "fallback"
+async def retrieve_context(prompt):
+    with stage_metrics.time("retrieval"):
+        njdg_filters = njdg_stats.parse_query(prompt) if njdg_stats is not None else None
+        njdg_context = njdg_stats.describe(njdg_filters) if njdg_filters else None
+        if RETRIEVAL_PIPELINE == "sequential":
+            source, context = await _sequential_context(prompt)
+        else:
+            source, context = await _pipelined_context(prompt)
+        if njdg_context:
+            stage_metrics.increment("njdg_context")
+            if source == "fallback":
+                source, context = "njdg", njdg_context
+            else:
+                context = with_njdg_context(njdg_context, context)
+    stage_metrics.increment(f"source_{source}")
+    return source, context
+
 # Main function to get the final response
 async def get_final_response(prompt, feedback=None):
-    start_time_total = time.time()  # Start timing the entire request process
-    
-    # Check for relevant data response
-    data_response = get_response_from_data(prompt, scraped_data)
-    
-    if data_response:
-        print(f"Scraped data match found in {time.time() - start_time_total:.2f} seconds")
-        response, model_time = get_model_response(prompt, data_response, feedback)
-        total_time = time.time() - start_time_total  # Calculate total time
-        print(f"Model inference time: {model_time:.2f} seconds")
-        print(f"Total time: {total_time:.2f} seconds")
-        return {
-            "response": response
-        }
-    
-    # If no data found, proceed with API call
-    tavily_response = await search_tavily(prompt)
-    
-    if tavily_response:
-        print(f"Tavily API took {time.time() - start_time_total:.2f} seconds")
-        response, model_time = get_model_response(prompt, tavily_response, feedback)
-        total_time = time.time() - start_time_total  # Calculate total time
-        print(f"Model inference time: {model_time:.2f} seconds")
-        print(f"Total time: {total_time:.2f} seconds")
+    start_time_total = time.perf_counter()  # Start timing the entire request process
+
+    source, context = await retrieve_context(prompt)
+    response_cache.set_version(data_version())
+    cache_key = response_cache.key(prompt, context, feedback)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        stage_metrics.increment("source_response_cache")
+        stage_metrics.observe("total", time.perf_counter() - start_time_total)
         return {
-            "response": response
+            "response": cached
         }
-    
-    # Fallback if no relevant data found
-    fallback_response = get_model_response(prompt, "No relevant external data found.", feedback)
-    total_time = time.time() - start_time_total  # Calculate total time
-    print(f"Fallback model response generated in {total_time:.2f} seconds")
+
+    response, model_time = await get_model_response(prompt, context, feedback)
+    response_cache.put(cache_key, response)
+    stage_metrics.observe("generation", model_time)
+    stage_metrics.observe("total", time.perf_counter() - start_time_total)
     return {
-        "response": fallback_response[0]
+        "response": response
     }
 
+# Stream the answer as server-sent events: "context", then "token" events as text is
+# decoded, then "done" with time-to-first-token and tokens/sec
+async def stream_final_response(prompt, feedback=None):
+    start_time_total = time.perf_counter()
+    try:
+        if "visualize" in prompt:
+            loop = asyncio.get_running_loop()
+            yield sse_event({"image": await loop.run_in_executor(chart_executor, visualize_data, prompt)}, event="image")
+            return
+
+        source, context = await retrieve_context(prompt)
+        yield sse_event({"source": source}, event="context")
+
+        inputs = build_model_inputs(prompt, context)
+        async for event in stream_generation(
+            model,
+            tokenizer,
+            inputs,
+            slot=generation_scheduler.stream_slot(),
+            pad_token_id=tokenizer.eos_token_id,
+            **GENERATE_KWARGS,
+            **sampling_params(feedback),
+        ):
+            yield event
+    except HTTPException as e:
+        yield sse_event({"error": e.detail}, event="error")
+    except Exception as e:
+        yield sse_event({"error": f"Error occurred: {str(e)}"}, event="error")
+    stage_metrics.observe("stream_total", time.perf_counter() - start_time_total)
+
 # Function to match the prompt with metadata
 def match_prompt_with_metadata(prompt, data):
     prompt_words = set(prompt.lower().split())
     best_match = None
     max_matches = 0
     for entry in data:
-        title_words = set(entry['metadata']['category'].lower().split())
+        # Crawled pages carry no category and never match
+        category = entry.get('metadata', {}).get('category', '')
+        if not category:
+            continue
+        title_words = set(category.lower().split())
         matches = len(prompt_words & title_words)
         if matches > max_matches:
             max_matches = matches
             best_match = entry
     return best_match
 
-def extract_key_value_pairs(text: str):
-    keys = []
-    values = []
-
-    # Regex to match keys and values for labels like "Category: <key>" and "Count: <value>"
-    pattern = r"(?:(?:Particular|Category|Stage|Year):\s*([\w\s\.\(\)-]+))\s*(?:Total|Count):\s*([0-9]+)"
-    matches = re.findall(pattern, text)
-
-    for key, value in matches:
-        keys.append(key.strip())
-        values.append(int(value.strip()))
-
-    return keys, values
+# Charts render through the Figure/Agg API on a small pool, cached by (category, data hash);
+# `build_corpus --charts-dir` pre-renders every chartable record into CHARTS_DIR
+CHARTS_DIR = os.getenv("CHARTS_DIR", "/code/data/charts")
+chart_cache = ChartCache(CHARTS_DIR, max_entries=int(os.getenv("CHART_CACHE_SIZE", "256")))
+chart_executor = ThreadPoolExecutor(max_workers=int(os.getenv("CHART_WORKERS", "2")), thread_name_prefix="charts")
+
+@app.on_event("shutdown")
+def stop_chart_executor():
+    chart_executor.shutdown(wait=False)
+
+# Function to handle visualization requests; returns (digest, image bytes)
+def render_visualization(prompt: str, fmt="png"):
+    # NJDG dashboard charts come straight from the columnar statistics
+    njdg_filters = njdg_stats.parse_query(prompt) if njdg_stats is not None else None
+    if njdg_filters:
+        keys, values = njdg_stats.series(**dict(njdg_filters, dimension=njdg_filters.get("dimension", "casetype")))
+        if keys:
+            return chart_cache.render(njdg_stats.heading(njdg_filters), keys, values, fmt)
 
-# Function to handle visualization requests
-def visualize_data(prompt: str):
     # Match the prompt with the best metadata entry
     best_match = match_prompt_with_metadata(prompt, scraped_data)
     if not best_match:
@@ -252,37 +481,23 @@ def visualize_data(prompt: str):
     if not keys or not values:
         raise HTTPException(status_code=400, detail="No valid data found in the text for visualization.")
 
-    # Create a bar chart
-    plt.figure(figsize=(10, 6))
-    bars = plt.bar(keys, values, color='skyblue')
-    plt.xlabel('Keys')
-    plt.ylabel('Values')
-    plt.title(f"Visualization for: {best_match['metadata']['category']}")
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-
-    # Add numbers on top of each bar
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(
-            bar.get_x() + bar.get_width() / 2.0,  # X-coordinate: center of the bar
-            height,                               # Y-coordinate: top of the bar
-            f"{height}",                          # Text: height value
-            ha='center',                          # Horizontal alignment
-            va='bottom',                          # Vertical alignment
-            fontsize=10                           # Font size
-        )
-
-    # Save the chart to a BytesIO object (in-memory file)
-    img_stream = BytesIO()
-    plt.savefig(img_stream, format="png")
-    plt.close()
-    
-    # Encode the image as base64
-    img_stream.seek(0)
-    img_base64 = base64.b64encode(img_stream.read()).decode('utf-8')
-
-    return img_base64
+    return chart_cache.render(best_match.get('metadata', {}).get('category', ''), keys, values, fmt)
+
+def visualize_data(prompt: str):
+    _, image = render_visualization(prompt)
+    return base64.b64encode(image).decode('utf-8')
+
+# image_format "base64" keeps the JSON payload; "png"/"svg" return the raw bytes and
+# "url" (or "url:svg") returns a /charts link the client can load directly
+async def visualize_response(prompt: str, image_format="base64"):
+    fmt = "svg" if image_format in ("svg", "url:svg") else "png"
+    loop = asyncio.get_running_loop()
+    digest, image = await loop.run_in_executor(chart_executor, render_visualization, prompt, fmt)
+    if image_format in CHART_FORMATS:
+        return Response(content=image, media_type=CHART_FORMATS[fmt])
+    if image_format.startswith("url"):
+        return JSONResponse(content={"image_url": f"/charts/{digest}.{fmt}"})
+    return JSONResponse(content={"image": base64.b64encode(image).decode('utf-8')})
 
 @app.post("/query")
 async def query(request: QueryRequest):
@@ -290,10 +505,54 @@ async def query(request: QueryRequest):
 
     try:
         if "visualize" in prompt:
-            img_base64 = visualize_data(prompt)
-            return JSONResponse(content={"image": img_base64})
+            return await visualize_response(prompt, request.image_format or "base64")
         else:
             result = await get_final_response(prompt, request.feedback)
             return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error occurred: {str(e)}")
+
+@app.get("/charts/{name}")
+async def get_chart(name: str):
+    digest, _, fmt = name.partition(".")
+    image = chart_cache.get(digest, fmt) if fmt in CHART_FORMATS and digest.isalnum() else None
+    if image is None:
+        raise HTTPException(status_code=404, detail="Chart not found.")
+    return Response(content=image, media_type=CHART_FORMATS[fmt], headers={"Cache-Control": "public, max-age=86400"})
+
+# Aggregate NJDG statistics, e.g. /njdg/stats?status=disposed&case_class=civil&year=2023&by=label
+@app.get("/njdg/stats")
+async def njdg_statistics(status: str = None, registration: str = None, case_class: str = None,
+                          dimension: str = None, year: int = None, measure: str = None, by: str = "label"):
+    if njdg_stats is None:
+        raise HTTPException(status_code=404, detail="NJDG statistics are not available.")
+    group_by = tuple(name.strip() for name in by.split(",") if name.strip())
+    unknown = [name for name in group_by if name not in njdg_stats.columns or name == "value"]
+    if unknown or not group_by:
+        raise HTTPException(status_code=400, detail=f"Cannot group by {', '.join(unknown) or 'nothing'}.")
+    filters = dict(status=status, registration=registration, case_class=case_class,
+                   dimension=dimension, year=year, measure=measure)
+    rows = njdg_stats.aggregate(by=group_by, **filters)
+    return {
+        "rows": [dict(zip(group_by, group), total=total) for group, total in rows],
+        "total": njdg_stats.total(**filters),
+    }
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    prompt = request.prompt.strip().lower()
+    return StreamingResponse(
+        stream_final_response(prompt, request.feedback),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "generation": generation_scheduler.metrics(),
+        "response_cache": response_cache.metrics(),
+        "tavily": tavily_client.metrics(),
+        "pipeline": stage_metrics.metrics(),
+        "charts": chart_cache.metrics(),
+    }
@@ -0,0 +1,269 @@
+"""Supreme Court NJDG dashboard statistics as typed columns.
+
+The scraped dashboards are CSV files named <registration>_<case class>_<dimension>[_<year>].csv
+under "Pending Dash" and "Disposed Dash". ingest() flattens them into one long
+table (one row per label and measure) stored as integer-coded NumPy columns, so
+filters and group-bys are array operations instead of regex scans over prose.
+
+Usage:
+    python -m app.njdg --input "../scrape data/Supreme Court NJDG" --output data/njdg_stats.npz
+"""
+import argparse
+import csv
+import os
+import re
+
+import numpy as np
+
+STATUSES = {"Pending Dash": "pending", "Disposed Dash": "disposed"}
+REGISTRATIONS = ("registered", "unregistered")
+CASE_CLASSES = ("civil", "criminal")
+DIMENSIONS = ("casetype", "age", "stage", "institution-vs-disposal")
+ALL_YEARS = -1  # pending dashboards are a single current snapshot
+
+# Categorical columns are stored as codes into a per-column vocabulary
+CATEGORICAL = ("status", "registration", "case_class", "dimension", "label", "measure")
+
+_FILE_RE = re.compile(
+    r"^(?P<registration>unregistered|registered)_(?P<case_class>civil|criminal)_"
+    r"(?P<dimension>[a-z-]+?)(?:_(?P<year>\d{4}))?\.csv$"
+)
+
+_DIMENSION_WORDS = {
+    "casetype": re.compile(r"\bcase[ -]?types?\b|\btypes? of cases?\b"),
+    "stage": re.compile(r"\bstages?\b"),
+    "age": re.compile(r"\bage\b|\bhow old\b|\byears old\b"),
+    "institution-vs-disposal": re.compile(r"\binstitut(?:ion|ed)\b|\bdisposal rate\b"),
+}
+# A question only counts as an NJDG lookup when it explicitly asks for figures;
+# "how do i check if my case is pending in the supreme court" is not one
+_STATS_INTENT = re.compile(
+    r"\bhow many\b|\bnumber of\b|\bstatistic(?:s|al)?\b|\bstats\b|\bcounts?\b|\bcharts?\b"
+    r"|\bgraphs?\b|\bplot\b|\bvisuali[sz]e\b|\bnjdg\b"
+)
+DIMENSION_NAMES = {
+    "casetype": "case type",
+    "age": "age",
+    "stage": "stage",
+    "institution-vs-disposal": "institution vs disposal",
+}
+
+
+def _read_table(path):
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        return [], []
+    header, body = rows[0], rows[1:]
+    return [name.strip().lower() for name in header[1:]], [row for row in body if row and row[0].strip()]
+
+
+def _parse_int(value):
+    value = value.strip().replace(",", "")
+    return int(value) if value else 0
+
+
+class NJDGStats:
+    """Long-format dashboard table: status, registration, case_class, dimension,
+    year, label, measure and value columns of equal length."""
+
+    def __init__(self, columns, vocab):
+        self.columns = columns
+        self.vocab = vocab
+        self._codes = {name: {value: i for i, value in enumerate(values)} for name, values in vocab.items()}
+
+    def __len__(self):
+        return len(self.columns["value"])
+
+    @classmethod
+    def ingest(cls, root):
+        rows = []
+        for folder, status in STATUSES.items():
+            directory = os.path.join(root, folder)
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                match = _FILE_RE.match(name)
+                if not match:
+                    continue
+                year = int(match.group("year")) if match.group("year") else ALL_YEARS
+                measures, body = _read_table(os.path.join(directory, name))
+                for row in body:
+                    label = " ".join(row[0].split())
+                    for measure, value in zip(measures, row[1:]):
+                        rows.append((
+                            status,
+                            match.group("registration"),
+                            match.group("case_class"),
+                            match.group("dimension"),
+                            year,
+                            label,
+                            measure,
+                            _parse_int(value),
+                        ))
+
+        vocab = {name: sorted({row[i] for row in rows}) for i, name in enumerate(CATEGORICAL[:4])}
+        vocab["label"] = sorted({row[5] for row in rows})
+        vocab["measure"] = sorted({row[6] for row in rows})
+        index = {name: {value: i for i, value in enumerate(values)} for name, values in vocab.items()}
+        positions = dict(zip(CATEGORICAL, (0, 1, 2, 3, 5, 6)))
+        columns = {
+            name: np.asarray([index[name][row[pos]] for row in rows], dtype=np.int16)
+            for name, pos in positions.items()
+        }
+        columns["year"] = np.asarray([row[4] for row in rows], dtype=np.int16)
+        columns["value"] = np.asarray([row[7] for row in rows], dtype=np.int64)
+        return cls(columns, vocab)
+
+    def save(self, path):
+        arrays = dict(self.columns)
+        arrays.update({f"vocab_{name}": np.asarray(values, dtype=str) for name, values in self.vocab.items()})
+        tmp_path = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            columns = {name: data[name] for name in CATEGORICAL + ("year", "value")}
+            vocab = {name: data[f"vocab_{name}"].tolist() for name in CATEGORICAL}
+        return cls(columns, vocab)
+
+    def mask(self, status=None, registration=None, case_class=None, dimension=None, year=None, measure=None):
+        """Boolean row mask; each filter is a value or a list of values, None means any."""
+        keep = np.ones(len(self), dtype=bool)
+        for name, wanted in (
+            ("status", status),
+            ("registration", registration),
+            ("case_class", case_class),
+            ("dimension", dimension),
+            ("measure", measure),
+        ):
+            if wanted is None:
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else wanted
+            codes = [self._codes[name][value] for value in wanted if value in self._codes[name]]
+            keep &= np.isin(self.columns[name], codes)
+        if year is not None:
+            keep &= np.isin(self.columns["year"], [year] if isinstance(year, int) else list(year))
+        return keep
+
+    def aggregate(self, by=("label",), **filters):
+        """Sum of value per distinct combination of the `by` columns among matching rows.
+
+        Returns [(group tuple, total)] sorted by total, largest first.
+        """
+        keep = self.mask(**filters)
+        if not keep.any():
+            return []
+        keys = np.stack([self.columns[name][keep].astype(np.int64) for name in by], axis=1)
+        groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+        totals = np.bincount(inverse.reshape(-1), weights=self.columns["value"][keep], minlength=len(groups))
+        result = []
+        for group, total in zip(groups, totals):
+            decoded = tuple(
+                int(code) if name == "year" else self.vocab[name][code] for name, code in zip(by, group)
+            )
+            result.append((decoded, int(total)))
+        result.sort(key=lambda item: item[1], reverse=True)
+        return result
+
+    def total(self, **filters):
+        return int(self.columns["value"][self.mask(**filters)].sum())
+
+    def years(self):
+        return sorted(int(year) for year in np.unique(self.columns["year"]) if year != ALL_YEARS)
+
+    def parse_query(self, prompt):
+        """Filters implied by a free-text question, or None if it is not asking for NJDG figures."""
+        text = " ".join(prompt.lower().split())
+        if not _STATS_INTENT.search(text):
+            return None
+        words = set(re.findall(r"[a-z]+", text))
+        filters = {}
+        for name, choices in (("status", ("pending", "disposed")), ("case_class", CASE_CLASSES)):
+            found = [choice for choice in choices if choice in words]
+            if len(found) == 1:
+                filters[name] = found[0]
+        if "unregistered" in words:
+            filters["registration"] = "unregistered"
+        elif "registered" in words:
+            filters["registration"] = "registered"
+        if "disposal" in words and "status" not in filters and "institution" not in words:
+            filters["status"] = "disposed"
+        for dimension, pattern in _DIMENSION_WORDS.items():
+            if pattern.search(text):
+                filters["dimension"] = dimension
+                break
+        years = [int(year) for year in re.findall(r"\b(20\d\d)\b", text) if int(year) in self.years()]
+        if years and filters.get("status") != "pending" and filters.get("dimension") != "institution-vs-disposal":
+            filters["year"] = years
+            filters.setdefault("status", "disposed")
+
+        about_njdg = "njdg" in words or ("supreme" in words and "court" in words)
+        if not about_njdg or not ({"status", "dimension"} & filters.keys()):
+            return None
+        return filters
+
+    def series(self, dimension="casetype", **filters):
+        """(labels, values) for one dashboard chart; institution-vs-disposal sums both measures per year."""
+        if dimension == "institution-vs-disposal":
+            filters.setdefault("measure", "disposal" if filters.get("status") == "disposed" else "institution")
+            filters.pop("status", None)
+            filters.pop("year", None)
+        rows = self.aggregate(by=("label",), dimension=dimension, **filters)
+        if dimension in ("age", "institution-vs-disposal"):
+            rows.sort(key=lambda item: _label_order(item[0][0]))
+        return [group[0] for group, _ in rows], [total for _, total in rows]
+
+    def heading(self, filters):
+        dimension = filters.get("dimension", "casetype")
+        scope = " ".join(
+            str(filters[name]) for name in ("status", "registration", "case_class") if name in filters
+        )
+        years = filters.get("year")
+        period = f" in {', '.join(str(y) for y in years)}" if years else ""
+        return " ".join(f"Supreme Court NJDG {scope} cases by {DIMENSION_NAMES[dimension]}{period}".split())
+
+    def describe(self, filters):
+        """Plain-text summary of the matching rows, used as model context."""
+        if filters.get("dimension") == "institution-vs-disposal" and "measure" not in filters:
+            scope = {k: v for k, v in filters.items() if k in ("registration", "case_class")}
+            rows = {}
+            groups = self.aggregate(by=("label", "measure"), dimension="institution-vs-disposal", **scope)
+            for (label, measure), total in groups:
+                rows.setdefault(label, {})[measure] = total
+            if not rows:
+                return None
+            lines = [f"{self.heading(scope | {'dimension': 'institution-vs-disposal'})}:"]
+            lines += [
+                f"{label}: Institution {counts.get('institution', 0)}, Disposal {counts.get('disposal', 0)}"
+                for label, counts in sorted(rows.items(), key=lambda item: _label_order(item[0]))
+            ]
+            return "\n".join(lines)
+        labels, values = self.series(**dict(filters, dimension=filters.get("dimension", "casetype")))
+        if not labels:
+            return None
+        lines = [f"{self.heading(filters)}:"]
+        lines += [f"{label}: {value}" for label, value in zip(labels, values)]
+        lines.append(f"Total: {sum(values)}")
+        return "\n".join(lines)
+
+
+def _label_order(label):
+    number = re.match(r"\D*(\d+)", label)
+    return (0, int(number.group(1))) if number else (1, label)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest Supreme Court NJDG dashboard CSVs.")
+    parser.add_argument("--input", default="../scrape data/Supreme Court NJDG", help="folder with the dashboards")
+    parser.add_argument("--output", default="data/njdg_stats.npz", help="columnar store to write")
+    args = parser.parse_args()
+    stats = NJDGStats.ingest(args.input)
+    stats.save(args.output)
+    print(f"Wrote {args.output}: {len(stats)} rows, years {stats.years()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import re
+
+import numpy as np
+
+from .retrieval import IndexBuilder
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+
+def split_passages(text, tokenizer, max_tokens=128):
+    """Greedily pack whole sentences into passages of at most max_tokens tokens.
+
+    Returns [(passage_text, token_ids)]. Sentences longer than the limit are cut
+    into token windows.
+    """
+    sentences = [s.strip() for s in _SENTENCE_RE.split(text) if s and s.strip()]
+    if not sentences:
+        return []
+    encoded = tokenizer([" " + s for s in sentences], add_special_tokens=False)["input_ids"]
+
+    passages = []
+    texts, ids = [], []
+    for sentence, sentence_ids in zip(sentences, encoded):
+        if len(sentence_ids) > max_tokens:
+            if ids:
+                passages.append((" ".join(texts), ids))
+                texts, ids = [], []
+            for start in range(0, len(sentence_ids), max_tokens):
+                window = sentence_ids[start:start + max_tokens]
+                passages.append((tokenizer.decode(window), window))
+            continue
+        if len(ids) + len(sentence_ids) > max_tokens:
+            passages.append((" ".join(texts), ids))
+            texts, ids = [], []
+        texts.append(sentence)
+        ids.extend(sentence_ids)
+    if ids:
+        passages.append((" ".join(texts), ids))
+    return passages
+
+
+class PassageBuilder:
+    """Splits and indexes records one at a time; build() freezes them into a PassageStore."""
+
+    def __init__(self, tokenizer, tokenizer_name, max_tokens=128):
+        self.tokenizer = tokenizer
+        self.tokenizer_name = tokenizer_name
+        self.max_tokens = max_tokens
+        self._index = IndexBuilder()
+        self._doc_offsets, self._token_offsets, self._tokens = [0], [0], []
+
+    def add(self, item):
+        metadata = item.get("metadata", {})
+        for passage_text, passage_ids in split_passages(item.get("text", ""), self.tokenizer, self.max_tokens):
+            self._index.add(metadata.get("title", ""), metadata.get("category", ""), passage_text)
+            self._tokens.extend(passage_ids)
+            self._token_offsets.append(len(self._tokens))
+        self._doc_offsets.append(len(self._token_offsets) - 1)
+
+    def build(self):
+        return PassageStore(
+            doc_offsets=np.asarray(self._doc_offsets, dtype=np.int64),
+            token_offsets=np.asarray(self._token_offsets, dtype=np.int64),
+            tokens=np.asarray(self._tokens, dtype=np.int32),
+            index=self._index.build(),
+            tokenizer_name=self.tokenizer_name,
+            max_tokens=self.max_tokens,
+        )
+
+
+class PassageStore:
+    """Token-bounded passages per record, their token IDs and a passage-level index.
+
+    Passages are stored in record order, so record i owns the contiguous range
+    doc_offsets[i]:doc_offsets[i + 1].
+    """
+
+    def __init__(self, doc_offsets, token_offsets, tokens, index, tokenizer_name, max_tokens):
+        self.doc_offsets = doc_offsets
+        self.token_offsets = token_offsets
+        self.tokens = tokens
+        self.index = index
+        self.tokenizer_name = tokenizer_name
+        self.max_tokens = max_tokens
+
+    @classmethod
+    def build(cls, records, tokenizer, tokenizer_name, max_tokens=128):
+        builder = PassageBuilder(tokenizer, tokenizer_name, max_tokens)
+        for item in records:
+            builder.add(item)
+        return builder.build()
+
+    def __len__(self):
+        return len(self.token_offsets) - 1
+
+    def token_ids(self, passage_id):
+        return self.tokens[self.token_offsets[passage_id]:self.token_offsets[passage_id + 1]]
+
+    def select(self, prompt, doc_ids, budget, separator_ids=()):
+        """Pick the best passages of doc_ids for prompt and pack them into budget tokens.
+
+        Passages are chosen by passage-level BM25F score, then emitted in their
+        original document order so the context reads naturally.
+        """
+        allowed = np.concatenate(
+            [np.arange(self.doc_offsets[d], self.doc_offsets[d + 1]) for d in doc_ids]
+        ) if len(doc_ids) else np.zeros(0, np.int64)
+        if not len(allowed):
+            return []
+        ranked = [pid for pid, _ in self.index.search(prompt, k=len(allowed), allowed=allowed)]
+        # Passages with no query terms follow in document order to fill leftover budget
+        seen = set(ranked)
+        ranked += [int(pid) for pid in allowed if pid not in seen]
+
+        chosen, used = [], 0
+        for pid in ranked:
+            size = int(self.token_offsets[pid + 1] - self.token_offsets[pid]) + len(separator_ids)
+            if used + size > budget:
+                continue
+            chosen.append(pid)
+            used += size
+        ids = []
+        for pid in sorted(chosen):
+            ids.extend(self.token_ids(pid).tolist())
+            ids.extend(separator_ids)
+        return ids
+
+    def sections(self):
+        return {
+            "passage_doc_offsets": self.doc_offsets,
+            "passage_token_offsets": self.token_offsets,
+            "passage_tokens": self.tokens,
+        }
+
+    def info(self):
+        return {"tokenizer": self.tokenizer_name, "max_tokens": self.max_tokens, "count": len(self)}
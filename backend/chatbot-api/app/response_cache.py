@@ -0,0 +1,145 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .dedup import MinHasher, shingles
+from .retrieval import normalize
+
+
+def context_digest(context):
+    """Stable digest of retrieved context, either packed token IDs or text."""
+    if isinstance(context, str):
+        data = context.encode("utf-8")
+    else:
+        data = np.asarray(context, dtype=np.int64).tobytes()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("group", "signature", "value", "size", "expires_at")
+
+    def __init__(self, group, signature, value, size, expires_at):
+        self.group = group
+        self.signature = signature
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """LRU + TTL cache of generated answers, bounded by entry count and bytes.
+
+    Keys are (normalized prompt, context digest, feedback). With near_threshold
+    set, a miss falls back to prompts with the same context and feedback whose
+    MinHash signature agrees on at least that fraction of slots. Entries are
+    dropped wholesale whenever set_version sees a new data version.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=16 << 20, ttl_seconds=3600.0, near_threshold=0.0,
+                 shingle_size=3, num_perm=64):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.near_threshold = near_threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm) if near_threshold > 0 else None
+        self.version = None
+        self._entries = OrderedDict()
+        self._groups = {}  # (context digest, feedback) -> keys, for near-duplicate lookup
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "near_hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def key(self, prompt, context, feedback=None):
+        return normalize(prompt), context_digest(context), feedback or ""
+
+    def set_version(self, version):
+        """Clear everything if the data the answers were built from has changed."""
+        with self._lock:
+            if version == self.version:
+                return
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self.version = version
+            self._entries.clear()
+            self._groups.clear()
+            self._bytes = 0
+
+    def _signature(self, prompt):
+        return self.hasher.signature(shingles(prompt, self.shingle_size))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        group = self._groups.get(entry.group)
+        if group is not None:
+            group.discard(key)
+            if not group:
+                del self._groups[entry.group]
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            self._stats["expirations"] += 1
+            return None
+        return entry
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry.value
+
+            if self.hasher is not None:
+                signature = self._signature(key[0])
+                best_key, best = None, self.near_threshold
+                for candidate in list(self._groups.get(key[1:], ())):
+                    entry = self._live(candidate, now)
+                    if entry is None:
+                        continue
+                    similarity = float(np.mean(entry.signature == signature))
+                    if similarity >= best:
+                        best_key, best = candidate, similarity
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self._stats["near_hits"] += 1
+                    return self._entries[best_key].value
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        size = len(key[0]) + len(str(value).encode("utf-8")) + 128  # rough per-entry overhead
+        if size > self.max_bytes:
+            return
+        signature = self._signature(key[0]) if self.hasher is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            group = key[1:]
+            self._entries[key] = _Entry(group, signature, value, size, time.monotonic() + self.ttl_seconds)
+            self._groups.setdefault(group, set()).add(key)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+        lookups = stats["hits"] + stats["near_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["near_hits"]) / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["max_bytes"] = self.max_bytes
+        stats["ttl_seconds"] = self.ttl_seconds
+        stats["near_threshold"] = self.near_threshold
+        return stats
@@ -0,0 +1,240 @@
+import hashlib
+import math
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+import numpy as np
+
+# Fields indexed per record and their BM25F weights. "ngram" holds character
+# trigrams of the title and category so misspelled queries still find them.
+FIELDS = ("title", "category", "text", "ngram")
+FIELD_WEIGHTS = (3.0, 2.0, 1.0, 0.5)
+FIELD_B = (0.5, 0.5, 0.75, 0.5)
+K1 = 1.2
+NGRAM_SIZE = 3
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in is it me of on or the this to "
+    "what when where which who why with you your can do does my about tell".split()
+)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+def tokenize(text):
+    return [tok for tok in _TOKEN_RE.findall(normalize(text)) if tok not in STOPWORDS]
+
+
+def char_ngrams(tokens, n=NGRAM_SIZE):
+    grams = []
+    for tok in tokens:
+        padded = f"#{tok}#"
+        grams.extend("~" + padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+def analyze_query(prompt):
+    tokens = tokenize(prompt)
+    return list(dict.fromkeys(tokens + char_ngrams(tokens)))
+
+
+def term_hash(term):
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HashedVocab:
+    """Term -> id lookup kept in two sorted uint64 arrays.
+
+    Unlike a dict this needs no per-process Python objects, so it can be read
+    straight out of a memory-mapped corpus artifact and shared by workers.
+    """
+
+    def __init__(self, hashes, ids):
+        self.hashes = hashes
+        self.ids = ids
+
+    @classmethod
+    def from_terms(cls, terms):
+        hashes = np.fromiter((term_hash(term) for term in terms), dtype=np.uint64, count=len(terms))
+        order = np.argsort(hashes, kind="stable")
+        hashes = hashes[order]
+        if len(hashes) > 1 and np.any(hashes[1:] == hashes[:-1]):
+            raise ValueError("64-bit term hash collision while building vocabulary")
+        return cls(hashes, order.astype(np.int64))
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def lookup(self, terms):
+        if not terms or not len(self.hashes):
+            return [None] * len(terms)
+        wanted = np.fromiter((term_hash(term) for term in terms), dtype=np.uint64, count=len(terms))
+        pos = np.minimum(np.searchsorted(self.hashes, wanted), len(self.hashes) - 1)
+        found = self.hashes[pos] == wanted
+        return [int(self.ids[p]) if hit else None for p, hit in zip(pos, found)]
+
+    def get(self, term, default=None):
+        term_id = self.lookup([term])[0]
+        return default if term_id is None else term_id
+
+
+class IndexBuilder:
+    """Accumulates records one at a time and freezes them into a RetrievalIndex."""
+
+    def __init__(self, max_df_ratio=0.6):
+        self.max_df_ratio = max_df_ratio
+        self._postings = {}  # term -> list of (doc_id, field_idx, tf)
+        self._lengths = [[] for _ in FIELDS]
+        self._titles = []
+        self._categories = []
+
+    def add(self, title, category, text):
+        doc_id = len(self._titles)
+        title_tokens = tokenize(title)
+        category_tokens = tokenize(category)
+        field_tokens = (
+            title_tokens,
+            category_tokens,
+            tokenize(text),
+            char_ngrams(title_tokens + category_tokens),
+        )
+        for field_idx, tokens in enumerate(field_tokens):
+            self._lengths[field_idx].append(len(tokens))
+            counts = {}
+            for tok in tokens:
+                counts[tok] = counts.get(tok, 0) + 1
+            for tok, tf in counts.items():
+                self._postings.setdefault(tok, []).append((doc_id, field_idx, tf))
+        self._titles.append(normalize(title))
+        self._categories.append(normalize(category))
+        return doc_id
+
+    def build(self):
+        n_docs = len(self._titles)
+        lengths = [np.asarray(col, dtype=np.float32) for col in self._lengths]
+        avg = [float(col.mean()) if n_docs and col.mean() > 0 else 1.0 for col in lengths]
+        norms = [
+            (1.0 - FIELD_B[f]) + FIELD_B[f] * lengths[f] / avg[f] if n_docs else lengths[f]
+            for f in range(len(FIELDS))
+        ]
+
+        terms = []
+        offsets = [0]
+        doc_chunks = []
+        weight_chunks = []
+        max_df = max(1, int(self.max_df_ratio * n_docs)) if n_docs > 20 else n_docs
+        for term in sorted(self._postings):
+            entries = self._postings[term]
+            pseudo_tf = {}
+            for doc_id, field_idx, tf in entries:
+                pseudo_tf[doc_id] = pseudo_tf.get(doc_id, 0.0) + (
+                    FIELD_WEIGHTS[field_idx] * tf / norms[field_idx][doc_id]
+                )
+            df = len(pseudo_tf)
+            # Terms present in most records carry no signal and only cost time.
+            if df > max_df:
+                continue
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            docs = np.fromiter(pseudo_tf.keys(), dtype=np.int32, count=df)
+            tfs = np.fromiter(pseudo_tf.values(), dtype=np.float32, count=df)
+            impacts = (idf * tfs * (K1 + 1.0) / (tfs + K1)).astype(np.float32)
+            # Impact-ordered postings: the strongest documents for a term come first,
+            # so queries can stop early on very long lists.
+            order = np.argsort(-impacts, kind="stable")
+            terms.append(term)
+            doc_chunks.append(docs[order])
+            weight_chunks.append(impacts[order])
+            offsets.append(offsets[-1] + df)
+
+        return RetrievalIndex(
+            vocab=HashedVocab.from_terms(terms),
+            offsets=np.asarray(offsets, dtype=np.int64),
+            postings=np.concatenate(doc_chunks) if doc_chunks else np.zeros(0, np.int32),
+            weights=np.concatenate(weight_chunks) if weight_chunks else np.zeros(0, np.float32),
+            titles=self._titles,
+            categories=self._categories,
+        )
+
+
+class RetrievalIndex:
+    """BM25F inverted index stored as flat CSR arrays (term -> doc ids, weights).
+
+    Weights are precomputed impacts sorted high to low within each term, so a
+    query is a sum over the head of a few posting slices.
+    """
+
+    # Longest prefix of a posting list read per query term
+    max_postings = 1024
+
+    def __init__(self, vocab, offsets, postings, weights, titles, categories, n_docs=None):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.postings = postings
+        self.weights = weights
+        self.titles = titles
+        self.categories = categories
+        self.n_docs = len(titles) if n_docs is None else n_docs
+        # Postings are impact-ordered, so each term's first weight is its maximum
+        self.max_impact = np.asarray(weights[offsets[:-1]] if len(vocab) else [], dtype=np.float32)
+        # Stand-in for unseen query terms so they still count against confidence.
+        self.oov_impact = float(self.max_impact.mean()) if len(self.max_impact) else 1.0
+
+    def search(self, prompt, k=10, allowed=None):
+        """Return up to k (doc_id, confidence) pairs, best first.
+
+        Confidence is the BM25F score divided by the best score the query terms
+        could reach, so it lies in [0, 1] and is comparable across queries.
+        ``allowed`` optionally restricts results to the given doc ids.
+        """
+        term_ids = self.vocab.lookup(analyze_query(prompt))
+        known = [t for t in term_ids if t is not None]
+        if not known or not self.n_docs:
+            return []
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for t in known:
+            start = self.offsets[t]
+            end = min(self.offsets[t + 1], start + self.max_postings)
+            scores[self.postings[start:end]] += self.weights[start:end]
+        if allowed is not None:
+            mask = np.zeros(self.n_docs, dtype=bool)
+            mask[allowed] = True
+            scores[~mask] = 0.0
+        ideal = float(self.max_impact[known].sum()) + self.oov_impact * (len(term_ids) - len(known))
+
+        k = min(k, self.n_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(doc), float(scores[doc]) / ideal) for doc in top if scores[doc] > 0]
+
+    def best_match(self, prompt, threshold=0.6, k=50):
+        """Compatibility mode: the old "best title/category ratio above threshold" rule.
+
+        The ratio is only evaluated on the index's top-k candidates instead of
+        on every record.
+        """
+        prompt = normalize(prompt)
+        best_doc, best_score = None, 0.0
+        for doc_id, _ in self.search(prompt, k=k):
+            score = max(
+                SequenceMatcher(None, prompt, self.titles[doc_id]).ratio(),
+                SequenceMatcher(None, prompt, self.categories[doc_id]).ratio(),
+            )
+            if score >= threshold and score > best_score:
+                best_doc, best_score = doc_id, score
+        return (best_doc, best_score) if best_doc is not None else None
+
+
+def build_index(records, max_df_ratio=0.6):
+    builder = IndexBuilder(max_df_ratio=max_df_ratio)
+    for item in records:
+        metadata = item.get("metadata", {})
+        builder.add(metadata.get("title", ""), metadata.get("category", ""), item.get("text", ""))
+    return builder.build()
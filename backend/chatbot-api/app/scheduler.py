@@ -0,0 +1,218 @@
+import asyncio
+import contextlib
+import logging
+import queue
+import threading
+import time
+
+import torch
+
+
+class _Pending:
+    __slots__ = ("input_ids", "sampling", "future", "loop", "enqueued_at")
+
+    def __init__(self, input_ids, sampling, future, loop):
+        self.input_ids = input_ids
+        self.sampling = sampling
+        self.future = future
+        self.loop = loop
+        self.enqueued_at = time.perf_counter()
+
+
+def _resolve(future, result=None, error=None):
+    if future.done():  # cancelled by a disconnected client, or already failed
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class GenerationScheduler:
+    """Groups concurrent generation requests into padded batches on one worker thread.
+
+    Requests wait at most max_wait_ms for company; requests with different
+    sampling parameters never share a batch. model.generate runs off the event
+    loop, so the API keeps serving while the CPU is busy.
+
+    Streamed answers need a model.generate of their own, so they are admitted
+    through stream_slot(): at most max_streams (by default max_batch_size) run
+    at once and the rest wait their turn.
+    """
+
+    def __init__(self, model, pad_token_id, max_batch_size=8, max_wait_ms=20, max_streams=None, **generate_kwargs):
+        self.model = model
+        self.pad_token_id = pad_token_id
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_streams = max_streams or max_batch_size
+        self._stream_slots = asyncio.Semaphore(self.max_streams)
+        self.generate_kwargs = generate_kwargs
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "batch_size_histogram": {},
+            "queue_wait_seconds": 0.0,
+            "generate_seconds": 0.0,
+            "failed_requests": 0,
+            "streams": 0,
+            "streams_active": 0,
+            "streams_waiting": 0,
+            "stream_wait_seconds": 0.0,
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="generation-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    async def submit(self, input_ids, **sampling):
+        """Queue one prompt (a list of token ids) and await its full output ids."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(_Pending(list(input_ids), tuple(sorted(sampling.items())), future, loop))
+        return await future
+
+    @contextlib.asynccontextmanager
+    async def stream_slot(self):
+        """Hold one of the max_streams streaming slots for the duration of the block."""
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self._stats["streams_waiting"] += 1
+        try:
+            await self._stream_slots.acquire()
+        finally:
+            with self._lock:
+                self._stats["streams_waiting"] -= 1
+        with self._lock:
+            self._stats["streams"] += 1
+            self._stats["streams_active"] += 1
+            self._stats["stream_wait_seconds"] += time.perf_counter() - enqueued_at
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stats["streams_active"] -= 1
+            self._stream_slots.release()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # let _run see the stop signal after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            try:
+                batch = self._collect(first)
+                groups = {}
+                for item in batch:
+                    groups.setdefault(item.sampling, []).append(item)
+                for sampling, items in groups.items():
+                    self._generate(items, dict(sampling))
+            except Exception as e:
+                # Never let one batch take the worker down; fail whatever it has not answered yet
+                logging.exception("Generation batch failed")
+                for item in batch:
+                    self._deliver(item, error=e)
+
+    def _deliver(self, item, result=None, error=None):
+        try:
+            item.loop.call_soon_threadsafe(_resolve, item.future, result, error)
+        except RuntimeError:
+            pass  # the requesting event loop has closed (shutdown); nobody is waiting
+
+    def _generate(self, items, sampling):
+        started = time.perf_counter()
+        try:
+            results = self._generate_batch(items, sampling, started)
+        except Exception as e:
+            logging.exception(f"Generation failed for a batch of {len(items)}")
+            with self._lock:
+                self._stats["failed_requests"] += len(items)
+            for item in items:
+                self._deliver(item, error=e)
+            return
+        for item, result in zip(items, results):
+            self._deliver(item, result)
+
+    def _generate_batch(self, items, sampling, started):
+        width = max(len(item.input_ids) for item in items)
+        # Decoder-only models continue from the right edge, so pad on the left
+        input_ids = torch.full((len(items), width), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(items), width), dtype=torch.long)
+        for row, item in enumerate(items):
+            input_ids[row, width - len(item.input_ids):] = torch.tensor(item.input_ids, dtype=torch.long)
+            attention_mask[row, width - len(item.input_ids):] = 1
+
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                pad_token_id=self.pad_token_id,
+                **self.generate_kwargs,
+                **sampling,
+            )
+
+        elapsed = time.perf_counter() - started
+        results = []
+        for row, item in enumerate(items):
+            generated = outputs[row, width:].tolist()
+            # Rows that finished early are padded to the batch's longest output
+            while generated and generated[-1] == self.pad_token_id:
+                generated.pop()
+            results.append({
+                "output_ids": item.input_ids + generated,
+                "new_tokens": len(generated),
+                "batch_size": len(items),
+                "queue_seconds": started - item.enqueued_at,
+                "generate_seconds": elapsed,
+            })
+
+        with self._lock:
+            stats = self._stats
+            stats["requests"] += len(items)
+            stats["batches"] += 1
+            histogram = stats["batch_size_histogram"]
+            histogram[len(items)] = histogram.get(len(items), 0) + 1
+            stats["queue_wait_seconds"] += sum(started - item.enqueued_at for item in items)
+            stats["generate_seconds"] += elapsed
+        return results
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats, batch_size_histogram=dict(self._stats["batch_size_histogram"]))
+        batches = stats["batches"] or 1
+        requests = stats["requests"] or 1
+        stats["mean_batch_size"] = stats["requests"] / batches
+        stats["batch_occupancy"] = stats["requests"] / (batches * self.max_batch_size)
+        stats["mean_queue_wait_seconds"] = stats["queue_wait_seconds"] / requests
+        stats["queue_depth"] = self._queue.qsize()
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000.0
+        stats["max_streams"] = self.max_streams
+        return stats
@@ -0,0 +1,64 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class StageMetrics:
+    """Per-stage latency histograms and event counters for the request pipeline."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = {
+                    "count": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "buckets": [0] * (len(self.buckets) + 1),
+                }
+            stats["count"] += 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["buckets"][bisect.bisect_left(self.buckets, seconds)] += 1
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def _quantile(self, stats, q):
+        """Upper bound of the bucket holding the q-th observation (the max for the last one)."""
+        target, seen = q * stats["count"], 0
+        for bound, count in zip(self.buckets, stats["buckets"]):
+            seen += count
+            if seen >= target:
+                return min(bound, stats["max_seconds"])
+        return stats["max_seconds"]
+
+    def metrics(self):
+        with self._lock:
+            stages = {name: dict(stats, buckets=list(stats["buckets"])) for name, stats in self._stages.items()}
+            counters = dict(self._counters)
+        for stats in stages.values():
+            stats["mean_seconds"] = stats["total_seconds"] / stats["count"]
+            stats["p50_seconds"] = self._quantile(stats, 0.5)
+            stats["p95_seconds"] = self._quantile(stats, 0.95)
+            stats["buckets"] = dict(zip([str(b) for b in self.buckets] + ["+Inf"], stats["buckets"]))
+        return {"stages": stages, "counters": counters}
@@ -0,0 +1,88 @@
+import asyncio
+import contextlib
+import json
+import threading
+import time
+
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+
+class _StopWhenCancelled(StoppingCriteria):
+    """Ends generation early once the client has gone away."""
+
+    def __init__(self, cancelled):
+        self.cancelled = cancelled
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.cancelled.is_set(), dtype=torch.bool)
+
+
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_generation(model, tokenizer, inputs, slot=None, **generate_kwargs):
+    """Run model.generate on a thread and yield SSE events as text is produced.
+
+    Emits one "token" event per decoded chunk and a final "done" event with
+    time-to-first-token and decode throughput. If slot is given (an async
+    context manager such as GenerationScheduler.stream_slot()), the generation
+    thread only runs while it is held; time spent waiting counts toward
+    time-to-first-token.
+    """
+    loop = asyncio.get_running_loop()
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=None)
+    cancelled = threading.Event()
+    result = {}
+
+    def generate():
+        try:
+            with torch.inference_mode():
+                outputs = model.generate(
+                    **inputs,
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([_StopWhenCancelled(cancelled)]),
+                    **generate_kwargs,
+                )
+            result["new_tokens"] = outputs.shape[1] - inputs["input_ids"].shape[1]
+        except Exception as e:
+            result["error"] = e
+            streamer.end()
+
+    started = time.perf_counter()
+    first_token_at = None
+    async with slot or contextlib.nullcontext():
+        worker = threading.Thread(target=generate, name="stream-generate", daemon=True)
+        worker.start()
+        try:
+            while True:
+                # The streamer blocks on an internal queue, so read it off the event loop
+                chunk = await loop.run_in_executor(None, next, streamer, None)
+                if chunk is None:
+                    break
+                if not chunk:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield sse_event({"token": chunk}, event="token")
+        finally:
+            cancelled.set()
+            await loop.run_in_executor(None, worker.join)
+
+    finished = time.perf_counter()
+    if "error" in result:
+        yield sse_event({"error": str(result["error"])}, event="error")
+        return
+    new_tokens = int(result.get("new_tokens", 0))
+    decode_seconds = finished - (first_token_at or started)
+    yield sse_event(
+        {
+            "time_to_first_token": (first_token_at or finished) - started,
+            "tokens": new_tokens,
+            "tokens_per_second": new_tokens / decode_seconds if decode_seconds > 0 else 0.0,
+            "total_seconds": finished - started,
+        },
+        event="done",
+    )
@@ -0,0 +1,217 @@
+"""Tavily web search with one pooled HTTP client and a persistent result cache.
+
+A local stub stands in for the real API when exercising the network path offline:
+    python -m app.tavily --serve-stub 8765
+    python -m app.tavily --base-url http://127.0.0.1:8765 "what is tele-law"
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from .retrieval import normalize
+
+logger = logging.getLogger(__name__)
+
+TAVILY_BASE_URL = "https://api.tavily.com"
+
+
+class SearchCache:
+    """On-disk query -> result cache in SQLite, shared by workers and restarts."""
+
+    def __init__(self, path, ttl_seconds=86400.0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results (query TEXT PRIMARY KEY, result TEXT, created_at REAL)"
+        )
+
+    def get(self, query):
+        """Return (found, result); result may be None for a cached empty search."""
+        with self._lock:
+            row = self._db.execute("SELECT result, created_at FROM results WHERE query = ?", (query,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return False, None
+        return True, json.loads(row[0])
+
+    def put(self, query, result):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (query, result, created_at) VALUES (?, ?, ?)",
+                (query, json.dumps(result, ensure_ascii=False), time.time()),
+            )
+
+    def purge(self):
+        with self._lock:
+            self._db.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class TavilyClient:
+    """Long-lived pooled client with explicit timeouts and bounded concurrency.
+
+    start() must run on the event loop that will use the client (app startup).
+    Network errors, timeouts and unreadable responses return None, like an empty
+    search, and are not cached. Cache lookups run on a worker thread so SQLite
+    never blocks the event loop.
+    """
+
+    def __init__(self, api_key, base_url=TAVILY_BASE_URL, connect_timeout=3.0, read_timeout=10.0,
+                 max_concurrency=8, cache=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self._client = None
+        self._semaphore = None
+        # errors counts connection failures; bad_status and bad_responses are answers we could not use
+        self._stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "bad_status": 0,
+            "bad_responses": 0,
+            "request_seconds": 0.0,
+        }
+
+    def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+                headers={"Authorization": self.api_key},
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            if self.cache is not None:
+                self.cache.purge()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.cache is not None:
+            self.cache.close()
+
+    async def search(self, prompt):
+        """Content of the top search result for prompt, or None."""
+        query = normalize(prompt)
+        if self.cache is not None:
+            found, result = await asyncio.to_thread(self.cache.get, query)
+            if found:
+                self._stats["cache_hits"] += 1
+                return result
+
+        self.start()
+        start = time.perf_counter()
+        try:
+            async with self._semaphore:
+                response = await self._client.post("/search", json={"query": prompt})
+        except httpx.TimeoutException as e:
+            self._stats["timeouts"] += 1
+            logger.warning(f"Tavily search timed out: {e!r}")
+            return None
+        except httpx.HTTPError as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Tavily search failed: {e!r}")
+            return None
+        finally:
+            self._stats["requests"] += 1
+            self._stats["request_seconds"] += time.perf_counter() - start
+
+        if response.status_code != 200:
+            self._stats["bad_status"] += 1
+            logger.warning(f"Tavily search returned HTTP {response.status_code}")
+            return None
+        try:
+            data = response.json()
+        except ValueError as e:
+            self._stats["bad_responses"] += 1
+            logger.warning(f"Tavily search returned invalid JSON: {e!r}")
+            return None
+        results = data.get('results') if isinstance(data, dict) else None
+        result = results[0].get('content', None) if results and isinstance(results[0], dict) else None
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, query, result)
+        return result
+
+    def metrics(self):
+        stats = dict(self._stats)
+        stats["mean_request_seconds"] = stats["request_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        stats["max_concurrency"] = self.max_concurrency
+        return stats
+
+
+def serve_stub(port, delay=0.0):
+    """Minimal stand-in for the Tavily /search endpoint that echoes the query."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(delay)
+            payload = json.dumps(
+                {"results": [{"title": "stub", "content": f"Stub result for: {body.get('query', '')}"}]}
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"Tavily stub listening on http://127.0.0.1:{port}")
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query Tavily (or a local stub) through TavilyClient.")
+    parser.add_argument("query", nargs="*", help="search query")
+    parser.add_argument("--base-url", default=os.getenv("TAVILY_BASE_URL", TAVILY_BASE_URL))
+    parser.add_argument("--api-key", default=os.getenv("TAVILY_API_KEY", ""))
+    parser.add_argument("--cache", help="SQLite cache file")
+    parser.add_argument("--serve-stub", type=int, metavar="PORT", help="run a local stub server instead")
+    parser.add_argument("--stub-delay", type=float, default=0.0, help="seconds the stub waits per request")
+    args = parser.parse_args()
+    if args.serve_stub:
+        serve_stub(args.serve_stub, args.stub_delay)
+        return
+
+    async def run():
+        client = TavilyClient(args.api_key, args.base_url, cache=SearchCache(args.cache) if args.cache else None)
+        try:
+            for _ in range(2):
+                start = time.perf_counter()
+                result = await client.search(" ".join(args.query))
+                print(f"{time.perf_counter() - start:.3f}s: {result}")
+            print(client.metrics())
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from app.njdg import NJDGStats
+
+STATS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "njdg_stats.npz")
+
+
+@pytest.fixture(scope="module")
+def stats():
+    return NJDGStats.load(STATS_PATH)
+
+
+@pytest.mark.parametrize("prompt", [
+    "what is the retirement age of supreme court judges",
+    "how do i check if my case is pending in the supreme court",
+    "what are the stages of a criminal trial in supreme court",
+])
+def test_questions_without_statistics_intent_are_not_routed(stats, prompt):
+    assert stats.parse_query(prompt) is None
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("how many civil cases are pending in the supreme court", {"status": "pending", "case_class": "civil"}),
+    ("show a chart of pending supreme court cases by age", {"status": "pending", "dimension": "age"}),
+    ("njdg disposed criminal cases by stage in 2023",
+     {"status": "disposed", "case_class": "criminal", "dimension": "stage", "year": [2023]}),
+])
+def test_statistics_questions_are_parsed(stats, prompt, expected):
+    assert stats.parse_query(prompt) == expected
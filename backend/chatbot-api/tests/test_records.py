@@ -0,0 +1,26 @@
+import gzip
+import importlib.util
+import os
+
+from app import records
+
+SCRAPE_RECORDS = os.path.join(os.path.dirname(__file__), "..", "..", "scrape data", "records.py")
+
+
+def test_reader_copy_matches_the_scrape_data_original():
+    spec = importlib.util.spec_from_file_location("scrape_records", SCRAPE_RECORDS)
+    original = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(original)
+    with open(records.__file__, "r", encoding="utf-8") as f:
+        copy = f.read()
+    assert copy == original.reader_copy(), "run `python records.py --sync-copies` in backend/scrape data"
+
+
+def test_truncated_gzip_tail_keeps_earlier_records(tmp_path):
+    path = str(tmp_path / "pages.jsonl.gz")
+    data = gzip.compress(b"".join(b'{"i": %d}\n' % i for i in range(50)))
+    with open(path, "wb") as f:
+        f.write(data[:-12])  # drop the trailer and the end of the stream
+    read = list(records.iter_records(path))
+    assert read == [{"i": i} for i in range(len(read))]
+    assert read
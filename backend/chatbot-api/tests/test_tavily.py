@@ -0,0 +1,47 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.tavily import TavilyClient
+
+
+def search_with(handler):
+    client = TavilyClient("key", base_url="http://tavily.test")
+    client.start()
+    client._client = httpx.AsyncClient(base_url="http://tavily.test", transport=httpx.MockTransport(handler))
+
+    async def run():
+        try:
+            return await client.search("what is tele-law")
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run()), client.metrics()
+
+
+def raise_timeout(request):
+    raise httpx.ReadTimeout("slow", request=request)
+
+
+def raise_connect_error(request):
+    raise httpx.ConnectError("refused", request=request)
+
+
+@pytest.mark.parametrize("handler, counter", [
+    (raise_timeout, "timeouts"),
+    (raise_connect_error, "errors"),
+    (lambda request: httpx.Response(502, text="bad gateway"), "bad_status"),
+    (lambda request: httpx.Response(200, text="<html>maintenance</html>"), "bad_responses"),
+])
+def test_failed_searches_return_none_and_are_counted(handler, counter):
+    result, metrics = search_with(handler)
+    assert result is None
+    assert metrics[counter] == 1
+    assert metrics["requests"] == 1
+
+
+def test_search_returns_the_top_result():
+    result, metrics = search_with(lambda request: httpx.Response(200, json={"results": [{"content": "Tele-Law"}]}))
+    assert result == "Tele-Law"
+    assert metrics["errors"] == metrics["bad_responses"] == 0
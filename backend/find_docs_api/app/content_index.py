@@ -0,0 +1,345 @@
+"""Full-text index over the contents of the LegalDocs templates.
+
+Templates (RTF, DOCX, PDF) are converted to plain text in a process pool and
+indexed with positional postings, so quoted phrases can be matched. Each save
+writes a new build directory holding documents.json (keys, file mtimes/sizes/
+hashes and the text used for snippets) and postings.npz (a (term, doc, position)
+table sorted by term), then atomically points the CURRENT file at it, so a
+reader always gets both files of one build. Rebuilding only extracts files whose mtime/size changed and whose content hash
+differs; postings of unchanged documents are kept as they are.
+
+Usage:
+    python -m app.content_index --input "../scrape data/LegalDocs" --output data/content_index
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+EXTENSIONS = (".rtf", ".docx", ".pdf")
+BM25_K1 = 1.2
+BM25_B = 0.75
+PHRASE_BOOST = 2.0
+# Names the build directory in use; the only file a save replaces in place
+CURRENT = "CURRENT"
+KEEP_BUILDS = 2  # the current build and the one a slow reader may still be loading
+
+# Devanagari vowel signs are not \w, so the whole block is included to keep Hindi words intact
+_TOKEN_RE = re.compile(r"[\w\u0900-\u097F]+")
+_QUERY_RE = re.compile(r'"([^"]+)"|(\S+)')
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def tokenize(text):
+    return [match.group().lower() for match in _TOKEN_RE.finditer(text)]
+
+
+def _rtf_text(path):
+    from striprtf.striprtf import rtf_to_text
+
+    with open(path, "r", encoding="latin-1") as f:
+        return rtf_to_text(f.read(), errors="ignore")
+
+
+def _docx_text(path):
+    with zipfile.ZipFile(path) as archive:
+        root = ET.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(f"{_W}p"):
+        paragraphs.append("".join(node.text or "" for node in paragraph.iter(f"{_W}t")))
+    return "\n".join(paragraphs)
+
+
+def _pdf_text(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        print(f"pypdf is not installed, skipping the text of {path}")
+        return ""
+    return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+
+
+def extract_text(path):
+    """Plain text of one template; runs in a worker process."""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == ".rtf":
+            text = _rtf_text(path)
+        elif extension == ".docx":
+            text = _docx_text(path)
+        else:
+            text = _pdf_text(path)
+    except Exception as e:
+        print(f"Could not extract {path}: {e!r}")
+        text = ""
+    return " ".join(text.split())
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan(root):
+    """{key: (path, mtime_ns, size)} for every template; keys look like LegalDocs/<folder>/<file>."""
+    base = os.path.dirname(os.path.abspath(root))
+    found = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.lower().endswith(EXTENSIONS):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                key = os.path.relpath(path, base).replace(os.sep, "/")
+                found[key] = (path, stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+class ContentIndex:
+    """Documents plus a positional postings table sorted by (term, doc, position)."""
+
+    def __init__(self, documents=None, vocab=None, terms=None, docs=None, positions=None):
+        self.documents = documents or []
+        self.vocab = vocab or []
+        self.terms = terms if terms is not None else np.zeros(0, dtype=np.int32)
+        self.docs = docs if docs is not None else np.zeros(0, dtype=np.int32)
+        self.positions = positions if positions is not None else np.zeros(0, dtype=np.int32)
+        self._finalize()
+
+    def _finalize(self):
+        self.term_ids = {term: i for i, term in enumerate(self.vocab)}
+        self.term_offsets = np.searchsorted(self.terms, np.arange(len(self.vocab) + 1))
+        self.doc_lengths = np.asarray([doc["n_tokens"] for doc in self.documents], dtype=np.float64)
+        self.avg_length = float(self.doc_lengths.mean()) if len(self.doc_lengths) else 0.0
+        self.keys = {doc["key"]: i for i, doc in enumerate(self.documents)}
+
+    def __len__(self):
+        return len(self.documents)
+
+    # Building and incremental updates
+
+    def _postings_for(self, doc_id, text):
+        tokens = tokenize(text)
+        ids = np.fromiter((self.term_ids.setdefault(tok, len(self.term_ids)) for tok in tokens),
+                          dtype=np.int32, count=len(tokens))
+        return ids, np.full(len(tokens), doc_id, dtype=np.int32), np.arange(len(tokens), dtype=np.int32)
+
+    def update(self, root, workers=None):
+        """Bring the index in line with the files under root; returns counts of what changed."""
+        found = scan(root)
+        keep, extract, touched, removed = [], [], 0, 0
+        for doc in self.documents:
+            current = found.get(doc["key"])
+            if current is None:
+                removed += 1
+                continue
+            path, mtime_ns, size = current
+            if (mtime_ns, size) == (doc["mtime_ns"], doc["size"]):
+                keep.append(doc)
+                continue
+            sha256 = file_sha256(path)
+            if sha256 == doc["sha256"]:
+                keep.append(dict(doc, mtime_ns=mtime_ns, size=size))  # touched, same content
+                touched += 1
+            else:
+                extract.append(doc["key"])
+        changed = len(extract)
+        extract += sorted(set(found) - set(self.keys))
+
+        # Drop postings of documents that are gone or changed and renumber the rest
+        remap = np.full(len(self.documents) + 1, -1, dtype=np.int32)
+        for new_id, doc in enumerate(keep):
+            remap[self.keys[doc["key"]]] = new_id
+        mapped = remap[self.docs] if len(self.docs) else self.docs
+        alive = mapped >= 0
+        terms, docs, positions = [self.terms[alive]], [mapped[alive]], [self.positions[alive]]
+
+        paths = [found[key][0] for key in extract]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            texts = list(pool.map(extract_text, paths, chunksize=8)) if paths else []
+
+        self.term_ids = {term: i for i, term in enumerate(self.vocab)}
+        documents = list(keep)
+        for key, path, text in zip(extract, paths, texts):
+            doc_terms, doc_ids, doc_positions = self._postings_for(len(documents), text)
+            terms.append(doc_terms)
+            docs.append(doc_ids)
+            positions.append(doc_positions)
+            _, mtime_ns, size = found[key]
+            documents.append({
+                "key": key,
+                "mtime_ns": mtime_ns,
+                "size": size,
+                "sha256": file_sha256(path),
+                "n_tokens": len(doc_terms),
+                "text": text,
+            })
+
+        terms, docs, positions = np.concatenate(terms), np.concatenate(docs), np.concatenate(positions)
+        order = np.lexsort((positions, docs, terms))
+        self.documents = documents
+        self.vocab = list(self.term_ids)
+        self.terms, self.docs, self.positions = terms[order], docs[order], positions[order]
+        self._finalize()
+        return {
+            "added": len(extract) - changed,
+            "changed": changed,
+            "removed": removed,
+            "touched": touched,
+            "documents": len(documents),
+        }
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        build = f"build-{time.time_ns()}-{os.getpid()}"
+        os.makedirs(os.path.join(directory, build))
+        with open(os.path.join(directory, build, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump(self.documents, f, ensure_ascii=False)
+        np.savez(
+            os.path.join(directory, build, "postings.npz"),
+            vocab=np.asarray(self.vocab, dtype=str),
+            terms=self.terms,
+            docs=self.docs,
+            positions=self.positions,
+        )
+        tmp = os.path.join(directory, f"{CURRENT}.tmp-{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(build)
+        os.replace(tmp, os.path.join(directory, CURRENT))
+        builds = sorted(name for name in os.listdir(directory) if name.startswith("build-"))
+        for name in builds[:-KEEP_BUILDS]:
+            if name == build:
+                continue
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    @staticmethod
+    def build_directory(directory):
+        """Directory holding the files of the current build, or None if nothing was saved yet."""
+        try:
+            with open(os.path.join(directory, CURRENT), "r", encoding="utf-8") as f:
+                return os.path.join(directory, f.read().strip())
+        except FileNotFoundError:
+            # Indexes saved before builds were versioned keep their files at the top level
+            return directory if os.path.exists(os.path.join(directory, "documents.json")) else None
+
+    @classmethod
+    def load(cls, directory):
+        build = cls.build_directory(directory)
+        if build is None:
+            return cls()
+        with open(os.path.join(build, "documents.json"), "r", encoding="utf-8") as f:
+            documents = json.load(f)
+        with np.load(os.path.join(build, "postings.npz"), allow_pickle=False) as data:
+            return cls(documents, data["vocab"].tolist(), data["terms"], data["docs"], data["positions"])
+
+    # Querying
+
+    def _postings(self, term):
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return self.docs[:0], self.positions[:0]
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        return self.docs[start:end], self.positions[start:end]
+
+    def _phrase(self, tokens):
+        """(doc ids, occurrences per doc, first start position per doc) for consecutive tokens."""
+        docs, positions = self._postings(tokens[0])
+        # Key each occurrence by (doc, position - offset) so later tokens line up with the first
+        keys = docs.astype(np.int64) << 32 | positions.astype(np.int64)
+        for offset, token in enumerate(tokens[1:], 1):
+            next_docs, next_positions = self._postings(token)
+            next_keys = next_docs.astype(np.int64) << 32 | (next_positions.astype(np.int64) - offset)
+            keys = keys[np.isin(keys, next_keys)]
+        match_docs = (keys >> 32).astype(np.int32)
+        unique, first, counts = np.unique(match_docs, return_index=True, return_counts=True)
+        return unique, counts, (keys[first] & 0xFFFFFFFF).astype(np.int32)
+
+    def search(self, query, max_results=10, snippet_tokens=20):
+        """Ranked [{key, score, snippet}]; quoted phrases must all occur, bare terms rank by BM25."""
+        phrases, terms = [], []
+        for phrase, word in _QUERY_RE.findall(query):
+            tokens = tokenize(phrase or word)
+            if phrase and len(tokens) > 1:
+                phrases.append(tokens)
+            else:
+                terms.extend(tokens)
+        if not len(self) or not (phrases or terms):
+            return []
+
+        n_docs = len(self)
+        scores = np.zeros(n_docs)
+        anchor = np.full(n_docs, -1, dtype=np.int64)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / (self.avg_length or 1.0))
+
+        def add(doc_ids, freqs, starts, boost=1.0):
+            if not len(doc_ids):
+                return
+            idf = math.log(1 + (n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            scores[doc_ids] += boost * idf * freqs * (BM25_K1 + 1) / (freqs + norm[doc_ids])
+            unset = anchor[doc_ids] < 0
+            anchor[doc_ids[unset]] = starts[unset]
+
+        required = np.ones(n_docs, dtype=bool)
+        for tokens in phrases:
+            doc_ids, freqs, starts = self._phrase(tokens)
+            present = np.zeros(n_docs, dtype=bool)
+            present[doc_ids] = True
+            required &= present
+            add(doc_ids, freqs, starts, PHRASE_BOOST)
+        for term in dict.fromkeys(terms):
+            docs, positions = self._postings(term)
+            doc_ids, first, freqs = np.unique(docs, return_index=True, return_counts=True)
+            add(doc_ids, freqs, positions[first])
+
+        scores[~required] = 0
+        ranked = [int(i) for i in np.argsort(-scores, kind="stable")[:max_results] if scores[i] > 0]
+        return [
+            {
+                "key": self.documents[i]["key"],
+                "score": round(float(scores[i]), 4),
+                "snippet": self.snippet(i, int(anchor[i]), snippet_tokens),
+            }
+            for i in ranked
+        ]
+
+    def snippet(self, doc_id, position, width=20):
+        """Text around token `position`, about width tokens either side."""
+        text = self.documents[doc_id]["text"]
+        spans = [match.span() for match in _TOKEN_RE.finditer(text)]
+        if not spans:
+            return ""
+        position = min(max(position, 0), len(spans) - 1)
+        start = spans[max(position - width, 0)][0]
+        end = spans[min(position + width, len(spans) - 1)][1]
+        return ("…" if start > 0 else "") + text[start:end] + ("…" if end < len(text) else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the LegalDocs full-text index.")
+    parser.add_argument("--input", default="../scrape data/LegalDocs", help="LegalDocs folder")
+    parser.add_argument("--output", default="data/content_index", help="index directory")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: CPU count)")
+    args = parser.parse_args()
+    start = time.time()
+    index = ContentIndex.load(args.output)
+    changes = index.update(args.input, workers=args.workers)
+    index.save(args.output)
+    print(
+        f"Updated {args.output} in {time.time() - start:.2f} seconds: {changes}, "
+        f"{len(index.vocab)} terms, {len(index.terms)} postings"
+    )
+
+
+if __name__ == "__main__":
+    main()
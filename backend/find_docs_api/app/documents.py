@@ -0,0 +1,25 @@
+"""Document metadata as the service sees it, shared by the API and the index CLIs."""
+from .records import iter_records
+
+
+def normalize_document(item):
+    return {
+        "filename": item.get("text"),
+        "tags": item.get("metadata", {}).get("title", "").split(", "),
+        "category": item.get("metadata", {}).get("category", "").lower(),
+    }
+
+
+def unique_documents(documents):
+    """Drops exact repeats of (filename, tags, category), e.g. from re-appended JSONL."""
+    seen = set()
+    for doc in documents:
+        key = (doc["filename"], tuple(doc["tags"]), doc["category"])
+        if key not in seen:
+            seen.add(key)
+            yield doc
+
+
+def read_metadata(path):
+    """Normalized, deduplicated documents of a JSON (or .jsonl[.gz|.zst]) metadata file."""
+    return list(unique_documents(normalize_document(item) for item in iter_records(path)))
@@ -2,10 +2,13 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict
-from difflib import SequenceMatcher
 import json
 import logging
-from itertools import tee, islice
+import os
+
+from .documents import read_metadata
+from .snapshot import SnapshotWatcher
+from .tag_index import TagIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,90 +33,49 @@ REGION_NAME = "ap-south-1"
 # Input model
 class QueryRequest(BaseModel):
     query: str
+    mode: str = "tags"  # "tags" matches titles/categories, "content" searches the template text
+    max_results: int = 2
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    max_results: int = 2
 
-# Load document metadata from the JSON file
+# Load document metadata from the JSON (or .jsonl[.gz|.zst]) file, record by record
 def load_metadata(json_file_path: str):
     try:
-        with open(json_file_path, "r", encoding="utf-8") as file:
-            data = json.load(file)
-        metadata = [
-            {
-                "filename": item.get("text"),
-                "tags": item.get("metadata", {}).get("title", "").split(", "),
-                "category": item.get("metadata", {}).get("category", "").lower(),
-            }
-            for item in data
-        ]
-        return metadata
+        return read_metadata(json_file_path)
     except FileNotFoundError:
         raise HTTPException(status_code=500, detail="Metadata JSON file not found.")
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Error parsing metadata JSON file.")
 
-# Load the metadata
-DOCUMENT_METADATA = load_metadata(JSON_FILE_PATH)
-
-# Helper function for n-grams
-def ngrams(words, n):
-    iterables = tee(words, n)
-    for i, it in enumerate(iterables):
-        next(islice(it, i, i), None)
-    return [" ".join(gram) for gram in zip(*iterables)]
-
-# Function to calculate match score
-def calculate_match_score(query_tokens, tags, category):
-    match_score = 0
-    matched_tags = []
-
-    # Combine unigrams, bigrams, and trigrams for query
-    bigrams = ngrams(query_tokens, 2)
-    trigrams = ngrams(query_tokens, 3)
-    all_query_terms = query_tokens + bigrams + trigrams
-
-    # Match against tags
-    for term in all_query_terms:
-        for tag in tags:
-            similarity = SequenceMatcher(None, term, tag.lower()).ratio()
-            if similarity > 0.9:  # Exact match
-                match_score += 5
-                matched_tags.append(tag)
-            elif similarity > 0.7:  # Close match
-                match_score += 3
-            elif similarity > 0.5:  # Fuzzy match
-                match_score += 1
-
-    # Match against category
-    if category:
-        for term in all_query_terms:
-            similarity = SequenceMatcher(None, term, category).ratio()
-            if similarity > 0.9:
-                match_score += 6  # Higher weight for category match
-            elif similarity > 0.7:
-                match_score += 4
-
-    return match_score, list(set(matched_tags))  # Return unique matched tags
+# Upper bound on queries per /get-documents/batch request
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "100"))
 
-# Function to find relevant documents
-def find_relevant_documents(query: str, metadata: List[Dict], threshold: float = 5.0, max_results: int = 2):
-    query_tokens = query.lower().split()
-    results = []
+# Full-text index of the template contents from `python -m app.content_index`; content
+# search is unavailable until it has been built
+CONTENT_INDEX_PATH = os.getenv("CONTENT_INDEX_PATH", "/code/data/content_index")
 
-    for doc in metadata:
-        tags = [tag.lower() for tag in doc["tags"]]
-        category = doc["category"].lower() if doc["category"] else ""
+# Metadata, tag index, autocomplete and content index live in one snapshot that is
+# rebuilt in the background when the metadata JSON or content index changes
+# (polled every METADATA_RELOAD_SECONDS, 0 disables). Handlers read DOCUMENTS.snapshot
+# once per request.
+METADATA_RELOAD_SECONDS = float(os.getenv("METADATA_RELOAD_SECONDS", "5"))
+DOCUMENTS = SnapshotWatcher(JSON_FILE_PATH, CONTENT_INDEX_PATH, load_metadata, interval=METADATA_RELOAD_SECONDS)
+logging.info(f"Documents: {DOCUMENTS.status()}")
 
-        match_score, matched_tags = calculate_match_score(query_tokens, tags, category)
+@app.on_event("startup")
+async def start_watcher():
+    DOCUMENTS.start()
 
-        if match_score >= threshold:
-            results.append({
-                "filename": doc["filename"],
-                "score": match_score,
-                "matched_tags": matched_tags,
-                "category": category,
-            })
+@app.on_event("shutdown")
+async def stop_watcher():
+    await DOCUMENTS.stop()
 
-    # Sort by score and number of matched tags
-    results = sorted(results, key=lambda x: (x["score"], len(x["matched_tags"])), reverse=True)[:max_results]
+# Function to find relevant documents
+def find_relevant_documents(query: str, metadata: List[Dict], threshold: float = 5.0, max_results: int = 2, index=None):
+    index = index if index is not None else TagIndex(metadata)
+    results = index.search(query, threshold=threshold, max_results=max_results)
 
     logging.info(f"Query: {query}")
     logging.info(f"Matching Results: {results}")
@@ -130,11 +92,54 @@ async def get_documents(request: QueryRequest):
     if not query:
         raise HTTPException(status_code=400, detail="Query string cannot be empty.")
 
+    snapshot = DOCUMENTS.snapshot
+    if request.mode == "content":
+        if not len(snapshot.content_index):
+            raise HTTPException(status_code=503, detail="Content index has not been built.")
+        results = snapshot.content_index.search(query, max_results=request.max_results)
+        if not results:
+            raise HTTPException(status_code=404, detail="No relevant documents found.")
+        return {
+            "documents": [generate_public_url(result["key"]) for result in results],
+            "results": [
+                {"document": generate_public_url(result["key"]), "score": result["score"], "snippet": result["snippet"]}
+                for result in results
+            ],
+        }
+
     # Find relevant documents
-    matches = find_relevant_documents(query, DOCUMENT_METADATA)
+    matches = find_relevant_documents(
+        query, snapshot.metadata, max_results=request.max_results, index=snapshot.index
+    )
     if not matches:
         raise HTTPException(status_code=404, detail="No relevant documents found.")
 
     # Generate public URLs for matching documents
     links = [generate_public_url(filename) for filename in matches]
     return {"documents": links}
+
+
+@app.post("/get-documents/batch")
+async def get_documents_batch(request: BatchQueryRequest):
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUERIES} queries per batch.")
+
+    # Queries are scored together so terms they share are matched once; an empty
+    # or unmatched query gets an empty list instead of failing the whole batch
+    queries = [query.strip() for query in request.queries]
+    batches = DOCUMENTS.snapshot.index.search_batch(queries, max_results=request.max_results)
+    logging.info(f"Batch of {len(queries)} queries")
+    return {
+        "results": [
+            {"query": query, "documents": [generate_public_url(result["filename"]) for result in results]}
+            for query, results in zip(queries, batches)
+        ]
+    }
+
+@app.get("/suggest")
+async def suggest(q: str, limit: int = 10):
+    return {"query": q, "suggestions": DOCUMENTS.snapshot.suggester.suggest(q, limit=min(limit, 50))}
+
+@app.get("/status")
+async def status():
+    return DOCUMENTS.status()
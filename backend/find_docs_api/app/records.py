@@ -0,0 +1,167 @@
+"""Streaming reader for scraped record files (JSON arrays or .jsonl[.gz|.zst]).
+
+Generated from backend/scrape data/records.py by `python records.py --sync-copies`;
+edit the original, not this copy. The service tests fail if the two drift.
+"""
+import json
+import logging
+import zlib
+
+try:
+    from zstandard import ZstdError as _ZstdError
+except ImportError:  # optional; only needed for .zst files
+    class _ZstdError(Exception):
+        pass
+
+
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+# Raised when a compressed file ends mid-member/frame or has data appended after such a tail
+TRUNCATED_ERRORS = (EOFError, zlib.error, _ZstdError)
+
+
+def is_jsonl(path):
+    return path.endswith(JSONL_SUFFIXES)
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd files need the zstandard package (pip install zstandard)")
+    return zstandard
+
+
+def _decompressor(path):
+    if path.endswith(".gz"):
+        return zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)  # one gzip member
+    return _zstd().ZstdDecompressor().decompressobj()  # one zstd frame
+
+
+def _salvage(path, member_start, offset, chunk):
+    """Output of chunk up to the byte where it stops decoding, replaying its member/frame from member_start."""
+    decompressor = _decompressor(path)
+    with open(path, "rb") as f:
+        f.seek(member_start)
+        remaining = offset - member_start
+        while remaining:
+            data = f.read(min(remaining, 1 << 16))
+            decompressor.decompress(data)  # already yielded
+            remaining -= len(data)
+    for i in range(len(chunk)):
+        try:
+            yield decompressor.decompress(chunk[i:i + 1])
+        except TRUNCATED_ERRORS:
+            return
+
+
+def _decompressed(path, chunk_size=1 << 16):
+    """Decompressed bytes of each gzip member / zstd frame in path, as they decode.
+
+    Raises EOFError if the last member/frame is cut short, and zlib.error or
+    ZstdError if the data stops decoding. Everything before that point has
+    already been yielded.
+    """
+    decompressor, pending = _decompressor(path), False
+    member_start = 0
+    with open(path, "rb") as f:
+        while True:
+            offset = f.tell()
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            while chunk:
+                try:
+                    output = decompressor.decompress(chunk)
+                except TRUNCATED_ERRORS as e:
+                    # The failed call drops what it decoded before the bad byte; recover that first
+                    yield from _salvage(path, member_start, offset, chunk)
+                    raise e
+                yield output
+                pending = not decompressor.eof
+                if pending:
+                    break
+                offset += len(chunk) - len(decompressor.unused_data)
+                member_start, chunk = offset, decompressor.unused_data
+                decompressor = _decompressor(path)
+    if pending:
+        raise EOFError("compressed data ends mid-stream")
+
+
+def _lines(path):
+    if not path.endswith((".gz", ".zst")):
+        with open(path, "rb") as f:
+            yield from f
+        return
+    tail = b""
+    try:
+        for data in _decompressed(path):
+            lines = (tail + data).split(b"\n")
+            tail = lines.pop()
+            yield from lines
+    except TRUNCATED_ERRORS as e:
+        logging.warning(f"{path}: stopped at a truncated compressed tail ({e!r})")
+    if tail:
+        yield tail
+
+
+def read_records(path):
+    """Yields the records of a .jsonl[.gz|.zst] file one at a time."""
+    for line_number, line in enumerate(_lines(path), 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            logging.warning(f"{path}:{line_number}: skipping a malformed record")
+
+
+def _iter_json_array(path, chunk_size=1 << 16):
+    """Items of a top-level JSON array decoded one at a time; any other document is yielded whole."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            document = json.loads(buffer + f.read())
+            yield from document if isinstance(document, list) else [document]
+            return
+        pos, eof, size = 1, False, chunk_size
+
+        def refill():
+            nonlocal buffer, pos, eof
+            more = f.read(size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    raise json.JSONDecodeError("Unterminated array", buffer, pos)
+                refill()
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                error = None
+            except json.JSONDecodeError as e:
+                end, error = None, e
+            if end is None or (end == len(buffer) and not eof):
+                # The item runs past the buffer (or may, for a bare number): read more and retry
+                if eof:
+                    raise error
+                size = min(size * 2, 1 << 26) if end is None else size
+                refill()
+                continue
+            size = chunk_size
+            pos = end
+            yield item
+
+
+def iter_records(path):
+    """Yields the records of path one at a time, for JSONL and plain .json arrays alike."""
+    if is_jsonl(path):
+        yield from read_records(path)
+        return
+    yield from _iter_json_array(path)
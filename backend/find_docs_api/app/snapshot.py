@@ -0,0 +1,188 @@
+"""Copy-on-write snapshots of the document indexes, reloaded when their files change.
+
+Requests read `watcher.snapshot` once and use that object throughout, so a reload
+never mixes old and new indexes inside one request. The watcher polls the
+metadata JSON and the content index's CURRENT pointer (replaced last by
+ContentIndex.save) and, once a changed file has been stable for one poll,
+rebuilds only the part that changed on a single worker thread. The new snapshot
+shares the unchanged indexes with the old one and replaces it with one
+reference assignment; a failed reload keeps serving the previous snapshot.
+
+The first snapshot is frozen (gc.freeze) at startup so the collector stops
+rescanning its many small objects.
+"""
+import asyncio
+import gc
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .content_index import CURRENT, ContentIndex
+from .suggest import TagSuggester
+from .tag_index import TagIndex
+
+
+def file_signature(path):
+    """(mtime_ns, size) of path, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentSnapshot:
+    """One consistent set of metadata and indexes; never modified after construction."""
+
+    def __init__(self, version, metadata, metadata_sha256, content_index, started, index=None, suggester=None):
+        """started is the perf_counter() value when building began, for build_seconds."""
+        self.version = version
+        self.metadata = metadata
+        self.metadata_sha256 = metadata_sha256
+        self.index = index if index is not None else TagIndex(metadata)
+        self.suggester = suggester if suggester is not None else TagSuggester(metadata)
+        self.content_index = content_index
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+
+    def status(self):
+        return {
+            "version": self.version,
+            "metadata_sha256": self.metadata_sha256,
+            "documents": len(self.metadata),
+            "content_documents": len(self.content_index),
+            "content_terms": len(self.content_index.vocab),
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 4),
+        }
+
+
+class SnapshotWatcher:
+    """Holds the current DocumentSnapshot and swaps in rebuilt ones as files change."""
+
+    def __init__(self, metadata_path, content_index_path, load_metadata, interval=5.0):
+        self.metadata_path = metadata_path
+        self.content_index_path = content_index_path
+        self.load_metadata = load_metadata
+        self.interval = interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+        self._task = None
+        self._seen = self._signatures()
+        self._pending = None
+        self.reloads = 0
+        self.last_check = None
+        self.last_error = None
+
+        start = time.perf_counter()
+        self.snapshot = DocumentSnapshot(
+            1,
+            load_metadata(metadata_path),
+            file_sha256(metadata_path),
+            ContentIndex.load(content_index_path),
+            start,
+        )
+        # Once, at startup: collect first so only live objects reach the permanent generation
+        gc.collect()
+        gc.freeze()
+
+    def _signatures(self):
+        return (
+            file_signature(self.metadata_path),
+            file_signature(os.path.join(self.content_index_path, CURRENT)),
+        )
+
+    def rebuild(self, metadata_changed, content_changed):
+        """Build the next snapshot from the current one (runs on the worker thread)."""
+        current = self.snapshot
+        start = time.perf_counter()
+        metadata, digest = current.metadata, current.metadata_sha256
+        index, suggester = current.index, current.suggester
+        if metadata_changed:
+            new_digest = file_sha256(self.metadata_path)
+            if new_digest != digest:
+                metadata, digest = self.load_metadata(self.metadata_path), new_digest
+                index = suggester = None
+        content_index = ContentIndex.load(self.content_index_path) if content_changed else current.content_index
+        if index is not None and content_index is current.content_index:
+            return current
+        return DocumentSnapshot(
+            current.version + 1,
+            metadata,
+            digest,
+            content_index,
+            start,
+            index=index,
+            suggester=suggester,
+        )
+
+    async def check(self):
+        """Poll once; rebuild and swap if a changed file has been stable since the last poll."""
+        self.last_check = time.time()
+        signatures = self._signatures()
+        if signatures == self._seen:
+            self._pending = None
+            return False
+        if signatures != self._pending:
+            # Wait one more poll so a file that is still being written is not read half-way
+            self._pending = signatures
+            return False
+
+        metadata_changed = signatures[0] != self._seen[0]
+        content_changed = signatures[1] != self._seen[1]
+        loop = asyncio.get_running_loop()
+        try:
+            snapshot = await loop.run_in_executor(self._executor, self.rebuild, metadata_changed, content_changed)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {getattr(e, 'detail', e)}"
+            logging.error(f"Document reload failed, keeping version {self.snapshot.version}: {self.last_error}")
+            self._seen, self._pending = signatures, None
+            return False
+        self._seen, self._pending = signatures, None
+        if snapshot is self.snapshot:
+            return False
+        self.snapshot = snapshot
+        self.reloads += 1
+        self.last_error = None
+        logging.info(f"Document snapshot version {snapshot.version}: {snapshot.status()}")
+        return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception:
+                logging.exception("Document watcher check failed")
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    def status(self):
+        return dict(
+            self.snapshot.status(),
+            reloads=self.reloads,
+            poll_seconds=self.interval,
+            last_check=self.last_check,
+            last_error=self.last_error,
+        )
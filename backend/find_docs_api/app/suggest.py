@@ -0,0 +1,152 @@
+"""Prefix autocomplete over document tags and categories for /suggest.
+
+Every tag and category phrase is stored in a sorted array under each of its
+word starts ("sale deed" under "sale deed" and "deed"), so a prefix is two
+bisects into that array. Typos are handled with a symmetric-delete table over
+key prefixes: a query prefix and a key prefix within one edit (insertion,
+deletion, substitution or adjacent swap) share a one-deletion variant, so
+candidates come from dictionary lookups and only those are verified.
+
+    python -m app.suggest data/updated_docdata.json "adoptoin"
+"""
+import argparse
+import heapq
+import time
+from bisect import bisect_left
+
+from .documents import read_metadata
+
+MIN_FUZZY_PREFIX = 3  # shorter prefixes match too much to correct typos
+MAX_FUZZY_PREFIX = 12  # typo matching only looks at this many leading characters
+
+# Rank of a suggestion by how it matched, best first
+PHRASE_START, WORD_START, ONE_EDIT = 0, 1, 2
+
+
+def phrases(tag):
+    """Clean phrases from a raw tag; titles are joined with ", " but often also with bare commas."""
+    return [" ".join(part.lower().split()) for part in tag.split(",") if part.strip()]
+
+
+def _deletions(text):
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
+
+
+def _within_one_edit(a, b):
+    """True if a and b differ by at most one insertion, deletion, substitution or adjacent swap."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return (
+            a[i + 1:] == b[i + 1:]
+            or (i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:])
+        )
+    return a[i:] == b[i + 1:]
+
+
+class TagSuggester:
+    """Sorted word-start keys over the distinct tag and category phrases of the metadata."""
+
+    def __init__(self, metadata):
+        documents, kinds = {}, {}
+        for doc_id, doc in enumerate(metadata):
+            found = [(phrase, "tag") for tag in doc["tags"] for phrase in phrases(tag)]
+            if doc["category"]:
+                found.append((" ".join(doc["category"].lower().split()), "category"))
+            for phrase, kind in found:
+                documents.setdefault(phrase, set()).add(doc_id)
+                if kinds.get(phrase) != "category":
+                    kinds[phrase] = kind
+
+        self.phrases = sorted(documents)
+        self.kinds = [kinds[phrase] for phrase in self.phrases]
+        self.documents = [len(documents[phrase]) for phrase in self.phrases]
+
+        keys = set()
+        for phrase_id, phrase in enumerate(self.phrases):
+            words = phrase.split(" ")
+            for start in range(len(words)):
+                keys.add((" ".join(words[start:]), phrase_id, PHRASE_START if start == 0 else WORD_START))
+        keys = sorted(keys)
+        self.keys = [key for key, _, _ in keys]
+        self.targets = [(phrase_id, rank) for _, phrase_id, rank in keys]
+
+        # key prefix -> phrase ids, and one-deletion variant -> key prefixes
+        self.prefix_phrases = {}
+        for key, (phrase_id, _) in zip(self.keys, self.targets):
+            for length in range(MIN_FUZZY_PREFIX - 1, min(len(key), MAX_FUZZY_PREFIX + 1) + 1):
+                self.prefix_phrases.setdefault(key[:length], set()).add(phrase_id)
+        self.variants = {}
+        for prefix in self.prefix_phrases:
+            for variant in _deletions(prefix) | {prefix}:
+                self.variants.setdefault(variant, []).append(prefix)
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def _prefix_range(self, prefix):
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + "\uffff")
+
+    def suggest(self, text, limit=10):
+        """Up to limit phrases completing text: exact prefixes first, then one-typo matches.
+
+        Within a rank, phrases used by more documents come first.
+        """
+        prefix = " ".join(text.lower().split())
+        if not prefix or limit <= 0:
+            return []
+        best = {}
+        lo, hi = self._prefix_range(prefix)
+        for phrase_id, rank in self.targets[lo:hi]:
+            best[phrase_id] = min(rank, best.get(phrase_id, rank))
+
+        if len(prefix) >= MIN_FUZZY_PREFIX:
+            head = prefix[:MAX_FUZZY_PREFIX]
+            for variant in _deletions(head) | {head}:
+                for key_prefix in self.variants.get(variant, ()):
+                    if _within_one_edit(head, key_prefix):
+                        for phrase_id in self.prefix_phrases[key_prefix]:
+                            best.setdefault(phrase_id, ONE_EDIT)
+
+        top = heapq.nsmallest(
+            limit, best.items(), key=lambda item: (item[1], -self.documents[item[0]], self.phrases[item[0]])
+        )
+        return [
+            {
+                "text": self.phrases[phrase_id],
+                "kind": self.kinds[phrase_id],
+                "documents": self.documents[phrase_id],
+                "typo": rank == ONE_EDIT,
+            }
+            for phrase_id, rank in top
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Try the tag/category autocomplete.")
+    parser.add_argument("metadata", metavar="JSON", help="document metadata JSON")
+    parser.add_argument("prefixes", nargs="+", help="prefixes to complete")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    metadata = read_metadata(args.metadata)  # the same documents the service loads
+    start = time.perf_counter()
+    suggester = TagSuggester(metadata)
+    print(f"{len(suggester)} phrases, {len(suggester.keys)} keys in {time.perf_counter() - start:.2f}s")
+    for prefix in args.prefixes:
+        start = time.perf_counter()
+        for _ in range(1000):
+            suggestions = suggester.suggest(prefix, args.limit)
+        elapsed = (time.perf_counter() - start) / 1000
+        print(f"{prefix!r}: {elapsed * 1e6:.0f} us")
+        for suggestion in suggestions:
+            print("   ", suggestion)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""Startup-built index over document tags and categories for /get-documents.
+
+Scoring is the same as the original per-document loop (kept below as
+calculate_match_score): every query unigram, bigram and trigram is compared with
+every tag (5/3/1 points above 0.9/0.7/0.5 SequenceMatcher ratio) and with the
+category (6/4 points above 0.9/0.7). The index only avoids work:
+
+* tags and categories are deduplicated, so each distinct string is compared once
+  per query term and its points are spread to documents through postings;
+* a character-count matrix bounds every ratio from above (difflib's quick_ratio)
+  in one vectorized step, and SequenceMatcher only runs on pairs whose bound
+  clears 0.5. The bound is never below the real ratio, so results are identical.
+
+Parity against the original loop:
+    python -m app.tag_index --check data/updated_docdata.json
+"""
+import argparse
+import random
+from difflib import SequenceMatcher
+from itertools import tee, islice
+
+import numpy as np
+
+from .documents import read_metadata
+
+TAG_TIERS = ((0.9, 5), (0.7, 3), (0.5, 1))
+CATEGORY_TIERS = ((0.9, 6), (0.7, 4))
+EXACT = 0.9  # tags above this ratio are reported as matched
+
+
+# Helper function for n-grams
+def ngrams(words, n):
+    iterables = tee(words, n)
+    for i, it in enumerate(iterables):
+        next(islice(it, i, i), None)
+    return [" ".join(gram) for gram in zip(*iterables)]
+
+
+def query_terms(query):
+    tokens = query.lower().split()
+    return tokens + ngrams(tokens, 2) + ngrams(tokens, 3)
+
+
+# Reference scoring: the original per-document implementation
+def calculate_match_score(query_tokens, tags, category):
+    match_score = 0
+    matched_tags = []
+
+    # Combine unigrams, bigrams, and trigrams for query
+    bigrams = ngrams(query_tokens, 2)
+    trigrams = ngrams(query_tokens, 3)
+    all_query_terms = query_tokens + bigrams + trigrams
+
+    # Match against tags
+    for term in all_query_terms:
+        for tag in tags:
+            similarity = SequenceMatcher(None, term, tag.lower()).ratio()
+            if similarity > 0.9:  # Exact match
+                match_score += 5
+                matched_tags.append(tag)
+            elif similarity > 0.7:  # Close match
+                match_score += 3
+            elif similarity > 0.5:  # Fuzzy match
+                match_score += 1
+
+    # Match against category
+    if category:
+        for term in all_query_terms:
+            similarity = SequenceMatcher(None, term, category).ratio()
+            if similarity > 0.9:
+                match_score += 6  # Higher weight for category match
+            elif similarity > 0.7:
+                match_score += 4
+
+    return match_score, list(set(matched_tags))  # Return unique matched tags
+
+
+def _tier_points(ratios, tiers):
+    points = np.zeros(ratios.shape, dtype=np.int64)
+    for threshold, score in reversed(tiers):
+        points[ratios > threshold] = score
+    return points
+
+
+class _StringTable:
+    """Distinct strings plus a character-count matrix for ratio upper bounds."""
+
+    def __init__(self, strings, alphabet):
+        self.strings = strings
+        self.lengths = np.asarray([len(s) for s in strings], dtype=np.int64)
+        self.counts = np.zeros((len(strings), len(alphabet)), dtype=np.int16)
+        for row, string in enumerate(strings):
+            for ch in string:
+                self.counts[row, alphabet[ch]] += 1
+
+    def ratios(self, terms, term_counts, term_lengths, floor):
+        """Exact SequenceMatcher(term, string) ratios, computed only where the bound exceeds floor."""
+        ratios = np.zeros((len(terms), len(self.strings)), dtype=np.float64)
+        if not len(self.strings):
+            return ratios
+        for t, term in enumerate(terms):
+            overlap = np.minimum(self.counts, term_counts[t]).sum(axis=1)
+            total = self.lengths + term_lengths[t]
+            bound = np.divide(2.0 * overlap, total, out=np.zeros(len(total)), where=total > 0)
+            for s in np.flatnonzero(bound > floor):
+                ratios[t, s] = SequenceMatcher(None, term, self.strings[s]).ratio()
+        return ratios
+
+
+class TagIndex:
+    """Inverted index from lowercased tags and categories to document positions."""
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+        tag_ids, category_ids = {}, {}
+        posting_docs, posting_tags = [], []
+        doc_categories = np.full(len(metadata), -1, dtype=np.int64)
+        for doc_id, doc in enumerate(metadata):
+            for tag in doc["tags"]:
+                posting_docs.append(doc_id)
+                posting_tags.append(tag_ids.setdefault(tag.lower(), len(tag_ids)))
+            category = doc["category"].lower() if doc["category"] else ""
+            if category:
+                doc_categories[doc_id] = category_ids.setdefault(category, len(category_ids))
+
+        strings = list(tag_ids) + list(category_ids)
+        self.alphabet = {ch: i for i, ch in enumerate(sorted({ch for s in strings for ch in s}))}
+        self.tags = _StringTable(list(tag_ids), self.alphabet)
+        self.categories = _StringTable(list(category_ids), self.alphabet)
+        self.posting_docs = np.asarray(posting_docs, dtype=np.int64)
+        self.posting_tags = np.asarray(posting_tags, dtype=np.int64)
+        self.doc_categories = doc_categories
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def _term_counts(self, terms):
+        counts = np.zeros((len(terms), len(self.alphabet)), dtype=np.int16)
+        for row, term in enumerate(terms):
+            for ch in term:
+                column = self.alphabet.get(ch)
+                if column is not None:
+                    counts[row, column] += 1
+        return counts, np.asarray([len(term) for term in terms], dtype=np.int64)
+
+    def _term_points(self, terms):
+        """Tag points, category points and exact-tag flags per distinct term (one row each)."""
+        n_tags, n_categories = len(self.tags.strings), len(self.categories.strings)
+        if not terms:
+            return (
+                np.zeros((0, n_tags), dtype=np.int64),
+                np.zeros((0, n_categories), dtype=np.int64),
+                np.zeros((0, n_tags), dtype=bool),
+            )
+        counts, lengths = self._term_counts(terms)
+        tag_ratios = self.tags.ratios(terms, counts, lengths, TAG_TIERS[-1][0])
+        category_ratios = self.categories.ratios(terms, counts, lengths, CATEGORY_TIERS[-1][0])
+        return (
+            _tier_points(tag_ratios, TAG_TIERS),
+            _tier_points(category_ratios, CATEGORY_TIERS),
+            tag_ratios > EXACT,
+        )
+
+    def _document_scores(self, tag_points, category_points, exact_tags):
+        n_docs = len(self.metadata)
+        scores = np.bincount(
+            self.posting_docs, weights=tag_points[self.posting_tags], minlength=n_docs
+        ).astype(np.int64)
+        has_category = self.doc_categories >= 0
+        scores[has_category] += category_points[self.doc_categories[has_category]]
+
+        matched = [[] for _ in range(n_docs)]
+        hits = exact_tags[self.posting_tags]
+        for doc_id, tag_id in zip(self.posting_docs[hits], self.posting_tags[hits]):
+            if tag_id not in matched[doc_id]:
+                matched[doc_id].append(tag_id)
+        return scores, matched
+
+    def score(self, query):
+        """Per-document (scores, matched tag ids per document) for query."""
+        return self.score_batch([query])[0]
+
+    def score_batch(self, queries):
+        """score() for many queries at once.
+
+        Query terms are pooled first, so a term shared by several queries (a
+        common word, a repeated query) is compared with the tags and categories
+        only once. A term repeated inside one query still counts once per
+        occurrence, as in the original loop.
+        """
+        per_query = [query_terms(query) for query in queries]
+        distinct = list(dict.fromkeys(term for terms in per_query for term in terms))
+        rows_of = {term: row for row, term in enumerate(distinct)}
+        tag_points, category_points, exact_tags = self._term_points(distinct)
+
+        results = []
+        for terms in per_query:
+            rows = np.asarray([rows_of[term] for term in terms], dtype=np.int64)
+            results.append(self._document_scores(
+                tag_points[rows].sum(axis=0),
+                category_points[rows].sum(axis=0),
+                exact_tags[rows].any(axis=0),
+            ))
+        return results
+
+    def _ranked(self, scores, matched, threshold, max_results):
+        results = []
+        for doc_id in np.flatnonzero(scores >= threshold):
+            doc = self.metadata[doc_id]
+            results.append({
+                "filename": doc["filename"],
+                "score": int(scores[doc_id]),
+                "matched_tags": [self.tags.strings[t] for t in matched[doc_id]],
+                "category": doc["category"].lower() if doc["category"] else "",
+            })
+        return sorted(results, key=lambda x: (x["score"], len(x["matched_tags"])), reverse=True)[:max_results]
+
+    def search(self, query, threshold=5.0, max_results=2):
+        """Same results, order and ties as the original find_relevant_documents loop."""
+        scores, matched = self.score(query)
+        return self._ranked(scores, matched, threshold, max_results)
+
+    def search_batch(self, queries, threshold=5.0, max_results=2):
+        """search() for each query, scored together in one pass."""
+        return [
+            self._ranked(scores, matched, threshold, max_results)
+            for scores, matched in self.score_batch(queries)
+        ]
+
+
+def reference_search(query, metadata, threshold=5.0, max_results=2):
+    query_tokens = query.lower().split()
+    results = []
+    for doc in metadata:
+        tags = [tag.lower() for tag in doc["tags"]]
+        category = doc["category"].lower() if doc["category"] else ""
+        match_score, matched_tags = calculate_match_score(query_tokens, tags, category)
+        if match_score >= threshold:
+            results.append({
+                "filename": doc["filename"],
+                "score": match_score,
+                "matched_tags": matched_tags,
+                "category": category,
+            })
+    return sorted(results, key=lambda x: (x["score"], len(x["matched_tags"])), reverse=True)[:max_results]
+
+
+def sample_queries(metadata, count=200, seed=0):
+    """Queries built from the corpus vocabulary: tags, categories, word mixes and typos."""
+    rng = random.Random(seed)
+    words = sorted({w for doc in metadata for tag in doc["tags"] for w in tag.lower().split()})
+    categories = [doc["category"] for doc in metadata if doc["category"]]
+    queries = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            queries.append(", ".join(rng.choice(metadata)["tags"]))
+        elif kind == 1:
+            queries.append(rng.choice(categories))
+        elif kind == 2:
+            queries.append(" ".join(rng.sample(words, rng.randint(1, 5))))
+        else:
+            word = list(rng.choice(words))
+            if len(word) > 2:
+                word[rng.randrange(len(word))] = rng.choice("aeiourst")
+            queries.append(f"i need a {''.join(word)} form")
+    return queries
+
+
+def parity_check(metadata, queries, threshold=5.0):
+    """Compare every document's score and matched tags with the reference loop.
+
+    Returns the list of mismatches as (query, filename, reference, indexed).
+    """
+    index = TagIndex(metadata)
+    mismatches = []
+    for query in queries:
+        scores, matched = index.score(query)
+        tokens = query.lower().split()
+        for doc_id, doc in enumerate(metadata):
+            category = doc["category"].lower() if doc["category"] else ""
+            expected, expected_tags = calculate_match_score(tokens, [t.lower() for t in doc["tags"]], category)
+            actual_tags = [index.tags.strings[t] for t in matched[doc_id]]
+            if expected != scores[doc_id] or set(expected_tags) != set(actual_tags):
+                mismatches.append((query, doc["filename"], expected, int(scores[doc_id])))
+        ranked = [(r["filename"], r["score"], set(r["matched_tags"])) for r in index.search(query, threshold)]
+        expected_ranked = [
+            (r["filename"], r["score"], set(r["matched_tags"])) for r in reference_search(query, metadata, threshold)
+        ]
+        if ranked != expected_ranked:
+            mismatches.append((query, None, expected_ranked, ranked))
+    for query, batched in zip(queries, index.search_batch(queries, threshold)):
+        if batched != index.search(query, threshold):
+            mismatches.append((query, "batch", index.search(query, threshold), batched))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check TagIndex against the original matching loop.")
+    parser.add_argument("--check", required=True, metavar="JSON", help="document metadata JSON")
+    parser.add_argument("--queries", type=int, default=50, help="number of sampled queries")
+    args = parser.parse_args()
+
+    metadata = read_metadata(args.check)  # the same documents the service loads
+    mismatches = parity_check(metadata, sample_queries(metadata, args.queries))
+    for mismatch in mismatches[:20]:
+        print("MISMATCH", mismatch)
+    print(f"{args.queries} queries x {len(metadata)} documents: {len(mismatches)} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
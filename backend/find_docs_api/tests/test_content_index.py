@@ -0,0 +1,55 @@
+import os
+import zipfile
+
+import numpy as np
+
+from app.content_index import CURRENT, ContentIndex
+
+DOCUMENT_XML = (
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    "<w:body><w:p><w:r><w:t>{}</w:t></w:r></w:p></w:body></w:document>"
+)
+
+
+def write_docx(path, text):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", DOCUMENT_XML.format(text))
+
+
+def test_each_save_swaps_in_one_complete_build(tmp_path):
+    docs, output = tmp_path / "docs", str(tmp_path / "index")
+    docs.mkdir()
+    write_docx(docs / "lease.docx", "rent agreement for a residential lease")
+    index = ContentIndex()
+    index.update(str(docs), workers=1)
+    index.save(output)
+    first_build = ContentIndex.build_directory(output)
+
+    write_docx(docs / "affidavit.docx", "affidavit for change of name")
+    index.update(str(docs), workers=1)
+    index.save(output)
+    index.save(output)
+
+    builds = sorted(name for name in os.listdir(output) if name.startswith("build-"))
+    assert len(builds) == 2 and os.path.basename(first_build) not in builds
+    with open(os.path.join(output, CURRENT), encoding="utf-8") as f:
+        assert f.read() == builds[-1]
+    loaded = ContentIndex.load(output)
+    assert [doc["key"] for doc in loaded.documents] == [doc["key"] for doc in index.documents]
+    assert np.array_equal(loaded.terms, index.terms) and loaded.vocab == index.vocab
+    assert loaded.search("affidavit")[0]["key"].endswith("affidavit.docx")
+
+
+def test_unversioned_index_still_loads(tmp_path):
+    docs, output = tmp_path / "docs", str(tmp_path / "index")
+    docs.mkdir()
+    write_docx(docs / "lease.docx", "rent agreement")
+    index = ContentIndex()
+    index.update(str(docs), workers=1)
+    index.save(output)
+    build = ContentIndex.build_directory(output)
+    for name in ("documents.json", "postings.npz"):
+        os.replace(os.path.join(build, name), os.path.join(output, name))
+    os.remove(os.path.join(output, CURRENT))
+    assert len(ContentIndex.load(output)) == 1
+    assert len(ContentIndex.load(str(tmp_path / "missing"))) == 0
@@ -0,0 +1,11 @@
+import os
+
+from app.documents import read_metadata
+from app.tag_index import parity_check, sample_queries
+
+METADATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "updated_docdata.json")
+
+
+def test_tag_index_matches_the_original_loop():
+    metadata = read_metadata(METADATA_PATH)
+    assert parity_check(metadata, sample_queries(metadata, 8)) == []
@@ -0,0 +1,629 @@
+"""Static-first crawler for the scrape data scripts.
+
+Pages are fetched with plain HTTP over one keep-alive session and parsed with
+html.parser. Only a page that looks like it needs JavaScript (next to no text
+behind a pile of scripts, a "please enable JavaScript" notice, or, on a seed
+page, a selector the caller requires is missing) is rendered again in headless
+Chrome, from a small pool that is launched on first use. A frontier takes care of depth and
+page limits, scope, URL dedup, robots.txt and a delay between requests to the
+same host, so a whole section can be crawled from one seed URL.
+
+With a CrawlState, re-crawls are incremental: pages are requested with
+If-None-Match / If-Modified-Since from the previous run, a 304 reuses the stored
+record (its links are still followed), and every page is tagged added, changed
+or unchanged by a hash of its extracted content. Pages that are gone are
+reported as removed, so a run can be reduced to a delta.
+
+Usage:
+    python crawler.py https://doj.gov.in/ --depth 2 --max-pages 200 --out doj_pages.json
+    python crawler.py https://scdg.sci.gov.in/scnjdg/ --wait-selector div.main-content
+    python crawler.py https://doj.gov.in/ --depth 2 --state doj_state.json --delta doj_delta.jsonl
+    python crawler.py https://doj.gov.in/ --depth 3 --out doj_pages.jsonl.gz   # records appended as crawled
+"""
+import argparse
+import hashlib
+import json
+import os
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from records import RecordWriter, is_jsonl
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+DOCUMENT_EXTENSIONS = (".pdf", ".doc", ".docx", ".rtf", ".odt", ".xls", ".xlsx", ".csv", ".zip", ".ppt", ".pptx")
+SKIPPED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js", ".mp3", ".mp4")
+# Session tokens that make every link to the same page look new (the NJDG pages carry app_token)
+IGNORED_PARAMS = ("app_token",)
+# Parts of a page record that make up its content (fetch metadata is left out of the hash)
+CONTENT_FIELDS = ("title", "description", "paragraphs", "links", "documents")
+
+# The selector forms PageParser records: tag, .class, tag.class and #id
+_SIMPLE_SELECTOR_RE = re.compile(r"[A-Za-z][\w-]*|[A-Za-z][\w-]*\.[\w-]+|\.[\w-]+|#[\w-]+")
+
+_TEXT_TAGS = {"p", "li"}
+_HIDDEN_TAGS = {"script", "style", "noscript", "template"}
+_BLOCK_TAGS = {"br", "div", "p", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "table", "ul", "ol"}
+
+
+def normalize_url(url, base=None, ignored_params=()):
+    """Absolute URL without fragment, default port or ignored query parameters; None for non-HTTP links."""
+    url = urljoin(base, url.strip()) if base else url.strip()
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    netloc = parts.hostname
+    if parts.port and parts.port != {"http": 80, "https": 443}[parts.scheme]:
+        netloc += f":{parts.port}"
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in ignored_params])
+    return urlunsplit((parts.scheme, netloc, parts.path or "/", query, ""))
+
+
+def _text(parts):
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+class PageParser(HTMLParser):
+    """Title, meta description, <p>/<li> texts, links and the markers used to decide on rendering."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.description = ""
+        self.paragraphs = []
+        self.links = []
+        self.scripts = 0
+        self.text_length = 0
+        self.noscript_text = []
+        self.selectors = set()
+        self._hidden = 0
+        self._in_title = False
+        self._open_text = []  # (tag, slot in paragraphs, parts)
+        self._open_links = []  # (slot in links, parts)
+        self._noscript = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        self.selectors.add(tag)
+        self.selectors.update("." + name for name in classes)
+        self.selectors.update(f"{tag}.{name}" for name in classes)
+        if attrs.get("id"):
+            self.selectors.add("#" + attrs["id"])
+        if tag == "script":
+            self.scripts += 1
+        if tag == "noscript":
+            self._noscript = True
+        if tag in _HIDDEN_TAGS:
+            self._hidden += 1
+            return
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta" and (attrs.get("name") or "").lower() == "description":
+            self.description = attrs.get("content") or ""
+        elif tag in _TEXT_TAGS:
+            self.paragraphs.append(None)
+            self._open_text.append((tag, len(self.paragraphs) - 1, []))
+        elif tag == "a" and attrs.get("href"):
+            self.links.append({"text": "", "url": attrs["href"]})
+            self._open_links.append((len(self.links) - 1, []))
+        if tag in _BLOCK_TAGS:
+            self._data("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _HIDDEN_TAGS:
+            self._hidden = max(self._hidden - 1, 0)
+            if tag == "noscript":
+                self._noscript = False
+            return
+        if tag == "title":
+            self._in_title = False
+        elif tag in _TEXT_TAGS:
+            # Close the innermost open element of this kind (and anything left open inside it)
+            for i in range(len(self._open_text) - 1, -1, -1):
+                if self._open_text[i][0] == tag:
+                    for _, slot, parts in self._open_text[i:]:
+                        self.paragraphs[slot] = _text(parts)
+                    del self._open_text[i:]
+                    break
+        elif tag == "a" and self._open_links:
+            slot, parts = self._open_links.pop()
+            self.links[slot]["text"] = _text(parts)
+        if tag in _BLOCK_TAGS:
+            self._data("\n")
+
+    def _data(self, data):
+        for _, _, parts in self._open_text:
+            parts.append(data)
+        for _, parts in self._open_links:
+            parts.append(data)
+
+    def handle_data(self, data):
+        if self._noscript:
+            self.noscript_text.append(data)
+        if self._hidden:
+            return
+        if self._in_title:
+            self.title += data
+            return
+        self.text_length += len(data.strip())
+        self._data(data)
+
+    def close(self):
+        super().close()
+        for _, slot, parts in self._open_text:
+            self.paragraphs[slot] = _text(parts)
+        self.paragraphs = [text for text in self.paragraphs if text]
+        self.title = " ".join(self.title.split())
+
+    def needs_js(self, wait_selector=None, min_text=200):
+        """Whether a browser would likely see a different page than this static fetch.
+
+        wait_selector must be a simple selector (see check_selector); anything
+        else can never be found in the static HTML.
+        """
+        if wait_selector and wait_selector not in self.selectors:
+            return True
+        if "javascript" in " ".join(self.noscript_text).lower() and self.text_length < 5 * min_text:
+            return True
+        return self.scripts > 0 and self.text_length < min_text
+
+
+def check_selector(selector):
+    """Raises ValueError unless PageParser can look selector up in static HTML."""
+    if not _SIMPLE_SELECTOR_RE.fullmatch(selector):
+        raise ValueError(
+            f"wait selector {selector!r} is not one of tag, .class, tag.class or #id; "
+            "it could never be found without a browser, so every page would be rendered"
+        )
+
+
+def parse_page(html):
+    parser = PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def setup_driver():
+    """Sets up a headless Chrome WebDriver."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+
+
+class BrowserPool:
+    """Up to `size` headless browsers, launched only when a page first needs one and then reused."""
+
+    def __init__(self, size=2, launch=setup_driver, page_load_seconds=30):
+        self.size = size
+        self.launch = launch
+        self.page_load_seconds = page_load_seconds
+        self._idle = queue.Queue()
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._drivers) < self.size:
+                driver = self.launch()
+                driver.set_page_load_timeout(self.page_load_seconds)
+                self._drivers.append(driver)
+                return driver
+        return self._idle.get()
+
+    def render(self, url, wait_selector=None):
+        """(final URL, page source) after the page and, if given, wait_selector have loaded."""
+        driver = self._acquire()
+        try:
+            driver.get(url)
+            if wait_selector:
+                from selenium.common.exceptions import TimeoutException
+                from selenium.webdriver.common.by import By
+                from selenium.webdriver.support import expected_conditions as EC
+                from selenium.webdriver.support.ui import WebDriverWait
+
+                try:
+                    WebDriverWait(driver, self.page_load_seconds).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector))
+                    )
+                except TimeoutException:
+                    logging.warning(f"{wait_selector} did not appear on {url}")
+            return driver.current_url, driver.page_source
+        finally:
+            self._idle.put(driver)
+
+    @property
+    def launched(self):
+        return len(self._drivers)
+
+    def close(self):
+        with self._lock:
+            for driver in self._drivers:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    logging.warning(f"Failed to quit a browser: {e}")
+            self._drivers.clear()
+
+
+def content_hash(record):
+    content = {field: record.get(field) for field in CONTENT_FIELDS}
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    """What the last crawls saw: URL key -> {etag, last_modified, content_hash, depth, last_seen, record}.
+
+    The record is kept so that a 304 still yields the page and its links.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.pages = json.load(f)
+        except FileNotFoundError:
+            self.pages = {}
+
+    def get(self, key):
+        return self.pages.get(key)
+
+    def update(self, key, entry):
+        self.pages[key] = entry
+
+    def remove(self, key):
+        self.pages.pop(key, None)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.pages, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class Crawler:
+    """Breadth-first crawl from seed URLs, static HTTP first, browser only when needed.
+
+    crawl() yields one record per page as soon as it is parsed:
+    {url, depth, status, title, description, paragraphs, links, documents, rendered, change}.
+    Links to documents (PDF, DOCX, ...) are listed under "documents" and never fetched.
+    change is "added", "changed" or "unchanged" against the state ("added" without
+    one); with a state, crawl() finally yields {url, change: "removed"} for pages
+    that are gone.
+    """
+
+    def __init__(self, max_depth=1, max_pages=100, scope=None, delay=0.5, workers=4, timeout=30,
+                 obey_robots=True, wait_selector=None, browser=None, browser_size=2, ignored_params=IGNORED_PARAMS,
+                 user_agent=USER_AGENT, state=None):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.scope = list(scope) if scope else None
+        self.delay = delay
+        self.workers = workers
+        self.timeout = timeout
+        self.obey_robots = obey_robots
+        if wait_selector:
+            check_selector(wait_selector)
+        self.wait_selector = wait_selector
+        self.ignored_params = ignored_params
+        self.user_agent = user_agent
+        self.state = state
+        self.browser = browser if browser is not None else BrowserPool(size=browser_size)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(workers, 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._robots = {}
+        self._lock = threading.Lock()
+        self.stats = {"pages": 0, "static": 0, "rendered": 0, "not_modified": 0, "errors": 0, "disallowed": 0,
+                      "skipped": 0, "bytes": 0, "added": 0, "changed": 0, "unchanged": 0, "removed": 0,
+                      "seconds": 0.0}
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    # Frontier
+
+    def _key(self, url):
+        """Dedup key: the URL without session parameters."""
+        return normalize_url(url, ignored_params=self.ignored_params)
+
+    def _in_scope(self, url):
+        return any(url.startswith(prefix) for prefix in self.scope)
+
+    def _robots_for(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self._robots:
+            robots = RobotFileParser()
+            try:
+                response = self.session.get(origin + "/robots.txt", timeout=self.timeout)
+                robots.parse(response.text.splitlines() if response.status_code == 200 else [])
+            except requests.exceptions.RequestException:
+                robots.parse([])
+            self._robots[origin] = robots
+        return self._robots[origin]
+
+    def _host_delay(self, url):
+        if not self.obey_robots:
+            return self.delay
+        return max(self.delay, self._robots_for(url).crawl_delay(self.user_agent) or 0)
+
+    # Fetching
+
+    def fetch(self, url, depth):
+        """Fetch and parse one page; escalates to the browser pool if the static HTML is not enough."""
+        if self.obey_robots and not self._robots_for(url).can_fetch(self.user_agent, url):
+            self._count("disallowed")
+            return None
+        known = self.state.get(self._key(url)) if self.state is not None else None
+        headers = {}
+        if known:
+            if known.get("etag"):
+                headers["If-None-Match"] = known["etag"]
+            if known.get("last_modified"):
+                headers["If-Modified-Since"] = known["last_modified"]
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and known:
+                return dict(known["record"], url=url, depth=depth, status=304, rendered=False,
+                            fetched_at=time.time(), change="unchanged")
+            if response.status_code >= 400:
+                return {"url": url, "depth": depth, "status": response.status_code}
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            content_type = response.headers.get("Content-Type", "")
+            if "html" not in content_type and "xml" not in content_type:
+                self._count("skipped")
+                return None  # not a page; the body is never read
+            html = response.text
+            final_url, status = response.url, response.status_code
+        self._count("bytes", len(html))
+        page = parse_page(html)
+        rendered = False
+        # The wait selector describes the seed pages; linked pages are laid out differently
+        wait_selector = self.wait_selector if depth == 0 else None
+        if page.needs_js(wait_selector):
+            final_url, html = self.browser.render(url, wait_selector)
+            page = parse_page(html)
+            rendered = True
+
+        links, documents = [], []
+        for link in page.links:
+            target = normalize_url(link["url"], final_url)
+            if target is None:
+                continue
+            path = urlsplit(target).path.lower()
+            if path.endswith(DOCUMENT_EXTENSIONS):
+                documents.append({"text": link["text"], "url": target})
+            else:
+                links.append({"text": link["text"], "url": target})
+        record = {
+            "url": url,
+            "final_url": final_url,
+            "depth": depth,
+            "status": status,
+            "title": page.title,
+            "description": page.description,
+            "paragraphs": page.paragraphs,
+            "links": links,
+            "documents": documents,
+            "rendered": rendered,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        record["content_hash"] = content_hash(record)
+        if not known:
+            record["change"] = "added"
+        else:
+            record["change"] = "unchanged" if known["content_hash"] == record["content_hash"] else "changed"
+        return record
+
+    def _remember(self, key, page):
+        if page["status"] == 304:
+            entry = self.state.get(key)
+        else:
+            entry = {
+                "etag": page["etag"],
+                "last_modified": page["last_modified"],
+                "content_hash": page["content_hash"],
+                "record": {k: v for k, v in page.items() if k != "change"},
+            }
+            self.state.update(key, entry)
+        entry["depth"] = page["depth"]
+        entry["last_seen"] = page["fetched_at"]
+
+    def _removed(self, visited, failed):
+        """State entries this crawl should have reached but did not (only meaningful for a complete crawl)."""
+        for key, entry in list(self.state.pages.items()):
+            if key in visited or key in failed:
+                continue
+            if entry.get("depth", 0) <= self.max_depth and self._in_scope(entry["record"]["url"]):
+                yield key, entry["record"]["url"]
+
+    def crawl(self, seeds):
+        seeds = [url for url in map(normalize_url, seeds) if url]
+        if self.scope is None:
+            # Stay in the section each seed belongs to
+            self.scope = [seed.rsplit("/", 1)[0] + "/" for seed in (s.split("?", 1)[0] for s in seeds)]
+        seen = {self._key(seed) for seed in seeds}
+        frontier = {}  # host -> deque of (url, depth)
+        for seed in seeds:
+            frontier.setdefault(urlsplit(seed).netloc, deque()).append((seed, 0))
+        next_allowed = {}  # host -> monotonic time of its next request
+        running = {}  # future -> (host, url, depth)
+        dispatched = 0
+        visited, failed = set(), set()
+        start = time.perf_counter()
+
+        def work(url, depth):
+            page = self.fetch(url, depth)
+            return page, self._host_delay(url)
+
+        with ThreadPoolExecutor(max_workers=max(self.workers, 1)) as executor:
+            while running or (dispatched < self.max_pages and any(frontier.values())):
+                now = time.monotonic()
+                busy = {host for host, _, _ in running.values()}
+                for host, pending in frontier.items():
+                    if len(running) >= self.workers or dispatched >= self.max_pages:
+                        break
+                    if pending and host not in busy and next_allowed.get(host, 0) <= now:
+                        url, depth = pending.popleft()
+                        running[executor.submit(work, url, depth)] = (host, url, depth)
+                        busy.add(host)
+                        dispatched += 1
+
+                waits = [t - now for host, t in next_allowed.items() if frontier.get(host) and host not in busy]
+                timeout = max(min(waits), 0.01) if waits else None
+                if not running:
+                    time.sleep(timeout or 0.01)
+                    continue
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host, url, depth = running.pop(future)
+                    try:
+                        page, delay = future.result()
+                    except Exception as e:
+                        self._count("errors")
+                        failed.add(self._key(url))
+                        logging.warning(f"Failed to crawl {url}: {e}")
+                        next_allowed[host] = time.monotonic() + self.delay
+                        continue
+                    next_allowed[host] = time.monotonic() + delay
+                    if page is None:
+                        failed.add(self._key(url))  # disallowed or not HTML: leave its state alone
+                        continue
+                    if page["status"] >= 400:
+                        if page["status"] not in (404, 410):
+                            failed.add(self._key(url))
+                        continue  # gone pages are picked up by the removed check below
+                    visited.add(self._key(url))
+                    self._count("pages")
+                    self._count(page["change"])
+                    if page["status"] == 304:
+                        self._count("not_modified")
+                    else:
+                        self._count("rendered" if page["rendered"] else "static")
+                    if self.state is not None:
+                        self._remember(self._key(url), page)
+                    seen.add(self._key(page["final_url"]))
+                    if depth < self.max_depth:
+                        for link in page["links"]:
+                            target, key = link["url"], self._key(link["url"])
+                            if key in seen or not self._in_scope(target):
+                                continue
+                            if urlsplit(target).path.lower().endswith(SKIPPED_EXTENSIONS):
+                                continue
+                            seen.add(key)
+                            frontier.setdefault(urlsplit(target).netloc, deque()).append((target, depth + 1))
+                    yield page
+
+        # Truncated by max_pages, the crawl cannot tell missing pages from unvisited ones
+        if self.state is not None and not any(frontier.values()):
+            for key, url in self._removed(visited, failed):
+                self.state.remove(key)
+                self._count("removed")
+                yield {"url": url, "change": "removed"}
+        if self.state is not None:
+            self.state.save()
+        self.stats["seconds"] = round(time.perf_counter() - start, 3)
+
+    def close(self):
+        self.session.close()
+        self.browser.close()
+
+
+def crawl(seeds, **kwargs):
+    """All pages reachable from seeds (see Crawler for the options)."""
+    crawler = Crawler(**kwargs)
+    try:
+        return list(crawler.crawl(seeds))
+    finally:
+        crawler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a site section, static HTML first.")
+    parser.add_argument("seeds", nargs="+", help="start URLs")
+    parser.add_argument("--depth", type=int, default=1, help="link hops from the seeds")
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--scope", action="append", help="URL prefix to stay within (default: the seed's folder)")
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds between requests to one host")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--wait-selector", help="tag, .class, tag.class or #id a seed page must contain, else it is rendered")
+    parser.add_argument("--ignore-robots", action="store_true")
+    parser.add_argument("--out", default="crawled_pages.json", help=".json, or .jsonl[.gz|.zst] to stream records")
+    parser.add_argument("--append", action="store_true",
+                        help="add to a .jsonl[.gz|.zst] --out instead of replacing it (e.g. to resume a crawl)")
+    parser.add_argument("--state", help="crawl state file; makes the crawl incremental")
+    parser.add_argument("--delta", help="with --state: write only added/changed/removed records here")
+    args = parser.parse_args()
+    if args.wait_selector:
+        try:
+            check_selector(args.wait_selector)
+        except ValueError as e:
+            parser.error(str(e))
+
+    logging.basicConfig(level=logging.INFO)
+    state = CrawlState(args.state) if args.state else None
+    crawler = Crawler(max_depth=args.depth, max_pages=args.max_pages, scope=args.scope, delay=args.delay,
+                      workers=args.workers, wait_selector=args.wait_selector, obey_robots=not args.ignore_robots,
+                      state=state)
+    # JSONL outputs get each record as soon as it is crawled; .json outputs are written at the end
+    # The delta only ever holds this run's changes
+    out = RecordWriter(args.out, append=args.append) if is_jsonl(args.out) else None
+    delta = RecordWriter(args.delta) if args.delta and is_jsonl(args.delta) else None
+    pages, changes = [], []
+    try:
+        for record in crawler.crawl(args.seeds):
+            if record["change"] != "removed":
+                if out is not None:
+                    out.write(record)
+                else:
+                    pages.append(record)
+            if args.delta and record["change"] != "unchanged":
+                if delta is not None:
+                    delta.write(record)
+                else:
+                    changes.append(record)
+    finally:
+        crawler.close()
+        for writer in (out, delta):
+            if writer is not None:
+                writer.close()
+    if out is None:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(pages, f, ensure_ascii=False, indent=4)
+    if args.delta and delta is None:
+        with open(args.delta, "w", encoding="utf-8") as f:
+            json.dump(changes, f, ensure_ascii=False, indent=4)
+    logging.info(f"{crawler.stats['pages']} pages saved to {args.out}: {json.dumps(dict(crawler.stats, browsers=crawler.browser.launched))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""Shared download engine for the scrapers: concurrent, resumable and incremental.
+
+Files are fetched on a thread pool over one keep-alive connection pool, with a
+cap on concurrent requests per host. Each file is streamed into "<name>.part" in
+1 MB chunks and renamed into place only once complete, so a crash never leaves
+a truncated file under the real name. An interrupted .part is resumed with an
+HTTP Range request (guarded by If-Range, so a file that changed meanwhile is
+fetched from scratch). A manifest in the download folder records size, ETag,
+Last-Modified and sha256 of every finished file; on the next run unchanged
+files are answered by a 304 and not downloaded again.
+
+Usage:
+    python downloader.py --out doj_pdfs https://example.com/a.pdf https://example.com/b.pdf
+    python downloader.py --serve LegalDocs --port 8200     # fixture server with ETag/Range support
+    python downloader.py --selftest                        # downloads LegalDocs from the fixture server
+"""
+import argparse
+import email.utils
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlparse
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 1 << 20
+MANIFEST_NAME = ".manifest.json"
+
+
+def extract_filename_from_url(url):
+    """Extracts the (percent-decoded) filename from the URL, or None if it is not a safe plain file name.
+
+    The path is decoded before taking the basename, so an encoded "..%2F" cannot
+    smuggle a directory component into the name.
+    """
+    file_name = os.path.basename(unquote(urlparse(url).path))
+    separators = [sep for sep in (os.sep, os.altsep, "/", "\\") if sep]
+    if file_name in ("", ".", "..", MANIFEST_NAME) or any(sep in file_name for sep in separators) or "\x00" in file_name:
+        return None
+    return file_name
+
+
+def file_sha256(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest
+
+
+def _chunks(response, chunk_size):
+    """Body chunks as they arrive, so bytes received before a dropped connection still reach the .part file."""
+    read1 = getattr(response.raw, "read1", None)  # urllib3 >= 2
+    if read1 is None:
+        yield from response.iter_content(chunk_size)
+        return
+    while True:
+        chunk = read1(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class IncompleteDownload(IOError):
+    """The connection ended before the announced number of bytes arrived."""
+
+
+class Manifest:
+    """What is on disk: url -> {file, size, etag, last_modified, sha256}.
+
+    Also keeps the validators of unfinished .part files so that a later run
+    can resume them with If-Range.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        self.files = data.get("files", {})
+        self.partial = data.get("partial", {})
+
+    def save(self):
+        with self.lock:
+            data = {"files": self.files, "partial": self.partial}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+
+    def started(self, url, validators):
+        with self.lock:
+            self.partial[url] = validators
+
+    def finished(self, url, entry):
+        with self.lock:
+            self.partial.pop(url, None)
+            self.files[url] = entry
+
+
+class Downloader:
+    """Downloads URLs into one folder; see the module docstring."""
+
+    def __init__(self, download_folder, workers=8, per_host=4, chunk_size=CHUNK_SIZE, retries=3, timeout=60):
+        self.download_folder = download_folder
+        self.workers = workers
+        self.per_host = per_host
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+        os.makedirs(download_folder, exist_ok=True)
+        self.manifest = Manifest(os.path.join(download_folder, MANIFEST_NAME))
+        self.session = requests.Session()
+        # Compressed transfer would break byte ranges and length checks
+        self.session.headers["Accept-Encoding"] = "identity"
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=workers, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        self._stats = {"downloaded": 0, "resumed": 0, "unchanged": 0, "failed": 0, "duplicates": 0, "bytes": 0}
+
+    def _slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def target_path(self, file_name):
+        """Path of file_name inside the download folder; ValueError if it would land anywhere else."""
+        folder = os.path.realpath(self.download_folder)
+        file_path = os.path.join(self.download_folder, file_name)
+        if os.path.dirname(os.path.realpath(file_path)) != folder:
+            raise ValueError(f"{file_name!r} resolves outside {self.download_folder}")
+        return file_path
+
+    def fetch(self, url, file_name):
+        """Downloads one URL unless the manifest shows it unchanged; returns the outcome."""
+        file_path = self.target_path(file_name)
+        part_path = file_path + ".part"
+        known = self.manifest.files.get(url)
+        have_file = bool(known) and os.path.exists(file_path) and os.path.getsize(file_path) == known["size"]
+
+        headers = {}
+        if have_file:
+            if known.get("etag"):
+                headers["If-None-Match"] = known["etag"]
+            if known.get("last_modified"):
+                headers["If-Modified-Since"] = known["last_modified"]
+        partial = self.manifest.partial.get(url) or {}
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = partial.get("etag") or partial.get("last_modified")
+        if offset and validator:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304:
+                return "unchanged"
+            response.raise_for_status()
+            validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+            if have_file and validators["etag"] and validators["etag"] == known.get("etag"):
+                return "unchanged"  # server ignored If-None-Match; the body is never read
+
+            resumed = response.status_code == 206 and offset > 0
+            if resumed:
+                content_range = response.headers.get("Content-Range", "")
+                if not content_range.startswith(f"bytes {offset}-"):
+                    raise IncompleteDownload(f"unexpected Content-Range {content_range!r}")
+                total = content_range.rsplit("/", 1)[-1]
+                expected = int(total) if total.isdigit() else None
+                digest = file_sha256(part_path, self.chunk_size)
+            else:
+                offset = 0
+                length = response.headers.get("Content-Length")
+                expected = int(length) if length and length.isdigit() else None
+                digest = hashlib.sha256()
+            self.manifest.started(url, validators)
+
+            transferred = 0
+            try:
+                with open(part_path, "ab" if resumed else "wb", buffering=self.chunk_size) as f:
+                    for chunk in _chunks(response, self.chunk_size):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        transferred += len(chunk)
+            finally:
+                self._count("bytes", transferred)
+        size = offset + transferred
+        if expected is not None and size != expected:
+            raise IncompleteDownload(f"got {size} of {expected} bytes")
+
+        sha256 = digest.hexdigest()
+        if have_file and sha256 == known["sha256"]:
+            os.remove(part_path)  # same bytes as before, only the validators are new
+            outcome = "unchanged"
+        else:
+            os.replace(part_path, file_path)
+            outcome = "resumed" if resumed else "downloaded"
+        self.manifest.finished(url, dict(validators, file=file_name, size=size, sha256=sha256))
+        return outcome
+
+    def _download(self, url, file_name):
+        for attempt in range(self.retries + 1):
+            try:
+                with self._slot(url):
+                    outcome = self.fetch(url, file_name)
+                break
+            except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, OSError) as e:
+                # Whatever reached the .part file is kept; the next attempt resumes from it
+                if attempt == self.retries:
+                    print(f"Failed to download {url}: {e}")
+                    self._count("failed")
+                    return
+                if attempt:
+                    time.sleep(min(2 ** attempt * 0.5, 10))
+        if outcome != "unchanged":
+            print(f"Downloaded: {file_name}" + (" (resumed)" if outcome == "resumed" else ""))
+        self._count(outcome)
+
+    def download_all(self, urls):
+        """Downloads every URL concurrently and returns a throughput report."""
+        start = time.perf_counter()
+        targets = {}
+        for url in dict.fromkeys(urls):
+            file_name = extract_filename_from_url(url)
+            try:
+                if file_name is None:
+                    raise ValueError("no safe file name in the URL")
+                self.target_path(file_name)
+            except ValueError as e:
+                print(f"Skipping {url}: {e}")
+                self._stats["failed"] += 1
+                continue
+            if file_name in targets:
+                print(f"Skipping {url}: {file_name!r} is already taken")
+                self._stats["duplicates"] += 1
+                continue
+            targets[file_name] = url
+        try:
+            with ThreadPoolExecutor(max_workers=max(self.workers, 1)) as executor:
+                for future in [executor.submit(self._download, url, name) for name, url in targets.items()]:
+                    future.result()
+        finally:
+            self.manifest.save()
+        seconds = time.perf_counter() - start
+        report = dict(self._stats, files=len(targets), seconds=round(seconds, 3),
+                      mb_per_second=round(self._stats["bytes"] / seconds / 1e6, 2) if seconds else 0.0)
+        print(
+            f"{report['downloaded']} downloaded, {report['resumed']} resumed, {report['unchanged']} unchanged, "
+            f"{report['failed']} failed; {report['bytes'] / 1e6:.1f} MB in {seconds:.1f}s "
+            f"({report['mb_per_second']} MB/s)"
+        )
+        return report
+
+
+def download_all(urls, download_folder, **kwargs):
+    """Downloads all URLs into download_folder, skipping files that have not changed."""
+    downloader = Downloader(download_folder, **kwargs)
+    try:
+        return downloader.download_all(urls)
+    finally:
+        downloader.session.close()
+
+
+# Fixture server
+
+
+def make_fixture_server(directory, port, drop_after=None):
+    """HTTP server for the files under directory with ETag, Last-Modified, 304s and single byte ranges.
+
+    With drop_after, the first full-body response for each file is cut off after
+    that many bytes, to exercise resuming.
+    """
+    dropped = set()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            relative = unquote(urlparse(self.path).path).lstrip("/")
+            path = os.path.realpath(os.path.join(directory, relative))
+            if not path.startswith(os.path.realpath(directory) + os.sep) or not os.path.isfile(path):
+                self._send_headers(404, [("Content-Length", "0")])
+                return
+            stat = os.stat(path)
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+            validators = [("ETag", etag), ("Last-Modified", last_modified), ("Accept-Ranges", "bytes")]
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if self.headers.get("If-None-Match") == etag:
+                self._send_headers(304, validators)
+                return
+
+            start, end = 0, stat.st_size - 1
+            range_header = self.headers.get("Range", "")
+            if range_header.startswith("bytes=") and self.headers.get("If-Range", etag) in (etag, last_modified):
+                first, _, last = range_header[len("bytes="):].partition("-")
+                start, end = int(first), int(last) if last else end
+            if start > 0 or end < stat.st_size - 1:
+                status = 206
+                validators.append(("Content-Range", f"bytes {start}-{end}/{stat.st_size}"))
+            else:
+                status = 200
+            length = end - start + 1
+            self._send_headers(status, validators + [("Content-Type", content_type), ("Content-Length", str(length))])
+
+            limit = length
+            if drop_after is not None and status == 200:
+                with lock:
+                    if path not in dropped:
+                        dropped.add(path)
+                        limit = min(drop_after, length)
+            with open(path, "rb") as f:
+                f.seek(start)
+                self.wfile.write(f.read(limit))
+            if limit < length:
+                self.close_connection = True
+
+        def _send_headers(self, status, headers):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+def fixture_urls(directory, port):
+    base = f"http://127.0.0.1:{port}/"
+    return [
+        base + quote(os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/"))
+        for root, _, names in os.walk(directory)
+        for name in sorted(names)
+    ]
+
+
+def selftest(source, port):
+    """Downloads a copy of source three times: cold with dropped connections, warm, and after one edit."""
+    work = tempfile.mkdtemp(prefix="downloader-")
+    served = os.path.join(work, "served")
+    shutil.copytree(source, served)
+    server = make_fixture_server(served, port, drop_after=4096)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        urls = fixture_urls(served, port)
+        out = os.path.join(work, "out")
+
+        def source_path(url):
+            return os.path.join(served, unquote(urlparse(url).path).lstrip("/"))
+
+        cold = download_all(urls, out)
+        warm = download_all(urls, out)
+        manifest = Manifest(os.path.join(out, MANIFEST_NAME))
+        with open(source_path(next(iter(manifest.files))), "ab") as f:
+            f.write(b"\n")
+        edited = download_all(urls, out)
+
+        manifest = Manifest(os.path.join(out, MANIFEST_NAME))
+        mismatched = [
+            url for url, entry in manifest.files.items()
+            if file_sha256(source_path(url)).hexdigest() != entry["sha256"]
+            or file_sha256(os.path.join(out, entry["file"])).hexdigest() != entry["sha256"]
+        ]
+        checks = {
+            "cold run fetched everything": cold["downloaded"] + cold["resumed"] == cold["files"] and not cold["failed"],
+            "cut-off downloads were resumed": cold["resumed"] > 0,
+            "warm run transferred nothing": warm["unchanged"] == warm["files"] and warm["bytes"] == 0,
+            "edited file fetched again": edited["downloaded"] + edited["resumed"] == 1,
+            "files match their sources": not mismatched,
+            "no .part files left": not any(name.endswith(".part") for name in os.listdir(out)),
+        }
+        for name, ok in checks.items():
+            print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        return all(checks.values())
+    finally:
+        server.shutdown()
+        shutil.rmtree(work)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent, resumable downloads with a change manifest.")
+    parser.add_argument("urls", nargs="*", help="URLs to download")
+    parser.add_argument("--out", default="downloads", help="download folder")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=4, help="concurrent requests per host")
+    parser.add_argument("--serve", help="serve this folder as fixtures instead of downloading")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--drop-after", type=int, help="fixture server: cut the first response per file after N bytes")
+    parser.add_argument("--selftest", action="store_true", help="download LegalDocs from a local fixture server")
+    args = parser.parse_args()
+
+    if args.serve:
+        print(f"Serving {args.serve} on http://127.0.0.1:{args.port}/")
+        make_fixture_server(args.serve, args.port, args.drop_after).serve_forever()
+    elif args.selftest:
+        source = os.path.join(os.path.dirname(os.path.abspath(__file__)), "LegalDocs")
+        raise SystemExit(0 if selftest(source, args.port) else 1)
+    else:
+        download_all(args.urls, args.out, workers=args.workers, per_host=args.per_host)
+
+
+if __name__ == "__main__":
+    main()
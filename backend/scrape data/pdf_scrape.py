@@ -1,81 +1,43 @@
-import os
-import requests
-from urllib.parse import urlparse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+import argparse
 
+from crawler import crawl
+from downloader import download_all
 
-def setup_driver():
-    """Sets up the Selenium WebDriver."""
-    options = Options()
-    options.add_argument("--headless")  # Run in headless mode
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
 
-
-def find_pdf_links(driver, base_url):
-    """Finds all PDF links on the website."""
+def find_pdf_links(base_url, max_depth=0, max_pages=100):
+    """Finds all PDF links on the website, following links within its section up to max_depth hops."""
     pdf_links = set()
-    driver.get(base_url)
-
-    # Wait for the page to load and extract links
-    links = driver.find_elements(By.TAG_NAME, "a")
-    for link in links:
-        href = link.get_attribute("href")
-        if href and href.endswith(".pdf"):
-            pdf_links.add(href)
-
-    return list(pdf_links)
+    for page in crawl([base_url], max_depth=max_depth, max_pages=max_pages):
+        for document in page["documents"]:
+            if document["url"].lower().endswith(".pdf"):
+                pdf_links.add(document["url"])
 
-
-def extract_filename_from_url(url):
-    """Extracts the filename from the URL."""
-    parsed_url = urlparse(url)
-    return os.path.basename(parsed_url.path)
+    return sorted(pdf_links)
 
 
 def download_pdfs(pdf_links, download_folder):
-    """Downloads all PDFs from the list of links, preserving their original filenames."""
-    if not os.path.exists(download_folder):
-        os.makedirs(download_folder)
-
-    for pdf_url in pdf_links:
-        try:
-            response = requests.get(pdf_url, stream=True)
-            response.raise_for_status()
-            file_name = extract_filename_from_url(pdf_url)
-            file_path = os.path.join(download_folder, file_name)
+    """Downloads all PDFs from the list of links, preserving their original filenames.
 
-            with open(file_path, "wb") as pdf_file:
-                for chunk in response.iter_content(chunk_size=1024):
-                    pdf_file.write(chunk)
-
-            print(f"Downloaded: {file_name}")
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to download {pdf_url}: {e}")
+    Runs concurrently and skips files that are unchanged since the last run (see downloader.py).
+    """
+    return download_all(pdf_links, download_folder)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Download every PDF linked from the site.")
+    parser.add_argument("--depth", type=int, default=0, help="link hops to follow within the section")
+    parser.add_argument("--max-pages", type=int, default=100)
+    args = parser.parse_args()
+
     base_url = "https://aktiwari.com/matrimonial-cases-legal-drafts-formats/"
     download_folder = "doj_pdfs"
 
-    driver = setup_driver()
-
-    try:
-        print("Finding PDF links...")
-        pdf_links = find_pdf_links(driver, base_url)
-        print(f"Found {len(pdf_links)} PDFs.")
-
-        print("Downloading PDFs with original filenames...")
-        download_pdfs(pdf_links, download_folder)
+    print("Finding PDF links...")
+    pdf_links = find_pdf_links(base_url, args.depth, args.max_pages)
+    print(f"Found {len(pdf_links)} PDFs.")
 
-    finally:
-        driver.quit()
+    print("Downloading PDFs with original filenames...")
+    download_pdfs(pdf_links, download_folder)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,317 @@
+"""Newline-delimited JSON records, appended as they are scraped.
+
+The compression follows the file name:
+- ".jsonl" is plain text;
+- ".jsonl.gz" is gzip;
+- ".jsonl.zst" is zstd and needs the zstandard package.
+
+A RecordWriter starts the file afresh unless append=True. Plain files are
+flushed after every record. Compressed files are flushed every flush_every
+records, at a point where the bytes written so far decode on their own. If a
+crawl dies, everything up to the last flush stays readable. Appending to such a
+file first rewrites it down to its readable records, because new data after a
+torn gzip member or zstd frame would not decode. read_records skips a torn last
+line or a truncated compressed tail instead of failing.
+
+This file is the maintained original of the reader. chatbot-api and
+find_docs_api are built from their own directories, so each carries a generated
+copy of the reader section in app/records.py; --sync-copies rewrites them and
+each service's tests fail when its copy has drifted.
+
+Usage:
+    python records.py crawled_pages.jsonl.gz          # count records and show the first one
+    python records.py --sync-copies                   # regenerate the service copies of the reader
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import zlib
+
+# --- reader: copied verbatim into the services' app/records.py (see reader_copy) ---
+try:
+    from zstandard import ZstdError as _ZstdError
+except ImportError:  # optional; only needed for .zst files
+    class _ZstdError(Exception):
+        pass
+
+
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+# Raised when a compressed file ends mid-member/frame or has data appended after such a tail
+TRUNCATED_ERRORS = (EOFError, zlib.error, _ZstdError)
+
+
+def is_jsonl(path):
+    return path.endswith(JSONL_SUFFIXES)
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd files need the zstandard package (pip install zstandard)")
+    return zstandard
+
+
+def _decompressor(path):
+    if path.endswith(".gz"):
+        return zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)  # one gzip member
+    return _zstd().ZstdDecompressor().decompressobj()  # one zstd frame
+
+
+def _salvage(path, member_start, offset, chunk):
+    """Output of chunk up to the byte where it stops decoding, replaying its member/frame from member_start."""
+    decompressor = _decompressor(path)
+    with open(path, "rb") as f:
+        f.seek(member_start)
+        remaining = offset - member_start
+        while remaining:
+            data = f.read(min(remaining, 1 << 16))
+            decompressor.decompress(data)  # already yielded
+            remaining -= len(data)
+    for i in range(len(chunk)):
+        try:
+            yield decompressor.decompress(chunk[i:i + 1])
+        except TRUNCATED_ERRORS:
+            return
+
+
+def _decompressed(path, chunk_size=1 << 16):
+    """Decompressed bytes of each gzip member / zstd frame in path, as they decode.
+
+    Raises EOFError if the last member/frame is cut short, and zlib.error or
+    ZstdError if the data stops decoding. Everything before that point has
+    already been yielded.
+    """
+    decompressor, pending = _decompressor(path), False
+    member_start = 0
+    with open(path, "rb") as f:
+        while True:
+            offset = f.tell()
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            while chunk:
+                try:
+                    output = decompressor.decompress(chunk)
+                except TRUNCATED_ERRORS as e:
+                    # The failed call drops what it decoded before the bad byte; recover that first
+                    yield from _salvage(path, member_start, offset, chunk)
+                    raise e
+                yield output
+                pending = not decompressor.eof
+                if pending:
+                    break
+                offset += len(chunk) - len(decompressor.unused_data)
+                member_start, chunk = offset, decompressor.unused_data
+                decompressor = _decompressor(path)
+    if pending:
+        raise EOFError("compressed data ends mid-stream")
+
+
+def _lines(path):
+    if not path.endswith((".gz", ".zst")):
+        with open(path, "rb") as f:
+            yield from f
+        return
+    tail = b""
+    try:
+        for data in _decompressed(path):
+            lines = (tail + data).split(b"\n")
+            tail = lines.pop()
+            yield from lines
+    except TRUNCATED_ERRORS as e:
+        logging.warning(f"{path}: stopped at a truncated compressed tail ({e!r})")
+    if tail:
+        yield tail
+
+
+def read_records(path):
+    """Yields the records of a .jsonl[.gz|.zst] file one at a time."""
+    for line_number, line in enumerate(_lines(path), 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            logging.warning(f"{path}:{line_number}: skipping a malformed record")
+
+
+def _iter_json_array(path, chunk_size=1 << 16):
+    """Items of a top-level JSON array decoded one at a time; any other document is yielded whole."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            document = json.loads(buffer + f.read())
+            yield from document if isinstance(document, list) else [document]
+            return
+        pos, eof, size = 1, False, chunk_size
+
+        def refill():
+            nonlocal buffer, pos, eof
+            more = f.read(size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    raise json.JSONDecodeError("Unterminated array", buffer, pos)
+                refill()
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                error = None
+            except json.JSONDecodeError as e:
+                end, error = None, e
+            if end is None or (end == len(buffer) and not eof):
+                # The item runs past the buffer (or may, for a bare number): read more and retry
+                if eof:
+                    raise error
+                size = min(size * 2, 1 << 26) if end is None else size
+                refill()
+                continue
+            size = chunk_size
+            pos = end
+            yield item
+
+
+def iter_records(path):
+    """Yields the records of path one at a time, for JSONL and plain .json arrays alike."""
+    if is_jsonl(path):
+        yield from read_records(path)
+        return
+    yield from _iter_json_array(path)
+
+
+# --- end of reader ---
+
+
+def _complete(path):
+    """True if every gzip member / zstd frame in path runs to its end."""
+    try:
+        for _ in _decompressed(path):
+            pass
+    except TRUNCATED_ERRORS:
+        return False
+    return True
+
+
+def _repair(path):
+    """Rewrites a torn compressed file down to its readable records."""
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".repair-{os.getpid()}-{name}")  # keeps the compression suffix
+    with RecordWriter(tmp_path) as writer:
+        for record in read_records(path):
+            writer.write(record)
+    os.replace(tmp_path, path)
+    logging.warning(f"{path} ended mid-write; kept its {writer.count} readable records before appending")
+
+
+class RecordWriter:
+    """Writes one JSON object per line to path, replacing it unless append=True."""
+
+    def __init__(self, path, flush_every=100, append=False):
+        self.path = path
+        self.flush_every = flush_every
+        self.count = 0
+        compressed = path.endswith((".gz", ".zst"))
+        if append and compressed and os.path.exists(path) and os.path.getsize(path) and not _complete(path):
+            _repair(path)
+        self._raw = open(path, "ab" if append else "wb")
+        if self._raw.tell() and not compressed:
+            with open(path, "rb") as f:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    self._raw.write(b"\n")  # end a line torn by an earlier crash
+        if path.endswith(".gz"):
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        elif path.endswith(".zst"):
+            self._stream = _zstd().ZstdCompressor().stream_writer(self._raw)
+        else:
+            self._stream = None
+            self.flush_every = 1
+
+    def write(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        (self._stream or self._raw).write(line)
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.flush()
+
+    def flush(self):
+        if isinstance(self._stream, gzip.GzipFile):
+            self._stream.flush(zlib.Z_SYNC_FLUSH)
+        elif self._stream is not None:
+            self._stream.flush(_zstd().FLUSH_BLOCK)
+        self._raw.flush()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()  # writes the gzip trailer / ends the zstd frame
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+READER_COPIES = (
+    os.path.join(_HERE, "..", "chatbot-api", "app", "records.py"),
+    os.path.join(_HERE, "..", "find_docs_api", "app", "records.py"),
+)
+_COPY_HEADER = '''"""Streaming reader for scraped record files (JSON arrays or .jsonl[.gz|.zst]).
+
+Generated from backend/scrape data/records.py by `python records.py --sync-copies`;
+edit the original, not this copy. The service tests fail if the two drift.
+"""
+import json
+import logging
+import zlib
+
+'''
+
+
+def reader_copy():
+    """Source of the services' app/records.py: the reader section of this file."""
+    with open(os.path.join(_HERE, "records.py"), "r", encoding="utf-8") as f:
+        source = f.read()
+    start = source.index("# --- reader:")
+    start = source.index("\n", start) + 1
+    end = source.index("# --- end of reader ---")
+    return _COPY_HEADER + source[start:end].rstrip() + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a JSON or JSONL record file.")
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--sync-copies", action="store_true", help="regenerate the service copies of the reader")
+    args = parser.parse_args()
+    if args.sync_copies:
+        for path in READER_COPIES:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(reader_copy())
+            print(f"Wrote {os.path.normpath(path)}")
+        return
+    if not args.path:
+        parser.error("a record file is required")
+    count, first = 0, None
+    for record in iter_records(args.path):
+        count += 1
+        first = first or record
+    print(f"{count} records")
+    if first is not None:
+        print(json.dumps(first, ensure_ascii=False, indent=4)[:2000])
+
+
+if __name__ == "__main__":
+    main()
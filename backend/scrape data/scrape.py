@@ -1,69 +1,99 @@
-import os
 import json
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from crawler import BrowserPool, Crawler, CrawlState
+from records import RecordWriter, is_jsonl
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
 class SCNJDGScraper:
-    def __init__(self, driver_path: str):
+    def __init__(self, driver_path: str = None, max_depth: int = 0, max_pages: int = 50, state_path: str = None):
         self.driver_path = driver_path
-        self.driver = webdriver.Chrome(service=Service(self.driver_path))
-        self.wait = WebDriverWait(self.driver, 20)
         self.url = "https://scdg.sci.gov.in/scnjdg/"
+        # Static HTML first; Chrome is only started if div.main-content is not in the served page
+        browser = BrowserPool(size=1, launch=self._launch_driver, page_load_seconds=20)
+        # With a state file, pages unchanged since the last run are answered by a 304
+        state = CrawlState(state_path) if state_path else None
+        self.crawler = Crawler(max_depth=max_depth, max_pages=max_pages, wait_selector='div.main-content',
+                               browser=browser, state=state)
+        self.pages = []
+        self.changes = []
+
+    def _launch_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+
+        if self.driver_path is None:
+            from crawler import setup_driver
+            return setup_driver()
+        options = Options()
+        options.add_argument("--headless")
+        return webdriver.Chrome(service=Service(self.driver_path), options=options)
 
     def navigate(self):
-        self.driver.get(self.url)
-        logging.info("Navigated to the website.")
+        records = list(self.crawler.crawl([self.url]))
+        self.pages = [record for record in records if record['change'] != 'removed']
+        self.changes = [record for record in records if record['change'] != 'unchanged']
+        logging.info(f"Fetched {len(self.pages)} page(s), {self.crawler.stats['rendered']} rendered in a browser.")
 
     def scrape_data(self):
         try:
-            # Wait for the main content to be loaded
-            main_content = self.wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'div.main-content'))
-            )
-            logging.info("Main content loaded successfully.")
-            
+            if not self.pages:
+                logging.error("The main page could not be fetched.")
+                return None
+            main_page = self.pages[0]
+
             # Example: Scraping specific data
             # Adjust the following lines based on the actual structure of the page
             data = {}
-            data['title'] = self.driver.title
-            # Add more scraping logic here as needed
+            data['url'] = main_page['url']
+            data['title'] = main_page['title']
+            data['description'] = main_page['description']
+            data['paragraphs'] = main_page['paragraphs']
+            data['links'] = main_page['links']
+            if len(self.pages) > 1:
+                data['pages'] = [
+                    {key: page[key] for key in ('url', 'title', 'description', 'paragraphs', 'links')}
+                    for page in self.pages[1:]
+                ]
 
             return data
 
-        except TimeoutException:
-            logging.error("Timeout while waiting for the main content to load.")
-            # Optionally, take a screenshot for debugging
-            self.driver.save_screenshot('timeout_error.png')
-            return None
-
         except Exception as e:
             logging.error(f"An error occurred: {e}")
             return None
 
-    def save_results(self, data, filename='sci_data.json'):
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+    def save_results(self, data, filename='sci_data.json', append=False):
+        if is_jsonl(filename):
+            # One line per run; with append=True earlier snapshots are kept
+            with RecordWriter(filename, append=append) as writer:
+                writer.write(data)
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
         logging.info(f"Data saved to {filename}")
 
+    def save_changes(self, filename='sci_delta.json'):
+        """Pages added, changed or removed since the previous run (needs a state file)."""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.changes, f, ensure_ascii=False, indent=4)
+        logging.info(f"{len(self.changes)} changes saved to {filename}")
+
     def close(self):
-        self.driver.quit()
-        logging.info("WebDriver closed successfully.")
+        self.crawler.close()
+        logging.info("Crawler closed successfully.")
 
 def main():
-    scraper = SCNJDGScraper(driver_path='C:\\Program Files (x86)\\chromedriver.exe')  # Update with your path
+    scraper = SCNJDGScraper(driver_path='C:\\Program Files (x86)\\chromedriver.exe',  # Update with your path
+                            state_path='sci_state.json')
     scraper.navigate()
     data = scraper.scrape_data()
     if data:
         scraper.save_results(data)
+        scraper.save_changes()
     scraper.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,57 +1,85 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+import argparse
 import json
 
-# Set up Chrome options
-options = Options()
-options.add_argument("--headless")  # Run Chrome in headless mode (no GUI)
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
+from crawler import Crawler, CrawlState
+from records import RecordWriter, is_jsonl
 
-# Initialize the driver using webdriver-manager
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+# URL to scrape
+URL = "https://njdg.ecourts.gov.in/scnjdg/?p=home/index&app_token=a72b77e610e53b50a7b833a7cf4544f27ba3108b5dd8db9ca0a248e64e32fde3"
 
-try:
-    # URL to scrape
-    url = "https://njdg.ecourts.gov.in/scnjdg/?p=home/index&app_token=a72b77e610e53b50a7b833a7cf4544f27ba3108b5dd8db9ca0a248e64e32fde3"
-    driver.get(url)
 
-    # Extract title
-    title = driver.title
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the NJDG home page (and, with --depth, its section).")
+    parser.add_argument("--depth", type=int, default=0, help="link hops to follow within the section")
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--out", default="selenium_scraped_data.json",
+                        help=".json, or .jsonl[.gz|.zst] to write each page as it is scraped")
+    parser.add_argument("--append", action="store_true",
+                        help="add to a .jsonl[.gz|.zst] --out instead of replacing it")
+    parser.add_argument("--state", help="crawl state from earlier runs; unchanged pages are not downloaded again")
+    parser.add_argument("--delta", help="with --state: also write the added/changed/removed pages here")
+    args = parser.parse_args()
 
-    # Extract meta description
-    description = driver.find_element(By.XPATH, '//meta[@name="description"]')
-    description_content = description.get_attribute("content") if description else "No description available"
+    # Plain HTTP first; headless Chrome only for pages that need JavaScript
+    crawler = Crawler(max_depth=args.depth, max_pages=args.max_pages,
+                      state=CrawlState(args.state) if args.state else None)
+    # JSONL outputs get each page/change as it is scraped; only .json outputs are buffered
+    out = RecordWriter(args.out, append=args.append) if is_jsonl(args.out) else None
+    delta = RecordWriter(args.delta) if args.delta and is_jsonl(args.delta) else None
+    pages, changes = [], []
+    page_count = change_count = 0
+    try:
+        for record in crawler.crawl([URL]):
+            if args.delta and record["change"] != "unchanged":
+                change = record if record["change"] == "removed" else {
+                    key: record[key] for key in ("change", "url", "title", "description", "paragraphs", "links")
+                }
+                change_count += 1
+                if delta is not None:
+                    delta.write(change)
+                else:
+                    changes.append(change)
+            if record["change"] == "removed":
+                continue
+            page = {
+                "url": record["url"],
+                "title": record["title"],
+                "description": record["description"] or "No description available",
+                "paragraphs": record["paragraphs"],
+                "links": record["links"] + record["documents"],
+            }
+            page_count += 1
+            if out is not None:
+                out.write(page)
+            else:
+                pages.append(page)
+    except Exception as e:
+        print(f"Error occurred: {e}")
+        return
+    finally:
+        crawler.close()
+        for writer in (out, delta):
+            if writer is not None:
+                writer.close()
 
-    # Extract paragraphs
-    paragraphs = driver.find_elements(By.TAG_NAME, "li")
-    paragraph_texts = [p.text for p in paragraphs]
+    if out is None:
+        # A single page keeps the original one-object layout
+        data = pages[0] if args.depth == 0 and pages else pages
 
-    # Extract links
-    links = driver.find_elements(By.TAG_NAME, "a")
-    links_data = [{"text": link.text, "url": link.get_attribute("href")} for link in links if link.get_attribute("href")]
+        # Save to JSON
+        with open(args.out, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file, ensure_ascii=False, indent=4)
 
-    # Combine data into a dictionary
-    data = {
-        "title": title,
-        "description": description_content,
-        "paragraphs": paragraph_texts,
-        "links": links_data,
-    }
+        # Print the JSON data
+        print(json.dumps(data, ensure_ascii=False, indent=4))
+    else:
+        print(f"{page_count} pages written to {args.out}")
 
-    # Save to JSON
-    with open("selenium_scraped_data.json", "w", encoding="utf-8") as json_file:
-        json.dump(data, json_file, ensure_ascii=False, indent=4)
+    if args.delta:
+        if delta is None:
+            with open(args.delta, "w", encoding="utf-8") as json_file:
+                json.dump(changes, json_file, ensure_ascii=False, indent=4)
+        print(f"{change_count} changes written to {args.delta}")
 
-    # Print the JSON data
-    print(json.dumps(data, ensure_ascii=False, indent=4))
-
-except Exception as e:
-    print(f"Error occurred: {e}")
-
-finally:
-    # Quit the driver
-    driver.quit()
+if __name__ == "__main__":
+    main()
@@ -76,6 +76,7 @@ export function ChatInterface() {
   const [cnrNumber, setCnrNumber] = useState("");
   const [captchaInput, setCaptchaInput] = useState("");
   const [captchaImage, setCaptchaImage] = useState("");
+  const [captchaSession, setCaptchaSession] = useState("");
   const [isCaptchaLoading, setIsCaptchaLoading] = useState(false);
 
   const { t } = useTranslation(); // Initialize useTranslation
@@ -231,6 +232,7 @@ export function ChatInterface() {
       const response = await axios.get(`${API_URL}/`);
       if (response.data && response.data.captcha_base64) {
         setCaptchaImage(response.data.captcha_base64);
+        setCaptchaSession(response.data.session || "");
       } else {
         toast.error(t('loading_captcha_invalid_response')); // Translate toast message
       }
@@ -251,6 +253,7 @@ export function ChatInterface() {
       const formData = new FormData();
       formData.append('cino', cnrNumber);
       formData.append('captcha', captchaInput);
+      formData.append('session', captchaSession);
 
       const response = await axios.post('http://127.0.0.1:8000/submit', formData);
 
@@ -42,4 +42,5 @@ export interface CaseStatusResponse {
   success: boolean;
   result: string;
   captcha_base64?: string;
+  session?: string;
 }
\ No newline at end of file